@@ -1,105 +1,106 @@
 '''
 This is a module to contain the data analytics functions of cascade for quantitative investing
 '''
-from datetime import datetime, timedelta
+from datetime import datetime
 from pprint import pprint
-import matplotlib.pyplot as plt
 import numpy as np
 import math
 import time
+import correlation
+import barstore
+import indicators
+import wavelet
+import spectral
+import backfill
+import barcodec
+import resample
+import scanner
 import trader
-import json
+
+#the trend and volatility metrics of bars stored as columns, kept in the indicators module so the scanner can use them without importing the analyst
+barMetrics = indicators.barMetrics
 
 #a class to analyze market data and predict the future based on mathematical models
 class Analyst:
-	#an initialization function for the class taking a boolean value for paper trading
-	def __init__(self, paper=True):
-		self.trader = trader.Trader(paper)
+	#an initialization function for the class taking a boolean value for paper trading, an optional client to use instead of alpaca and whether to skip printing the portfolio
+	def __init__(self, paper=True, client=None, quiet=False):
+		self.trader = trader.Trader(paper, client, quiet)
+
+		#the store that holds historical market data
+		self.store = barstore.BarStore()
 
 	#this is a function to get the trend and volatility of a set of market data
 	def getAssetData(self, asset_symbol, timeunit="hour", timeamount=1, timestart=datetime.now()):
-		#get the asset information
-		asset = self.trader.alpaca.get_asset(asset_symbol)
-
 		#get market data based on the asset class
-		if (asset.__getattr__("class") == "us_equity"):
-			bars = self.trader.getStockBars(asset_symbol, timeunit, timeamount, timestart)
-		elif(asset.__getattr__("class") == "crypto"):
-			bars = self.trader.getCryptoBars(asset_symbol, timeunit, timeamount, timestart)
-
-		#make variables to get the total trend and volatility
-		total_trend = 0
-		total_volatility = 0
-
-		prev_volatility = 0
-		vol_change = 0
-
-		vol_trend = 0
-
-		bars_array = []
-
-		#analyze the market data
-		for bar in bars:
-			bars_array.append(bar)
-
-			#calculate trend
-			trend = bar.c - bar.o
+		bars = self.trader.getBars(asset_symbol, timeunit, timeamount, timestart)
 
-			#calculate trend in percentage
-			percent_trend = (trend*100) / bar.vw
+		#turn the bars into columns of numbers once and calculate the metrics with array operations
+		bars_array = list(bars)
+		total_trend, total_volatility, vol_change, vol_trend = barMetrics(barstore.barsToColumns(bars_array))
 
-			#add this trend to the total trend calculation
-			total_trend = total_trend + percent_trend
+		#return the total percent trend and total volatility
+		return bars_array, total_trend, total_volatility, vol_change, vol_trend
 
-			#calculate the percentage volatility up and down
-			percent_up = bar.h - bar.vw
-			percent_up = (percent_up*100) / bar.vw
-			percent_down = bar.vw - bar.l
-			percent_down = (percent_down*100) / bar.vw
+	#this is a function to get the trend and volatility of many assets with a single batch of array operations
+	def getUniverseData(self, asset_symbols, timeunit="hour", timeamount=1, timestart=datetime.now()):
+		#get the market data for all of the assets at once and turn it into columns of numbers
+		universe_bars = self.trader.getBarsMany(asset_symbols, timeunit, timeamount, timestart)
+		universe_columns = [barstore.barsToColumns(universe_bars[asset_symbol]) for asset_symbol in asset_symbols]
 
-			vol_trend_current = (bar.h - bar.vw) - (bar.vw - bar.l)
-			vol_trend = vol_trend + vol_trend_current
+		#stack the columns into (symbols x bars) blocks and summarize all of the assets at once
+		trend, volatility, vol_change, vol_trend = barMetrics(barstore.stackColumns(universe_columns))
 
-			#get the total volatility
-			percent_volatility = percent_up + percent_down
+		#return the metrics for each asset, in the same order as the symbols
+		return {
+			"symbols": list(asset_symbols),
+			"trend": trend,
+			"vol": volatility,
+			"vol_change": vol_change,
+			"vol_trend": vol_trend
+		}
 
-			#calculate the volatility change based on the volatility of the previous bar
-			if (percent_volatility > prev_volatility):
-				vol_change = vol_change + 1
-			elif (percent_volatility < prev_volatility):
-				vol_change = vol_change - 1
+	#this is a function to rank a universe of assets by their trend and volatility metrics, returns the k highest and lowest assets for each metric
+	def scanUniverse(self, asset_symbols, timeunit="hour", timeamount=1, timestart=datetime.now(), k=10):
+		return scanner.Scanner(self.trader, k).scan(asset_symbols, timeunit, timeamount, timestart)
 
-			#add this volatility to the total volatility calculation
-			total_volatility = total_volatility + percent_volatility
+	#this is a function to analyze two assets for correlations
+	def correlateAssets(self, benchmark, comparator, timeunit="hour", timeamount=1, timestart=datetime.now()):
+		#get the trend and volatility for the benchmark and comparator market data
+		universe_data = self.getUniverseData([benchmark, comparator], timeunit, timeamount, timestart)
 
-			#store this bars volatility for analysis in the next loop iteration
-			prev_volatility = percent_volatility
+		#calculate the relationship between the trends and the volatility of the two assets
+		trend_relationship = correlation.relationshipMatrix(universe_data["trend"])[0, 1]
+		volatility_relationship = correlation.relationshipMatrix(universe_data["vol_change"])[0, 1]
 
-		#return the total percent trend and total volatility
-		return bars_array, total_trend, total_volatility, vol_change, vol_trend
+		#return the trend and volatility relationship between the two assets
+		return str(trend_relationship), str(volatility_relationship)
 
-	#this is a function to analyze two assets for correlations
-	def correlateAssets(self, benchmark, comparator, timeunit="hour", timeamount=1, timestart=datetime.now()):
-		#get the trend and volatility for the benchmark market data
-		benchmark_bars, benchmark_trend, benchmark_volatility, benchmark_vol_change, benchmark_vol_trend = self.getAssetData(benchmark, timeunit, timeamount, timestart)
+	#this is a function to get the correlations between every asset in a universe of assets
+	def correlateUniverse(self, asset_symbols, timeunit="hour", timeamount=1, timestart=datetime.now(), method="pearson", window=None, step=1):
+		#get the market data for all of the assets at once
+		universe_bars = self.trader.getBarsMany(asset_symbols, timeunit, timeamount, timestart)
+		universe_columns = [barstore.barsToColumns(universe_bars[asset_symbol]) for asset_symbol in asset_symbols]
 
-		#get the trend and volatility for the comparator market data
-		comparator_bars, comparator_trend, comparator_volatility, comparator_vol_change, comp_vol_trend = self.getAssetData(comparator, timeunit, timeamount, timestart)
+		#line up the closing prices of the assets on the timestamps they all share and get the returns
+		timestamps, closes = barstore.alignColumns(universe_columns, "c")
+		returns = correlation.priceReturns(closes)
 
-		#calculate the relationship between the trends of the two assets
-		if ((benchmark_trend > 0 and comparator_trend > 0) or (benchmark_trend < 0 and comparator_trend < 0) or (benchmark_trend == 0 and comparator_trend == 0)):
-			trend_relationship = "linear"
+		#get one correlation matrix for the whole time frame or one for each rolling window
+		if (window):
+			matrix = correlation.rollingMatrices(returns, window, step, method)
 		else:
-			trend_relationship = "inverse"
+			matrix = correlation.correlationMatrix(returns, method)
 
-		#calculate the relationship between the volatility of the two assets
-		if ((benchmark_vol_change > 0 and comparator_vol_change > 0) or (benchmark_vol_change < 0 and comparator_vol_change < 0) or (benchmark_vol_change == 0 and comparator_vol_change == 0)):
-			volatility_relationship = "linear"
-		else:
-			volatility_relationship = "inverse"
+		#get the trend and volatility relationships of every pair of assets
+		trend, volatility, vol_change, vol_trend = barMetrics(barstore.stackColumns(universe_columns))
 
-		#return the trend and volatility relationship between the two assets
-		return trend_relationship, volatility_relationship
+		return {
+			"symbols": list(asset_symbols),
+			"timestamps": timestamps,
+			"correlation": matrix,
+			"trend_rel": correlation.relationshipMatrix(trend),
+			"vol_rel": correlation.relationshipMatrix(vol_change)
+		}
 
 	#this is a function that returns the data and relationships for an asset over a specific time frame
 	def getAssetPairData(self, asset_symbol, comparator, timeunit="hour", timeamount=1, timestart=datetime.now()):
@@ -122,8 +123,8 @@ class Analyst:
 
 		return input_data
 
-	#this is a function to return a range of values to plot a wave function
-	def getWave(self, wave):
+	#this is a function to calculate the lifetime of a wave and the probability of it showing up
+	def waveStats(self, wave):
 		#get different attributes of the wave
 		bar_count = len(wave["order"])
 		bar_period = wave["bar_period"]
@@ -141,155 +142,170 @@ class Analyst:
 		#calculate the probability of the wave showing up in the wave's lifetime
 		wave["probability"] = (bar_count / wave["lifetime"])
 
+		return wave
+
+	#this is a function to return a range of values to plot a wave function
+	def getWave(self, wave):
+		#calculate the lifetime and probability of the wave
+		wave = self.waveStats(wave)
+
+		#calculate the starting and ending points of each wave
+		bar_period = wave["bar_period"]
+		start = wave["order"][0]*bar_period
+		end = wave["order"][-1]*bar_period
+
 		#calculate the length and cycles of this function
 		length = bar_period + end
 		final_x_range = np.arange(start, length, length/800)
 
-		#get the x and y value ranges for this function
+		#get the x and y value ranges for this function, fitted waves have their own frequency and phase
 		wave_x = final_x_range
-		wave_y = ( wave["amplitude"] * np.sin(wave_x) ) + wave["intercept"]
+		wave_y = ( wave["amplitude"] * np.sin((wave.get("frequency", 1)*wave_x) + wave.get("phase", 0)) ) + wave["intercept"]
 
 		#return the x and y ranges
 		return wave_x, wave_y, wave
 
-	#analyze data to make a prediction
-	def predictAssetPair(self, asset_symbol, comparator, timeunit="hour", timeamount=8, timestart=datetime.now()):
-		#get stock data for this pair of asset data
-		asset_pair_data = self.getAssetPairData(asset_symbol, comparator, timeunit, timeamount, timestart)
+	#this is a function to get the x and y values to plot bars of market data as a wave
+	def getBarValues(self, columns, bar_period=50):
+		#each bar is drawn over the open, high, volume weighted price, low and close at fifths of the bar period
+		offsets = np.array([0, bar_period/4, bar_period/2, (bar_period/4)*3, bar_period])
+		starts = bar_period*np.arange(len(columns["t"]))
 
-		x_values = []
-		y_values = []
+		x_values = (starts[:, None] + offsets[None, :]).ravel()
+		y_values = np.stack((columns["o"], columns["h"], columns["vw"], columns["l"], columns["c"]), axis=-1).ravel()
 
-		high_median = 0
-		low_median = 0
+		return x_values, y_values
 
-		#get the amount of x values to represent each bar over
-		bar_period = 50
+	#this is a function to group bars of market data into waves by the median of their high and low values
+	def getSegmentWaves(self, columns, bar_period=50):
+		highs = np.asarray(columns["h"], dtype=float)
+		lows = np.asarray(columns["l"], dtype=float)
+		vws = np.asarray(columns["vw"], dtype=float)
+		bar_count = len(highs)
 
-		#loop through market data to plot the data as a wave
-		for increment in range(len(asset_pair_data["bars"])):
-			#calculate the x values for this set of data
-			start_x = bar_period*increment
-			end_x = start_x+bar_period
-			fourth_x = start_x + ( (end_x-start_x)/4 )
-			mid_x = start_x + ( (end_x-start_x)/2 )
-			three_fourth_x = start_x + ( ((end_x-start_x)/4)*3 )
+		if (not bar_count):
+			return []
 
-			#get the current bar of asset data
-			bar = asset_pair_data["bars"][increment]
+		#calculate the median value for the high and low of each bar of data
+		medians = lows + ((highs - lows) / 2)
 
-			#get the x and y values to depict this bar of data
-			x_values = x_values + [start_x, fourth_x, mid_x, three_fourth_x, end_x]
-			y_values = y_values + [bar.o, bar.h, bar.vw, bar.l, bar.c]
+		#the highest median is the running maximum, the lowest median is the lowest of the bars that did not set a new high
+		prev_high = np.maximum(np.concatenate(([0.0], np.maximum.accumulate(medians)[:-1])), 0)
+		new_high = medians > prev_high
+		high_median = max(float(medians.max()), 0.0)
+		low_median = float(medians[~new_high].min()) if (~new_high).any() else 0.0
 
-			#calculate the median value for the high and low of this bar of data
-			median = (bar.h - bar.l) / 2
-			median = bar.l + median
+		#calculate the different median segments to categorize bars into
+		segment_increment = (high_median - low_median) / bar_count
+		segment_increments = low_median + (segment_increment*np.arange(bar_count+1))
 
-			#calculate and update the highest median and lowest median value for this set of bars
-			if (median > high_median):
-				high_median = median
-			elif (median < low_median or low_median == 0):
-				low_median = median
+		#find the segment closest to each median with a binary search, ties go to the lower segment
+		upper = np.clip(np.searchsorted(segment_increments, medians), 1, bar_count)
+		lower = upper - 1
+		closer_upper = np.abs(medians - segment_increments[upper]) < np.abs(medians - segment_increments[lower])
+		segments = np.where(closer_upper, upper, lower)
 
-		#calculate the different median segments to categorize bars into
-		segment_increment = (high_median - low_median) / len(asset_pair_data["bars"])
-		segment_increments = []
-		for segment in range(len(asset_pair_data["bars"])+1):
-			segment_increments.append(low_median + (segment_increment*segment))
+		#get the amount of bars and the sum of the high, low and median values in each segment
+		bar_amounts = np.bincount(segments, minlength=bar_count+1)
+		high_sums = np.bincount(segments, weights=highs, minlength=bar_count+1)
+		median_sums = np.bincount(segments, weights=medians, minlength=bar_count+1)
+
+		#get the places of the bars in time for each segment, in order of time
+		places = np.argsort(segments, kind="stable")
+		bar_places = np.split(places, np.cumsum(bar_amounts)[:-1])
+
+		#an array to store the information about each wave and where they show themselves
+		waves = []
 
-		#make an object to contain arrays of bars belonging to their respective segments (the dictionary keys)
-		bar_sections = {}
-		for segment in segment_increments:
-			bar_sections[str(segment)] = []
+		for segment in np.flatnonzero(bar_amounts):
+			#calculate the average high and median values for all bars in this category
+			high_avg = high_sums[segment] / bar_amounts[segment]
+			median_avg = median_sums[segment] / bar_amounts[segment]
 
-		#categorize bars of data into different segments
-		for bar in asset_pair_data["bars"]:
-			#a variable to store the segment the bar is closest too
-			close_value = 0
+			#make a dictionary that represents a wave, the amplitude is the distance from the median to the high
+			waves.append({
+				"amplitude": float(high_avg - median_avg),
+				"intercept": float(median_avg),
+				"order": bar_places[segment].tolist(),
+				"bar_period": bar_period
+			})
 
-			#calculate the median value of this bar of data
-			median = (bar.h - bar.l) / 2
-			median = bar.l + median
+		return waves
 
-			#loop through the segments to see which range this bar of data falls into
-			for segment in segment_increments:
-				#if the close_value is the default, then define it as the current segment
-				if (close_value == 0):
-					close_value = segment
+	#this is a function to break a column of bars of market data into waves with the haar wavelet transform, one wave for each frequency band
+	def getWaveletWaves(self, columns, bar_period=50, levels=None, column="c"):
+		return wavelet.bandWaves(columns[column], levels, bar_period)
 
-				#get two difference calculations to compare to each other to find the segment closest to the value of the median
-				past_diff = abs(median - close_value)
-				current_diff = abs(median - segment)
+	#this is a function to get the wavelet band energies and waves of the stored market data of many assets at once
+	def getStoredWavelets(self, asset_symbols, timeunit="hour", timestart=None, timeend=None, column="c", levels=None, bar_period=50):
+		#line up the stored values of the assets on the timestamps they all share
+		columns_list = [self.retrieveData(asset_symbol, timeunit, timestart, timeend) for asset_symbol in asset_symbols]
+		timestamps, values = barstore.alignColumns(columns_list, column)
 
-				#if this segment is closer to this bars median than the previous one, then make the close value the current segment
-				if (current_diff < past_diff):
-					close_value = segment
+		#transform every asset at once and get the energy of each band
+		details, approx, skipped = wavelet.haarTransform(values, levels)
+		energies = wavelet.bandEnergies(details, approx)
 
-			#add the median of this bar of data to the object for later access
-			bar.median = median
-			bar.order = asset_pair_data["bars"].index(bar)
+		return {
+			"symbols": list(asset_symbols),
+			"timestamps": timestamps[skipped:],
+			"energies": energies.T,
+			"waves": {asset_symbol: wavelet.bandWaves(row, levels, bar_period) for asset_symbol, row in zip(asset_symbols, values)}
+		}
 
-			#add the bar to the segment it is closest too
-			bar_sections[str(close_value)].append(bar)
+	#this is a function to break a column of bars of market data into waves with the strongest cycles of its periodogram, fitted by least squares
+	def getSpectralWaves(self, columns, bar_period=50, components=3, column="c"):
+		return spectral.spectralWaves(columns[column], components, bar_period)
 
-		#an array to store the average values of the groups of bars (high, low, and median values)
-		avg_values = []
+	#this is a function to fit the strongest cycles of the stored market data of many assets at once
+	def getStoredSpectra(self, asset_symbols, timeunit="hour", timestart=None, timeend=None, column="c", components=3, bar_period=50):
+		#line up the stored values of the assets on the timestamps they all share
+		columns_list = [self.retrieveData(asset_symbol, timeunit, timestart, timeend) for asset_symbol in asset_symbols]
+		timestamps, values = barstore.alignColumns(columns_list, column)
 
-		#an array to store the information about each wave and where they show themselves
-		waves = []
+		if (len(timestamps) < spectral.MIN_BARS):
+			return {"symbols": list(asset_symbols), "timestamps": timestamps, "fit": None, "waves": {asset_symbol: [] for asset_symbol in asset_symbols}}
 
-		#get the average high, low, and median of each group of bar data
-		for segment in segment_increments:
-			#make empty variables for the sum of all highs, lows, and medians
-			high_sum = 0
-			low_sum = 0
-			median_sum = 0
-			vw_sum = 0
-
-			#an array to store the locations of the bars in time
-			bar_places = []
-
-			#get the amount of bars to calculate the average of each attribute
-			bar_amount = len(bar_sections[str(segment)])
-
-			#skip this iteration of the loop if there are no bars to calculate
-			if (bar_amount == 0):
-				continue
-
-			#loop through each bar and add the high, low, and median values to the total sum
-			for bar in bar_sections[str(segment)]:
-				high_sum = high_sum + bar.h
-				low_sum = low_sum + bar.l
-				median_sum = median_sum + bar.median
-				vw_sum = vw_sum + bar.vw
-
-				bar_places.append(bar.order)
-
-			#calculate the average high, low, and median values for all bars in this category
-			high_avg = high_sum / bar_amount
-			low_avg = low_sum / bar_amount
-			median_avg = median_sum / bar_amount
-			vw_avg = vw_sum / bar_amount
-
-			#calculate the amplitude of this set of bars in this segment
-			amplitude = high_avg - median_avg
-			y_intercept = median_avg
-
-			#make a dictionary that represents a wave
-			wave = {
-				"amplitude": amplitude,
-				"intercept": y_intercept,
-				"order": bar_places,
-				"bar_period": bar_period
-			}
+		#fit every asset at once
+		fit = spectral.spectralFit(values, components)
+
+		return {
+			"symbols": list(asset_symbols),
+			"timestamps": timestamps,
+			"fit": fit,
+			"waves": {asset_symbol: spectral.spectralWaves(values[row], components, bar_period, {name: fit[name][row] for name in fit}) for row, asset_symbol in enumerate(asset_symbols)}
+		}
+
+	#analyze data to make a prediction, showing a graph of the waves or only returning them if show is false, the waves come from the "segment", "wavelet" or "spectral" method
+	def predictAssetPair(self, asset_symbol, comparator, timeunit="hour", timeamount=8, timestart=datetime.now(), show=True, waves="segment"):
+		#get stock data for this pair of asset data
+		asset_pair_data = self.getAssetPairData(asset_symbol, comparator, timeunit, timeamount, timestart)
+		columns = barstore.barsToColumns(asset_pair_data["bars"])
 
-			#add this wave to the collection of waves
-			waves.append(wave)
+		#get the amount of x values to represent each bar over
+		bar_period = 50
 
-			#add the values of this set of bars to be graphed
-			for i in range(bar_amount):
-				avg_values = avg_values + [median_avg, high_avg, median_avg, low_avg, median_avg]
+		#get the waves of this set of market data along with their lifetime and probability
+		if (waves == "wavelet"):
+			waves = [self.waveStats(wave) for wave in self.getWaveletWaves(columns, bar_period)]
+		elif (waves == "spectral"):
+			waves = [self.waveStats(wave) for wave in self.getSpectralWaves(columns, bar_period)]
+		else:
+			waves = [self.waveStats(wave) for wave in self.getSegmentWaves(columns, bar_period)]
+
+		prediction = {
+			"asset": asset_symbol,
+			"comparator": comparator,
+			"trend_rel": asset_pair_data["trend_rel"],
+			"vol_rel": asset_pair_data["vol_rel"],
+			"waves": waves
+		}
+
+		if (not show):
+			return prediction
+
+		#matplotlib is slow to import, so it is only imported when a graph is shown
+		import matplotlib.pyplot as plt
 
 		print("AMOUNT OF WAVES:", len(waves))
 
@@ -302,54 +318,61 @@ class Analyst:
 			print(new_wave)
 
 		#plot the values of market data
+		x_values, y_values = self.getBarValues(columns, bar_period)
 		plt.plot(x_values, y_values)
 
-		#plt.plot(x_values, avg_values)
-
 		#plot the graph
 		plt.show()
 
+		return prediction
+
+	#make predictions for many pairs of assets without showing any graphs
+	def predictAssetPairs(self, pairs, timeunit="hour", timeamount=8, timestart=datetime.now(), waves="segment"):
+		#get the market data of every asset at once so each prediction is served from the bar cache
+		symbols = list(dict.fromkeys([symbol for pair in pairs for symbol in pair]))
+		self.trader.getBarsMany(symbols, timeunit, timeamount, timestart)
+
+		return [self.predictAssetPair(asset_symbol, comparator, timeunit, timeamount, timestart, show=False, waves=waves) for asset_symbol, comparator in pairs]
+
 	'''
 	THE FUNCTIONS BELOW ARE FOR DATA ANALYTICS AND BACKTESTING OF MODELS
 	'''
 
-	#this is a function to gather and store historical market data
-	def gatherData(self, asset_symbol, timeunit="hour", timeamount=1, increments=6, timestart=datetime.now()):
-		#get the correct time offset
-		if (timeunit == "minute"):
-			timeoffset = timedelta(minutes=timeamount)
-		elif (timeunit == "hour"):
-			timeoffset = timedelta(hours=timeamount)
-		elif (timeunit == "day"):
-			timeoffset = timedelta(days=timeamount)
-		elif (timeunit == "week"):
-			timeoffset = timedelta(weeks=timeamount)
-		elif (timeunit == "month"):
-			timeoffset = timedelta(months=timeamount)
-		elif (timeunit == "year"):
-			timeoffset = timedelta(years=timeamount)
-
-		#make a dictionary to store the datasets
+	#this is a function to gather and store historical market data, optionally exporting all of the stored data of the asset to a compact archive file
+	def gatherData(self, asset_symbol, timeunit="hour", timeamount=1, increments=6, timestart=None, archive=None):
+		#use the current time when the function is called (a default of datetime.now() would be the time the module was imported)
+		if (timestart is None):
+			timestart = datetime.now()
+
+		#get the time range of every increment together, the same way the bars of a single increment are requested
+		start, end = self.trader.getTimeRange(timeunit, timeamount*increments, timestart)
+		timeoffset = trader.UNIT_SECONDS[timeunit]*timeamount
+
+		#load the whole time range into the bar store, one increment per chunk, skipping chunks that were finished before
+		job = backfill.Backfill(self.trader, self.store)
+		job.run([asset_symbol], timeunit, start, end, chunk_bars=timeamount)
+
+		#make a dictionary to store a summary of the datasets
 		datasets = {"timestart": timestart.timestamp(), "data": []}
 
-		#go over the time increments to extract data
+		#go over the time increments from the newest to the oldest to summarize the stored data
 		for x in range(0, increments):
-			#get the starting point from which to extract data
-			starting_point = timestart - (timeoffset*x)
+			#get the starting point from which the data was extracted
+			starting_point = timestart.timestamp() - (timeoffset*x)
 
-			#get data for this time increment
-			bars, trend, vol, vol_change, vol_trend = self.getAssetData(asset_symbol, timeunit, timeamount, starting_point)
+			#get the metrics of the stored bars in this time increment
+			columns = self.store.query(asset_symbol, timeunit, end - (timeoffset*(x+1)), end - (timeoffset*x))
+			trend, vol, vol_change, vol_trend = barMetrics(columns)
 
 			#a dictionary to store data attributes
 			data_dict = {
 				"number": x,
-				"bars": bars,
 				"asset": asset_symbol,
 				"trend": trend,
 				"vol": vol,
 				"vol_change": vol_change,
 				"vol_trend": vol_trend,
-				"starting_point": starting_point.timestamp(),
+				"starting_point": starting_point,
 				"timeunit": timeunit,
 				"timeamount": timeamount
 			}
@@ -357,45 +380,37 @@ class Analyst:
 			#append this dataset to the dictionary
 			datasets["data"].append(data_dict)
 
-		#turn the data dictionary into a json object
-		json_datasets = json.dumps(datasets)
-
-		#write the data object into a json file
-		with open("data.json", "r+") as json_file:
-			#load the json file data
-			json_data = json.load(json_file)
-
-			#add the new market data to the current file data
-			json_data["data"].append(json_datasets)
-
-			#set the position of the file seeker to the beginning (0)
-			json_file.seek(0)
+		#pack the stored data of this asset into an archive for shipping to other machines
+		if (archive):
+			barcodec.writeArchive(archive, self.store.query(asset_symbol, timeunit))
+			datasets["archive"] = archive
 
-			#dump the new data into the json file
-			json.dump(json_data, json_file, indent=4)
+		#return the summary of the data that was gathered
+		return datasets
 
-			#close the file
-			json_file.close()
+	#this is a function to load the historical market data of many assets between two points in time into the bar store (up to now if no end is given), it can be stopped and run again to resume
+	def backfillData(self, asset_symbols, timeunit="hour", timestart=None, timeend=None, chunk_bars=10000, concurrency=None):
+		job = backfill.Backfill(self.trader, self.store)
 
-	#this is a function to read market data from a json file
-	def retrieveData(self, asset_symbol):
-		#retrieve historical data from the json file
-		json_file = open("data.json", "r+")
+		return job.run(asset_symbols, timeunit, timestart, timeend, chunk_bars, concurrency)
 
-		#get the json data from the file
-		json_data = json.load(json_file)
+	#this is a function to read stored market data for an asset between two points in time, from the bar store or from an archive file
+	def retrieveData(self, asset_symbol, timeunit="hour", timestart=None, timeend=None, archive=None):
+		#convert datetimes into timestamps to search the store with
+		if (isinstance(timestart, datetime)):
+			timestart = timestart.timestamp()
+		if (isinstance(timeend, datetime)):
+			timeend = timeend.timestamp()
 
-		#an array to store sets of market data
-		market_data = []
+		#read the bars from an archive, only decoding the blocks in the time range
+		if (archive):
+			return barcodec.ArchiveReader(archive).query(timestart, timeend)
 
-		#loop through the data to find correct data
-		for bars in json_data["data"]:
-			#get the market data
-			bar_data = json.loads(bars)["data"]
+		#return the columns of market data (memory mapped, nothing is copied or parsed)
+		return self.store.query(asset_symbol, timeunit, timestart, timeend)
 
-			#check to see if this data matches the ticker being analyzed
-			if bar_data[0]["asset"] == asset_symbol:
-				market_data.append(bar_data)
+	#this is a function to build the bars of a longer time frame (such as hours, days or weeks) from the stored bars of a shorter time frame, without asking the api
+	def resampleData(self, asset_symbol, timeunit="hour", timeamount=1, timestart=None, timeend=None, base="minute"):
+		columns = self.retrieveData(asset_symbol, base, timestart, timeend)
 
-		#return the market data for analysis
-		return market_data
+		return resample.resampleColumns(columns, timeunit, timeamount)
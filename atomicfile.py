@@ -0,0 +1,16 @@
+'''
+This is a module to replace files all at once, so a crash or a reader never sees a file that is half written
+'''
+import os
+
+#a function to write the contents of a file (bytes or a string) to a temporary file next to it and then move it into place, returns the amount written
+def writeAtomic(path, data):
+	mode = "w" if isinstance(data, str) else "wb"
+
+	with open(path + ".tmp", mode) as temporary_file:
+		temporary_file.write(data)
+
+	#moving a file over another is a single step, so the old or the new file is always there in full
+	os.replace(path + ".tmp", path)
+
+	return len(data)
@@ -0,0 +1,197 @@
+'''
+This is a module to load long ranges of historical market data into the bar store in chunks that can be resumed after a crash
+'''
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import threading
+import json
+import time
+import math
+import os
+import atomicfile
+import barstore
+import trader
+
+#a function to split a time range into chunks of a number of bars, returns a list of (start, end) timestamps from oldest to newest
+def timeChunks(start, end, unit="hour", chunk_bars=10000):
+	'''
+	the chunks line up on a fixed grid of multiples of the chunk length since the start of unix
+	time, so runs that start at different times still ask for the same chunks. the first and last
+	chunks are cut to the time range
+	'''
+	length = trader.UNIT_SECONDS[unit] * chunk_bars
+
+	chunks = []
+	chunk_start = math.floor(start / length) * length
+	while (chunk_start <= end):
+		#requests include both ends, so each chunk stops a second before the next one starts
+		chunk_end = chunk_start + length
+		chunks.append((max(chunk_start, start), min(chunk_end - 1, end)))
+		chunk_start = chunk_end
+
+	return chunks
+
+#a function to add a range to a sorted list of [start, end] ranges, merging the ranges that overlap or touch (requests include both ends, so ranges a second apart touch)
+def mergeRange(ranges, new_range):
+	merged = []
+	start, end = new_range
+
+	for range_start, range_end in ranges:
+		if (range_end + 1 < start or range_start > end + 1):
+			merged.append([range_start, range_end])
+		else:
+			start = min(start, range_start)
+			end = max(end, range_end)
+
+	merged.append([start, end])
+	merged.sort()
+
+	return merged
+
+#a function to get the parts of a range that are not covered by a sorted list of ranges, returns a list of (start, end)
+def uncovered(ranges, new_range):
+	start, end = new_range
+	parts = []
+
+	for range_start, range_end in ranges:
+		if (range_end < start or range_start > end):
+			continue
+
+		if (range_start > start):
+			parts.append((start, range_start - 1))
+
+		start = max(start, range_end + 1)
+
+	if (start <= end):
+		parts.append((start, end))
+
+	return parts
+
+#an organized class for a backfill of the bar store, the chunks that are finished are written to a checkpoint file
+class Backfill:
+	'''
+	each symbol is filled from its oldest chunk to its newest, so every chunk is written onto
+	the end of the stored columns without a merge. the symbols are filled at the same time
+	from a pool of threads. the checkpoint is a log with a line for each range of time that is
+	in the store, a line is only added once the bars of its range are in the store. the ranges
+	are merged when the log is read, so a restart (with any time range) only asks for the parts
+	of each chunk that are not covered yet
+	'''
+	#initialization of the backfill with the trader to fetch bars with, the store to fill and the path of the checkpoint file
+	def __init__(self, trader, store, checkpoint=None):
+		self.trader = trader
+		self.store = store
+		self.checkpoint = checkpoint if checkpoint else store.path.rstrip("/\\") + ".backfill.jsonl"
+
+		#a lock so threads do not write the checkpoint at the same time
+		self.lock = threading.Lock()
+
+		#the sorted [start, end] ranges of time that are in the store, by symbol and time unit
+		self.finished = self.loadCheckpoint()
+
+	#a function to read the finished ranges from the checkpoint log, writing the log again with only the merged ranges if it has lines that were merged
+	def loadCheckpoint(self):
+		finished = {}
+		lines = 0
+
+		if (os.path.exists(self.checkpoint)):
+			with open(self.checkpoint) as checkpoint_file:
+				for line in checkpoint_file:
+					#a line cut short by a crash is left out
+					try:
+						entry = json.loads(line)
+						key, new_range = entry["key"], entry["range"]
+					except (ValueError, KeyError, TypeError):
+						continue
+
+					finished[key] = mergeRange(finished.get(key, []), new_range)
+					lines += 1
+
+		if (lines > sum(len(ranges) for ranges in finished.values())):
+			self.compactCheckpoint(finished)
+
+		return finished
+
+	#a function to write the checkpoint log again with one line for each merged range
+	def compactCheckpoint(self, finished):
+		lines = [json.dumps({"key": key, "range": new_range}) + "\n" for key, ranges in finished.items() for new_range in ranges]
+
+		atomicfile.writeAtomic(self.checkpoint, "".join(lines))
+
+	#returns the key of a symbol and time unit in the checkpoint
+	def checkpointKey(self, symbol, unit):
+		return symbol + "/" + unit
+
+	#returns the parts of a chunk that are not in the store yet
+	def missingRanges(self, symbol, unit, chunk):
+		return uncovered(self.finished.get(self.checkpointKey(symbol, unit), []), chunk)
+
+	#a function to mark a range as finished by adding a line to the checkpoint log
+	def markFinished(self, symbol, unit, chunk):
+		key = self.checkpointKey(symbol, unit)
+
+		with self.lock:
+			self.finished[key] = mergeRange(self.finished.get(key, []), chunk)
+
+			with open(self.checkpoint, "a") as checkpoint_file:
+				checkpoint_file.write(json.dumps({"key": key, "range": [chunk[0], chunk[1]]}) + "\n")
+
+	#a function to fill the store with the bars of a symbol one chunk at a time, returns a summary of the chunks
+	def fillSymbol(self, symbol, unit, chunks):
+		summary = {"chunks": 0, "skipped": 0, "bars": 0, "error": None}
+
+		try:
+			#use the request for stocks or crypto depending on the asset class
+			if (self.trader.getAssetClass(symbol) == "crypto"):
+				fetch = self.trader.fetchCryptoBars
+			else:
+				fetch = self.trader.fetchStockBars
+
+			for chunk in chunks:
+				missing = self.missingRanges(symbol, unit, chunk)
+				if (not missing):
+					summary["skipped"] += 1
+					continue
+
+				#only ask for the parts of the chunk that are not in the store
+				for part in missing:
+					bars = fetch(symbol, unit, part[0], part[1])
+					summary["bars"] += self.store.append(symbol, unit, barstore.barsToColumns(bars))
+
+					self.markFinished(symbol, unit, part)
+
+				summary["chunks"] += 1
+		except Exception as e:
+			#stop this symbol at the chunk that failed, the next run starts again from there
+			summary["error"] = str(e)
+
+		return summary
+
+	#a function to fill the store with the bars of many symbols between two points in time, returns a summary for each symbol
+	def run(self, symbols, unit="hour", timestart=None, timeend=None, chunk_bars=10000, concurrency=None):
+		#a backfill has no sensible start of its own, but it runs up to the current time unless told otherwise
+		if (timestart is None):
+			raise ValueError("a backfill needs a start time (timestart)")
+		if (timeend is None):
+			timeend = time.time()
+
+		#convert datetimes into timestamps
+		if (isinstance(timestart, datetime)):
+			timestart = timestart.timestamp()
+		if (isinstance(timeend, datetime)):
+			timeend = timeend.timestamp()
+
+		chunks = timeChunks(timestart, timeend, unit, chunk_bars)
+
+		#use the default amount of simultaneous requests if none is given
+		if (not concurrency):
+			concurrency = self.trader.fetch_concurrency
+
+		summaries = {}
+		with ThreadPoolExecutor(max_workers=concurrency) as executor:
+			futures = {executor.submit(self.fillSymbol, symbol, unit, chunks): symbol for symbol in symbols}
+
+			for future in as_completed(futures):
+				summaries[futures[future]] = future.result()
+
+		return summaries
@@ -0,0 +1,364 @@
+'''
+This is a module to test the trading strategies of cascade against stored historical market data
+'''
+from types import SimpleNamespace
+import numpy as np
+import contextlib
+import threading
+import asyncio
+import random
+import os
+import barstore
+import cascade
+import trader
+
+#the error raised by the simulated broker for requests the real api would reject
+class SimError(Exception):
+	pass
+
+#an organized class for a position held by the simulated broker, the numbers are strings like the alpaca api but are only formatted when they are read
+class SimPosition:
+	__slots__ = ("symbol", "asset_class", "quantity", "price", "cost")
+
+	def __init__(self, symbol, asset_class, quantity, price, cost):
+		self.symbol = symbol
+		self.asset_class = asset_class
+		self.quantity = quantity
+		self.price = price
+		self.cost = cost
+
+	@property
+	def qty(self):
+		return str(self.quantity)
+
+	@property
+	def avg_entry_price(self):
+		return str(self.cost / self.quantity)
+
+	@property
+	def current_price(self):
+		return str(self.price)
+
+	@property
+	def market_value(self):
+		return str(self.quantity * self.price)
+
+	@property
+	def cost_basis(self):
+		return str(self.cost)
+
+	@property
+	def unrealized_pl(self):
+		return str((self.quantity * self.price) - self.cost)
+
+	def __repr__(self):
+		return "SimPosition(symbol=" + self.symbol + ", qty=" + self.qty + ", unrealized_pl=" + self.unrealized_pl + ")"
+
+#an organized class for a simulated broker that fills orders at historical prices, it has the same functions as the alpaca REST client
+class SimBroker:
+	#initialization of the broker with a (timestamps x symbols) array of prices and the starting cash
+	def __init__(self, symbols, timestamps, prices, cash=100000, asset_class="crypto", assets=None):
+		self.symbols = list(symbols)
+		self.index = {symbol: place for place, symbol in enumerate(self.symbols)}
+		self.timestamps = np.asarray(timestamps, dtype=float)
+		self.prices = np.asarray(prices, dtype=float)
+		self.asset_class = asset_class
+
+		#information about each asset (minimum order size, trade increment and whether it is fractionable)
+		self.assets = assets or {}
+
+		#the current step in time of the simulation
+		self.step = 0
+
+		#the cash, the quantity held of each symbol and the cost basis of each position
+		self.cash = float(cash)
+		self.qty = np.zeros(len(self.symbols))
+		self.cost = np.zeros(len(self.symbols))
+
+		#the orders that have been filled and a lock so orders from different threads do not interleave
+		self.fills = []
+		self.lock = threading.Lock()
+
+	#returns the place of a symbol in the arrays of the broker
+	def place(self, symbol):
+		if (symbol not in self.index):
+			raise SimError("No market data for " + symbol)
+
+		return self.index[symbol]
+
+	#returns the current prices of every symbol as an array
+	def currentPrices(self):
+		return self.prices[self.step]
+
+	#returns the current time of the broker as a timestamp
+	def currentTime(self):
+		return float(self.timestamps[self.step])
+
+	#returns the current price of a symbol
+	def price(self, symbol):
+		return float(self.prices[self.step, self.place(symbol)])
+
+	#returns the asset class of a symbol
+	def assetClass(self, symbol):
+		return self.assets.get(symbol, {}).get("class", self.asset_class)
+
+	#returns the current value of all positions
+	def marketValue(self):
+		return float(np.dot(self.qty, self.currentPrices()))
+
+	#returns the current unrealized profit/loss of every position as an array
+	def unrealizedPL(self):
+		return (self.qty * self.currentPrices()) - self.cost
+
+	#a function to get the account information
+	def get_account(self):
+		market_value = self.marketValue()
+
+		return SimpleNamespace(
+			cash=str(self.cash),
+			equity=str(self.cash + market_value),
+			portfolio_value=str(self.cash + market_value),
+			long_market_value=str(market_value)
+		)
+
+	#a function to make a position object from plain numbers
+	def position(self, symbol, qty, price, cost):
+		return SimPosition(symbol, self.assetClass(symbol), qty, price, cost)
+
+	#a function to get a position object for a held symbol
+	def get_position(self, symbol):
+		place = self.index.get(symbol)
+
+		if (place is None or self.qty[place] <= 0):
+			raise SimError("position does not exist")
+
+		return self.position(symbol, float(self.qty[place]), float(self.currentPrices()[place]), float(self.cost[place]))
+
+	#a function to get a list of the held positions
+	def list_positions(self):
+		#pull the numbers of every held position out of the arrays at once
+		places = np.flatnonzero(self.qty > 0)
+		qtys = self.qty[places].tolist()
+		prices = self.currentPrices()[places].tolist()
+		costs = self.cost[places].tolist()
+
+		return [self.position(self.symbols[place], qty, price, cost) for place, qty, price, cost in zip(places.tolist(), qtys, prices, costs)]
+
+	#a function to get information about an asset
+	def get_asset(self, symbol):
+		info = {
+			"symbol": symbol,
+			"class": self.assetClass(symbol),
+			"tradable": True,
+			"fractionable": True,
+			"min_order_size": "0.0001",
+			"min_trade_increment": "0.0001"
+		}
+		info.update(self.assets.get(symbol, {}))
+
+		return SimpleNamespace(**info)
+
+	#a function to get information about every asset the broker knows, optionally only of one asset class
+	def list_assets(self, status=None, asset_class=None):
+		assets = [self.get_asset(symbol) for symbol in dict.fromkeys(self.symbols + list(self.assets))]
+
+		return [asset for asset in assets if asset_class is None or getattr(asset, "class") == asset_class]
+
+	#a function to get the latest bar of a stock
+	def get_latest_bar(self, symbol):
+		price = self.price(symbol)
+
+		return SimpleNamespace(symbol=symbol, t=self.currentTime(), o=price, h=price, l=price, c=price, close=price)
+
+	#a function to get the latest bar of a crypto
+	def get_latest_crypto_bar(self, symbol, exchange=None):
+		return self.get_latest_bar(symbol)
+
+	#a function to get the latest bars of many stocks as a dictionary keyed by symbol
+	def get_latest_bars(self, symbols):
+		return {symbol: self.get_latest_bar(symbol) for symbol in symbols}
+
+	#a function to get the latest bars of many cryptos as a dictionary keyed by symbol
+	def get_latest_crypto_bars(self, symbols, exchange=None):
+		return {symbol: self.get_latest_bar(symbol) for symbol in symbols}
+
+	#a function to fill a market order at the current price
+	def submit_order(self, symbol, qty=None, side="buy", type="market", time_in_force="day", notional=None, **kwargs):
+		#orders can be sent from many threads at once
+		with self.lock:
+			return self.fillOrder(symbol, qty, side, notional)
+
+	#a function to fill an order and update the cash and positions of the broker
+	def fillOrder(self, symbol, qty, side, notional):
+		price = self.price(symbol)
+		place = self.place(symbol)
+
+		#get the quantity of the order from the amount of money if it is a notional order
+		if (qty is None):
+			qty = float(notional) / price
+		qty = float(qty)
+
+		if (qty <= 0):
+			raise SimError("qty must be > 0")
+
+		if (side == "buy"):
+			#allow for rounding in orders that spend all of the cash
+			if (qty * price > self.cash + 1e-6):
+				raise SimError("insufficient balance")
+
+			self.cash = max(self.cash - (qty * price), 0.0)
+			self.qty[place] += qty
+			self.cost[place] += qty * price
+		else:
+			if (qty > self.qty[place] + 1e-12):
+				raise SimError("insufficient qty available for order")
+
+			qty = min(qty, self.qty[place])
+
+			#reduce the cost basis in proportion to the amount sold
+			self.cost[place] -= self.cost[place] * (qty / self.qty[place])
+			self.cash += qty * price
+			self.qty[place] -= qty
+
+		fill = {
+			"step": self.step,
+			"t": self.currentTime(),
+			"symbol": symbol,
+			"side": side,
+			"qty": qty,
+			"price": price
+		}
+		self.fills.append(fill)
+
+		return SimpleNamespace(
+			id=str(len(self.fills)),
+			symbol=symbol,
+			side=side,
+			qty=str(qty),
+			notional=None if notional is None else str(notional),
+			filled_qty=str(qty),
+			filled_avg_price=str(price),
+			status="filled"
+		)
+
+#an organized class for replaying stored market data through the trading strategies of the trader
+class Backtest:
+	#initialization of the backtest with the bar store and the symbols to trade
+	def __init__(self, store, symbols, timeunit="hour", timestart=None, timeend=None, cash=100000, asset_class="crypto", assets=None):
+		self.symbols = list(symbols)
+		self.asset_class = asset_class
+
+		#line up the closing prices of every symbol, carrying prices forward over missing bars
+		columns_list = [store.query(symbol, timeunit, timestart, timeend) for symbol in self.symbols]
+		timestamps, prices = barstore.alignColumns(columns_list, "c", how="outer")
+
+		#start the replay at the first point in time where every symbol has a price
+		priced = np.flatnonzero(np.isfinite(prices).all(axis=0))
+		first = priced[0] if len(priced) else len(timestamps)
+
+		self.timestamps = timestamps[first:]
+		self.prices = prices[:, first:].T
+
+		self.cash = cash
+		self.assets = assets
+
+	#a function to make random boards to use as the numbers for the cascade strategies, collapsed in batches
+	def randomBoards(self, generator=None, batch=256):
+		return cascade.iterBoards(generator, batch)
+
+	#a function to run the backtest and return the equity curve, fills and profit/loss
+	def run(self, cap=1, bottom=5, rebalance=24, hold=False, sell_profit=0, boards=None, seed=None, verbose=False):
+		#make the random decisions repeatable
+		if (seed is not None):
+			random.seed(seed)
+
+		#make one batch of boards with enough for every rebalance
+		if (boards is None):
+			boards = self.randomBoards(seed, max(1, -(-len(self.timestamps) // rebalance)))
+		boards = iter(boards)
+
+		#make a trader that uses the simulated broker instead of the alpaca api
+		broker = SimBroker(self.symbols, self.timestamps, self.prices, self.cash, self.asset_class, self.assets)
+
+		steps = len(self.timestamps)
+		cash = np.zeros(steps)
+		holdings = np.zeros((steps, len(self.symbols)))
+
+		loop = asyncio.new_event_loop()
+		algo_trader = None
+
+		#hide the printing of the trader unless the backtest is verbose
+		output = open(os.devnull, "w") if not verbose else None
+
+		try:
+			with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+				algo_trader = trader.Trader(client=broker, quiet=not verbose)
+
+				#send orders one at a time so the fills happen in the same order on every run
+				algo_trader.order_concurrency = 1
+
+				#finish each sell from the callbacks before moving on to the next bar
+				algo_trader.background_sells = False
+
+				#use the same callbacks and sell functions as live trading for the chosen asset class
+				if (self.asset_class == "crypto"):
+					algo_trader.crypto_cap = cap
+					algo_trader.crypto_bottom = bottom
+					callback = algo_trader.cryptoCallback
+					sell_profit_function = algo_trader.sellProfitCrypto
+				else:
+					algo_trader.stock_cap = cap
+					algo_trader.stock_bottom = bottom
+					callback = algo_trader.stockCallback
+					sell_profit_function = algo_trader.sellProfitStocks
+
+				for step in range(steps):
+					broker.step = step
+
+					#run the cascade strategy with a new board on each rebalance
+					if (step % rebalance == 0):
+						symbols = list(self.symbols)
+						random.shuffle(symbols)
+
+						if (self.asset_class == "crypto"):
+							algo_trader.cascadeCrypto(next(boards), hold, symbols)
+						else:
+							algo_trader.cascadeStocks(next(boards), hold, symbols)
+
+					#sell the positions in profit on a schedule
+					if (sell_profit and step % sell_profit == 0):
+						sell_profit_function()
+
+					#only bars for positions past the cap or bottom change anything in the callback, so find them all at once
+					profit = broker.unrealizedPL()
+					exits = np.flatnonzero((broker.qty > 0) & ((profit >= cap) | (profit <= -bottom)))
+
+					for place in exits:
+						price = self.prices[step, place]
+						bar = SimpleNamespace(symbol=self.symbols[place], t=self.timestamps[step], o=price, h=price, l=price, c=price, close=price)
+						loop.run_until_complete(callback(bar))
+
+					#record the cash and holdings at the end of this step
+					cash[step] = broker.cash
+					holdings[step] = broker.qty
+		finally:
+			loop.close()
+
+			if (algo_trader is not None and algo_trader.executor is not None):
+				algo_trader.executor.shutdown()
+
+			if (output):
+				output.close()
+
+		#calculate the value of the account at every step at once
+		equity = cash + np.einsum("ij,ij->i", holdings, self.prices)
+
+		return {
+			"timestamps": self.timestamps,
+			"symbols": self.symbols,
+			"equity": equity,
+			"cash": cash,
+			"holdings": holdings,
+			"fills": broker.fills,
+			"pnl": float(equity[-1] - self.cash) if steps else 0.0
+		}
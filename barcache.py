@@ -0,0 +1,131 @@
+'''
+This is a module to keep requested market data in memory so repeated requests do not go back to the api
+'''
+from collections import OrderedDict
+import threading
+import bisect
+import barstore
+
+#an organized class for caching bars by symbol and time unit
+class BarCache:
+	#initialization of the cache with the maximum amount of bars to hold across all symbols
+	def __init__(self, max_bars=500000):
+		self.max_bars = max_bars
+
+		#the cached entries in order of least to most recently used
+		self.entries = OrderedDict()
+
+		#the total amount of bars held by the cache
+		self.size = 0
+
+		#counters for requests served from memory, served partially from memory and not served from memory
+		self.hits = 0
+		self.partial_hits = 0
+		self.misses = 0
+
+		#a lock for the entries and a lock for each key so only one request per symbol goes to the api at a time
+		self.lock = threading.Lock()
+		self.key_locks = {}
+
+	#returns the lock for a symbol and time unit
+	def keyLock(self, key):
+		with self.lock:
+			if (key not in self.key_locks):
+				self.key_locks[key] = threading.Lock()
+
+			return self.key_locks[key]
+
+	#a function to get the bars of a symbol between two timestamps, using fetch(start, end) for the parts that are not cached
+	def get(self, symbol, timeunit, start, end, fetch):
+		key = (symbol, timeunit)
+
+		with self.keyLock(key):
+			with self.lock:
+				entry = self.entries.get(key)
+
+			#fetch the whole range if nothing is cached or the cached range does not touch the requested range
+			if (entry is None or end < entry["start"] or start > entry["end"]):
+				bars = list(fetch(start, end))
+				entry = {
+					"start": start,
+					"end": end,
+					"bars": bars,
+					"times": [barstore.barTime(bar) for bar in bars]
+				}
+
+				with self.lock:
+					self.misses += 1
+
+			#otherwise fetch only the edges of the requested range that are missing from the cache
+			else:
+				fetched = False
+
+				if (start < entry["start"]):
+					left = [bar for bar in fetch(start, entry["start"]) if barstore.barTime(bar) < entry["start"]]
+					entry = {
+						"start": start,
+						"end": entry["end"],
+						"bars": left + entry["bars"],
+						"times": [barstore.barTime(bar) for bar in left] + entry["times"]
+					}
+					fetched = True
+
+				if (end > entry["end"]):
+					#fetch again from the last cached bar since it may not have been finished when it was fetched
+					refetch = entry["times"][-1] if entry["times"] else entry["end"]
+					keep = bisect.bisect_left(entry["times"], refetch)
+
+					right = [bar for bar in fetch(refetch, end) if barstore.barTime(bar) >= refetch]
+					entry = {
+						"start": entry["start"],
+						"end": end,
+						"bars": entry["bars"][:keep] + right,
+						"times": entry["times"][:keep] + [barstore.barTime(bar) for bar in right]
+					}
+					fetched = True
+
+				with self.lock:
+					if (fetched):
+						self.partial_hits += 1
+					else:
+						self.hits += 1
+
+			self.store(key, entry)
+
+		#return the bars within the requested range
+		first = bisect.bisect_left(entry["times"], start)
+		last = bisect.bisect_right(entry["times"], end)
+
+		return entry["bars"][first:last]
+
+	#a function to put an entry in the cache and evict the least recently used entries past the size limit
+	def store(self, key, entry):
+		with self.lock:
+			previous = self.entries.pop(key, None)
+			if (previous is not None):
+				self.size -= len(previous["bars"])
+
+			self.entries[key] = entry
+			self.size += len(entry["bars"])
+
+			#the newest entry is always kept, even if it is larger than the limit on its own
+			while (self.size > self.max_bars and len(self.entries) > 1):
+				evicted_key, evicted = self.entries.popitem(last=False)
+				self.size -= len(evicted["bars"])
+
+	#a function to empty the cache
+	def clear(self):
+		with self.lock:
+			self.entries.clear()
+			self.size = 0
+
+	#returns the counters of the cache
+	def stats(self):
+		with self.lock:
+			return {
+				"hits": self.hits,
+				"partial_hits": self.partial_hits,
+				"misses": self.misses,
+				"entries": len(self.entries),
+				"bars": self.size
+			}
@@ -0,0 +1,312 @@
+'''
+This is a module to pack bars of market data into a compact binary archive for shipping between machines
+
+an archive is a header, a list of compressed blocks and an index of the blocks at the end:
+	header: "CBAR", version (u1), amount of columns (u1), then the name and least decimal digits of each column
+	block: zlib compressed, the decimal digits (i1) and byte length (u4) of each column followed by the data of each column
+	index: amount of blocks (u4), then the first timestamp, last timestamp (f8), amount of bars (u4), offset (u8) and length (u4) of each block
+	footer: offset of the index (u8), "CBAR"
+
+the values of each column are scaled by 10^digits and rounded to integers, then each value is stored as
+the difference from the value before it (the first value of a block is stored as is), zigzag encoded so
+small negative differences are small numbers, as a varint of 7 bits per byte. each block can be read on
+its own with the index
+
+the digits of a column in a block are at least the digits of the column in the header, and more when the
+smallest values of the block need them to keep SIGNIFICANT digits (such as prices of coins below a cent).
+a column of a block that can not be scaled that way (values that are not finite, or that would not fit in
+a 64 bit integer once scaled) is stored as raw 64 bit floats instead, marked with RAW digits
+'''
+import numpy as np
+import struct
+import math
+import zlib
+import atomicfile
+import barstore
+
+MAGIC = b"CBAR"
+VERSION = 2
+
+#the least decimal digits kept for each column (timestamps are whole seconds, volumes are kept to at least 4 places)
+DIGITS = {
+	"t": 0,
+	"o": 8,
+	"h": 8,
+	"l": 8,
+	"c": 8,
+	"v": 4,
+	"vw": 8
+}
+
+#the most bytes a varint of a 64 bit number can take
+VARINT_BYTES = 10
+
+#the significant digits kept of the smallest value of a column in a block
+SIGNIFICANT = 8
+
+#the most decimal digits a column is scaled by and the digits that mark a column stored as raw floats
+MAX_DIGITS = 18
+RAW = -128
+
+#the largest scaled value, so the difference of any two scaled values still fits in a 64 bit integer
+MAX_SCALED = 2**62
+
+INDEX_ENTRY = struct.Struct("<ddIQI")
+FOOTER = struct.Struct("<Q4s")
+
+#a function to zigzag encode signed integers so numbers near zero (positive or negative) become small unsigned integers
+def zigzag(values):
+	values = np.asarray(values, dtype=np.int64)
+
+	return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+#a function to undo the zigzag encoding
+def unzigzag(values):
+	values = np.asarray(values, dtype=np.uint64)
+
+	return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+#a function to encode unsigned integers as varints, every byte holds 7 bits and the high bit is set on every byte but the last
+def encodeVarints(values):
+	values = np.asarray(values, dtype=np.uint64)
+
+	#find the amount of bytes each number needs
+	lengths = np.ones(len(values), dtype=np.int64)
+	for k in range(1, VARINT_BYTES):
+		lengths += values >= (np.uint64(1) << np.uint64(7*k))
+
+	offsets = np.cumsum(lengths) - lengths
+	output = np.zeros(int(lengths.sum()), dtype=np.uint8)
+
+	#write the kth byte of every number that has one
+	for k in range(int(lengths.max()) if len(values) else 0):
+		places = np.flatnonzero(lengths > k)
+		chunk = (values[places] >> np.uint64(7*k)) & np.uint64(0x7F)
+		more = (lengths[places] > k+1).astype(np.uint64) << np.uint64(7)
+		output[offsets[places] + k] = (chunk | more).astype(np.uint8)
+
+	return output.tobytes()
+
+#a function to decode varints back into unsigned integers
+def decodeVarints(data):
+	data = np.frombuffer(data, dtype=np.uint8)
+
+	if (not len(data)):
+		return np.empty(0, dtype=np.uint64)
+
+	#the last byte of every number is the one without the high bit
+	last = (data & 0x80) == 0
+	ends = np.flatnonzero(last)
+	starts = np.concatenate(([0], ends[:-1] + 1))
+
+	#shift the 7 bits of every byte to its place in its number and put the bits of each number together
+	numbers = np.cumsum(last) - last
+	places = np.arange(len(data)) - starts[numbers]
+	bits = (data & 0x7F).astype(np.uint64) << (np.uint64(7) * places.astype(np.uint64))
+
+	return np.bitwise_or.reduceat(bits, starts)
+
+#a function to choose the decimal digits of a column of values in a block, returns RAW if the values can not be scaled to integers
+def columnDigits(values, digits):
+	if (not len(values)):
+		return digits
+
+	if (not np.isfinite(values).all()):
+		return RAW
+
+	magnitudes = np.abs(values)
+	largest = float(magnitudes.max())
+	smallest = float(magnitudes[magnitudes > 0].min()) if largest > 0 else 1.0
+
+	#keep the significant digits of the smallest value, but never fewer digits than asked for
+	wanted = max(digits, SIGNIFICANT - 1 - math.floor(math.log10(smallest)))
+
+	#the most digits the largest value can be scaled by without overflowing
+	allowed = MAX_DIGITS if largest == 0 else min(MAX_DIGITS, math.floor(math.log10(MAX_SCALED / largest)))
+
+	return wanted if wanted <= allowed else RAW
+
+#a function to encode a column of values as the varints of their zigzag encoded differences, returns the digits used and the bytes
+def encodeColumn(values, digits):
+	values = np.asarray(values, dtype=float)
+	digits = columnDigits(values, digits)
+
+	if (digits == RAW):
+		return digits, values.astype("<f8").tobytes()
+
+	scaled = np.rint(values * (10.0**digits)).astype(np.int64)
+	deltas = np.diff(scaled, prepend=np.int64(0))
+
+	return digits, encodeVarints(zigzag(deltas))
+
+#a function to decode a column of values from the varints of their zigzag encoded differences
+def decodeColumn(data, digits):
+	if (digits == RAW):
+		return np.frombuffer(data, dtype="<f8").astype(float)
+
+	scaled = np.cumsum(unzigzag(decodeVarints(data)))
+
+	return scaled / (10.0**digits)
+
+#a function to encode one block of bars, returns the compressed bytes
+def encodeBlock(columns, names, digits, level=6):
+	encoded = [encodeColumn(columns[name], digits[name]) for name in names]
+
+	fields = []
+	for column_digits, column in encoded:
+		fields += [column_digits, len(column)]
+	lengths = struct.pack("<" + "bI"*len(names), *fields)
+
+	return zlib.compress(lengths + b"".join([column for column_digits, column in encoded]), level)
+
+#a function to decode one block of bars into columns
+def decodeBlock(data, names):
+	data = zlib.decompress(data)
+
+	fields = struct.unpack_from("<" + "bI"*len(names), data)
+	offset = struct.calcsize("<" + "bI"*len(names))
+
+	columns = {}
+	for x, name in enumerate(names):
+		digits, length = fields[2*x], fields[(2*x)+1]
+		if (offset + length > len(data)):
+			raise ValueError("Bar archive block is cut short")
+
+		columns[name] = decodeColumn(data[offset:offset+length], digits)
+		offset += length
+
+	return columns
+
+#a function to encode columns of bars (sorted by time) as an archive, returns the bytes of the archive
+def encodeColumns(columns, block_size=4096, digits=None, level=6):
+	names = list(barstore.COLUMNS)
+	digits = dict(DIGITS, **(digits or {}))
+
+	#write the header with the name and digits of each column
+	header = [MAGIC, struct.pack("<BB", VERSION, len(names))]
+	for name in names:
+		header.append(struct.pack("<B", len(name)) + name.encode() + struct.pack("<b", digits[name]))
+	parts = [b"".join(header)]
+	offset = len(parts[0])
+
+	timestamps = np.asarray(columns["t"], dtype=float)
+	index = []
+
+	#write each block and keep where it is in the index
+	for first in range(0, len(timestamps), block_size):
+		last = min(first + block_size, len(timestamps))
+		block = encodeBlock({name: np.asarray(columns[name])[first:last] for name in names}, names, digits, level)
+
+		index.append(INDEX_ENTRY.pack(float(timestamps[first]), float(timestamps[last-1]), last - first, offset, len(block)))
+		parts.append(block)
+		offset += len(block)
+
+	parts.append(struct.pack("<I", len(index)) + b"".join(index))
+	parts.append(FOOTER.pack(offset, MAGIC))
+
+	return b"".join(parts)
+
+#a function to write columns of bars to an archive file, returns the amount of bytes written
+def writeArchive(path, columns, block_size=4096, digits=None, level=6):
+	return atomicfile.writeAtomic(path, encodeColumns(columns, block_size, digits, level))
+
+#an organized class for reading the bars in an archive, only the blocks that are needed are decoded
+class ArchiveReader:
+	#initialization of the reader with the path of an archive file or the bytes of an archive
+	def __init__(self, source):
+		if (isinstance(source, (bytes, bytearray, memoryview))):
+			self.data = memoryview(source)
+		else:
+			with open(source, "rb") as archive_file:
+				self.data = memoryview(archive_file.read())
+
+		self.readHeader()
+		self.readIndex()
+
+	#a function to read the names and digits of the columns from the header
+	def readHeader(self):
+		if (bytes(self.data[:4]) != MAGIC):
+			raise ValueError("Not a bar archive")
+
+		version, count = struct.unpack_from("<BB", self.data, 4)
+		if (version != VERSION):
+			raise ValueError("Unknown bar archive version: " + str(version))
+
+		self.names = []
+		self.digits = {}
+
+		offset = 6
+		for x in range(count):
+			length = self.data[offset]
+			name = bytes(self.data[offset+1:offset+1+length]).decode()
+			self.digits[name] = struct.unpack_from("<b", self.data, offset+1+length)[0]
+			self.names.append(name)
+			offset += length + 2
+
+	#a function to read the index of the blocks from the end of the archive
+	def readIndex(self):
+		if (len(self.data) < FOOTER.size):
+			raise ValueError("Bar archive is cut short")
+
+		index_offset, magic = FOOTER.unpack_from(self.data, len(self.data) - FOOTER.size)
+		if (magic != MAGIC):
+			raise ValueError("Bar archive is cut short")
+
+		count = struct.unpack_from("<I", self.data, index_offset)[0] if index_offset + 4 <= len(self.data) - FOOTER.size else None
+		if (count is None or index_offset + 4 + (count*INDEX_ENTRY.size) > len(self.data) - FOOTER.size):
+			raise ValueError("Bar archive index is damaged")
+
+		entries = [INDEX_ENTRY.unpack_from(self.data, index_offset + 4 + (x*INDEX_ENTRY.size)) for x in range(count)]
+
+		#the first and last timestamp, amount of bars, offset and length of each block
+		self.first = np.array([entry[0] for entry in entries])
+		self.last = np.array([entry[1] for entry in entries])
+		self.counts = np.array([entry[2] for entry in entries], dtype=np.int64)
+		self.offsets = [entry[3] for entry in entries]
+		self.lengths = [entry[4] for entry in entries]
+
+	#returns the amount of bars in the archive
+	def __len__(self):
+		return int(self.counts.sum())
+
+	#returns the amount of blocks in the archive
+	def blocks(self):
+		return len(self.offsets)
+
+	#a function to decode one block of the archive into columns
+	def readBlock(self, block):
+		offset = self.offsets[block]
+
+		#a block that does not decompress or has the wrong amount of bars has been damaged
+		try:
+			columns = decodeBlock(self.data[offset:offset+self.lengths[block]], self.names)
+		except (zlib.error, struct.error) as error:
+			raise ValueError("Bar archive block " + str(block) + " is damaged: " + str(error))
+
+		if (any(len(column) != self.counts[block] for column in columns.values())):
+			raise ValueError("Bar archive block " + str(block) + " is damaged")
+
+		return columns
+
+	#a function to get the bars between two timestamps (inclusive), only decoding the blocks that overlap the time range
+	def query(self, start=None, end=None):
+		#find the blocks that overlap the time range with a binary search of the index
+		first = 0 if start is None else int(np.searchsorted(self.last, start, side="left"))
+		last = self.blocks() if end is None else int(np.searchsorted(self.first, end, side="right"))
+
+		blocks = [self.readBlock(block) for block in range(first, last)]
+		if (not blocks):
+			return barstore.emptyColumns()
+
+		columns = {name: np.concatenate([block[name] for block in blocks]) for name in self.names}
+
+		#cut the bars outside of the time range from the first and last blocks
+		timestamps = columns["t"]
+		low = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+		high = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+
+		return {name: column[low:high] for name, column in columns.items()}
+
+	#returns every bar in the archive
+	def columns(self):
+		return self.query()
@@ -0,0 +1,233 @@
+'''
+This is a module to store historical market data as append-only columns of numbers for fast analysis
+'''
+from datetime import datetime
+import numpy as np
+import threading
+import os
+import atomicfile
+
+#the columns stored for each bar of data (timestamp, open, high, low, close, volume, volume weighted price)
+COLUMNS = ("t", "o", "h", "l", "c", "v", "vw")
+
+#the data type every column is stored as on disk (little endian 64 bit floats)
+DTYPE = np.dtype("<f8")
+
+#a function to get the UTC timestamp of a bar in seconds
+def barTime(bar):
+	return timeValue(bar.t)
+
+#a function to get a timestamp in seconds from a time value
+def timeValue(timestamp):
+	#alpaca bars have pandas timestamps, other sources may have datetimes, iso strings or plain numbers
+	if (hasattr(timestamp, "timestamp")):
+		return timestamp.timestamp()
+	elif (isinstance(timestamp, str)):
+		return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+	return float(timestamp)
+
+#a function to turn an iterable of bars into a dictionary of numpy arrays (one array per column)
+def barsToColumns(bars):
+	rows = [(barTime(bar), bar.o, bar.h, bar.l, bar.c, bar.v, bar.vw) for bar in bars]
+
+	#make a 2d array of the rows and split it into columns
+	table = np.array(rows, dtype=DTYPE).reshape(-1, len(COLUMNS))
+
+	return {name: table[:, index] for index, name in enumerate(COLUMNS)}
+
+#a function to make a set of empty columns
+def emptyColumns():
+	return {name: np.empty(0, dtype=DTYPE) for name in COLUMNS}
+
+#a function to stack the columns of many assets into 2d (symbols x bars) arrays, padding shorter assets with nan values at the end
+def stackColumns(columns_list):
+	length = max([len(columns["t"]) for columns in columns_list], default=0)
+
+	stacked = {}
+	for name in COLUMNS:
+		block = np.full((len(columns_list), length), np.nan, dtype=DTYPE)
+
+		for row, columns in enumerate(columns_list):
+			block[row, :len(columns[name])] = columns[name]
+
+		stacked[name] = block
+
+	return stacked
+
+#a function to line up a column of many assets on the same timestamps, returns the timestamps and a 2d (symbols x timestamps) array
+def alignColumns(columns_list, name="c", how="inner"):
+	'''
+	an inner alignment keeps only the timestamps that every asset has a bar for. an outer
+	alignment keeps every timestamp and carries the last known value forward, with nan
+	values before the first bar of an asset
+	'''
+	if (how == "inner"):
+		timestamps = None
+		for columns in columns_list:
+			timestamps = columns["t"] if timestamps is None else np.intersect1d(timestamps, columns["t"])
+	elif (how == "outer"):
+		timestamps = np.unique(np.concatenate([columns["t"] for columns in columns_list]))
+	else:
+		raise ValueError("Unknown alignment: " + str(how))
+
+	timestamps = np.asarray(timestamps if timestamps is not None else [], dtype=DTYPE)
+	block = np.full((len(columns_list), len(timestamps)), np.nan, dtype=DTYPE)
+
+	for row, columns in enumerate(columns_list):
+		if (not len(columns["t"])):
+			continue
+
+		#find the latest bar at or before each timestamp
+		places = np.searchsorted(columns["t"], timestamps, side="right") - 1
+		found = places >= 0
+		block[row, found] = np.asarray(columns[name])[places[found]]
+
+	return timestamps, block
+
+#an organized class for storing bars of market data per symbol and time unit
+class BarStore:
+	#initialization of the store with the directory that holds the data
+	def __init__(self, path="bars"):
+		self.path = path
+
+		#memory maps of the columns that have already been opened, along with the file size they were opened at
+		self.maps = {}
+
+		#a lock to keep appends and repairs from different threads from interleaving (an append repairs the files while it holds the lock)
+		self.lock = threading.RLock()
+
+	#a function to get the directory for a symbol and time unit
+	def keyPath(self, symbol, timeunit):
+		return os.path.join(self.path, symbol.replace("/", "_"), timeunit)
+
+	#a function to get the path of a single column file
+	def columnPath(self, symbol, timeunit, name):
+		return os.path.join(self.keyPath(symbol, timeunit), name + ".f8")
+
+	#returns the symbols that have stored data
+	def symbols(self):
+		if (not os.path.isdir(self.path)):
+			return []
+
+		return sorted(os.listdir(self.path))
+
+	#returns the time units stored for a symbol
+	def timeunits(self, symbol):
+		path = os.path.join(self.path, symbol.replace("/", "_"))
+
+		if (not os.path.isdir(path)):
+			return []
+
+		return sorted(os.listdir(path))
+
+	#a function to memory map a column of data without reading it into memory
+	def mapColumn(self, symbol, timeunit, name):
+		path = self.columnPath(symbol, timeunit, name)
+
+		#a missing or empty file is an empty column
+		if (not os.path.exists(path)):
+			return np.empty(0, dtype=DTYPE)
+
+		size = os.path.getsize(path)
+		if (size < DTYPE.itemsize):
+			return np.empty(0, dtype=DTYPE)
+
+		#reuse the existing map unless the file has changed since it was opened
+		key = (symbol, timeunit, name)
+		cached = self.maps.get(key)
+		if (cached is not None and cached[0] == size):
+			return cached[1]
+
+		column = np.memmap(path, dtype=DTYPE, mode="r", shape=(size // DTYPE.itemsize,))
+		self.maps[key] = (size, column)
+
+		return column
+
+	#returns all of the stored columns for a symbol and time unit as memory maps
+	def columns(self, symbol, timeunit):
+		columns = {name: self.mapColumn(symbol, timeunit, name) for name in COLUMNS}
+
+		#cut every column to the shortest length in case an append was interrupted part of the way through
+		length = min(len(column) for column in columns.values())
+
+		return {name: column[:length] for name, column in columns.items()}
+
+	#returns the first and last timestamp stored for a symbol and time unit (None if there is no data)
+	def span(self, symbol, timeunit):
+		timestamps = self.columns(symbol, timeunit)["t"]
+
+		if (not len(timestamps)):
+			return None
+
+		return float(timestamps[0]), float(timestamps[-1])
+
+	#a function to get the bars of a symbol between two timestamps (inclusive) without copying any data
+	def query(self, symbol, timeunit, start=None, end=None):
+		columns = self.columns(symbol, timeunit)
+		timestamps = columns["t"]
+
+		#binary search the sorted timestamps for the edges of the time range
+		first = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+		last = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+
+		return {name: column[first:last] for name, column in columns.items()}
+
+	#a function to add bars to the store, returns the number of new bars that were stored
+	def append(self, symbol, timeunit, columns):
+		#make sure the new data is sorted by time and has no repeated bars
+		timestamps = np.asarray(columns["t"], dtype=DTYPE)
+		timestamps, order = np.unique(timestamps, return_index=True)
+		new_columns = {name: np.asarray(columns[name], dtype=DTYPE)[order] for name in COLUMNS}
+		new_columns["t"] = timestamps
+
+		if (not len(timestamps)):
+			return 0
+
+		with self.lock:
+			stored = self.columns(symbol, timeunit)
+
+			#the common case is new data that comes after everything stored, which is written onto the end of the files
+			if (not len(stored["t"]) or timestamps[0] > stored["t"][-1]):
+				os.makedirs(self.keyPath(symbol, timeunit), exist_ok=True)
+
+				#cut off anything an interrupted append left past the shortest column, so every column lines up again
+				self.repair(symbol, timeunit, len(stored["t"]))
+
+				for name in COLUMNS:
+					with open(self.columnPath(symbol, timeunit, name), "ab") as column_file:
+						column_file.write(new_columns[name].tobytes())
+
+				return len(timestamps)
+
+			#otherwise merge the new bars into the stored bars, keeping the stored version of any repeated bar
+			fresh = ~np.isin(timestamps, stored["t"])
+			if (not fresh.any()):
+				return 0
+
+			merged = {name: np.concatenate((stored[name], new_columns[name][fresh])) for name in COLUMNS}
+			order = np.argsort(merged["t"], kind="stable")
+
+			self.rewrite(symbol, timeunit, {name: column[order] for name, column in merged.items()})
+
+			return int(fresh.sum())
+
+	#a function to cut every column file of a symbol and time unit to a number of bars
+	def repair(self, symbol, timeunit, length):
+		size = length * DTYPE.itemsize
+
+		with self.lock:
+			for name in COLUMNS:
+				path = self.columnPath(symbol, timeunit, name)
+
+				if (os.path.exists(path) and os.path.getsize(path) > size):
+					#forget the map of the file first so no reader is handed a map that reaches past the end of the cut file
+					self.maps.pop((symbol, timeunit, name), None)
+					os.truncate(path, size)
+
+	#a function to replace the stored columns of a symbol and time unit
+	def rewrite(self, symbol, timeunit, columns):
+		os.makedirs(self.keyPath(symbol, timeunit), exist_ok=True)
+
+		for name in COLUMNS:
+			atomicfile.writeAtomic(self.columnPath(symbol, timeunit, name), np.ascontiguousarray(columns[name], dtype=DTYPE).tobytes())
@@ -0,0 +1,229 @@
+'''
+This is a program to benchmark the analytics and cascade hot paths on synthetic market data, no api keys are needed
+
+examples:
+	python bench.py
+	python bench.py --sizes 1000 100000 10000000 --save baseline.json
+	python bench.py --compare baseline.json
+	python bench.py --sizes --startup-budget 0.5
+'''
+from datetime import datetime
+import contextlib
+import tracemalloc
+import subprocess
+import argparse
+import random
+import json
+import time
+import sys
+import os
+import numpy as np
+import fakealpaca
+import barcodec
+import cascade
+import indicators
+
+#the fixed time the synthetic client treats as the present, so every run gets the same bars
+NOW = 1700000000.0
+
+#a function to make synthetic minute bars as columns, ending at the present
+def syntheticBars(size, seed=0):
+	timestamps = NOW - (60*np.arange(size, 0, -1, dtype=float))
+
+	return fakealpaca.syntheticColumns(timestamps, seed, 100.0, 60)
+
+#a function to run a benchmark once and return the seconds it took
+def timeOnce(function):
+	start = time.perf_counter()
+	function()
+
+	return time.perf_counter() - start
+
+#a function to run a benchmark a few times, returning the fastest time and the peak memory of a separate traced run
+def measure(setup, function, repeat=3, memory=True):
+	seconds = []
+	for x in range(repeat):
+		setup()
+		seconds.append(timeOnce(function))
+
+	peak = None
+	if (memory):
+		setup()
+		tracemalloc.start()
+		function()
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+	return min(seconds), peak
+
+#an organized class for the benchmarks of every hot path at each size
+class Bench:
+	#initialization of the benchmarks with the largest sizes that object paths (one python object per bar), spectral fits and cascade boards are run at
+	def __init__(self, object_limit=100000, cascade_limit=10000, repeat=3, memory=True, spectral_limit=1000000):
+		self.object_limit = object_limit
+		self.cascade_limit = cascade_limit
+		self.spectral_limit = spectral_limit
+		self.repeat = repeat
+		self.memory = memory
+
+		#make an analyst that gets its market data from the synthetic client, hiding the printing of the trader
+		with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+			import analyst
+			self.analyst = analyst.Analyst(client=fakealpaca.FakeREST(now=NOW), quiet=True)
+
+		self.timestart = datetime.fromtimestamp(NOW)
+
+	#a function to throw away the cached bars so every run asks the client again
+	def clearCache(self):
+		self.analyst.trader.bar_cache.clear()
+
+	#returns the benchmarks to run at a size as a list of (name, amount of items, setup, function)
+	def cases(self, size):
+		cases = []
+		columns = syntheticBars(size)
+		nothing = lambda: None
+
+		#array paths work on columns of numbers and are run at every size
+		cases.append(("barMetrics", size, nothing, lambda: indicators.barMetrics(columns)))
+		cases.append(("getSegmentWaves", size, nothing, lambda: self.analyst.getSegmentWaves(columns)))
+
+		#the spectral fit pads the bars to a power of two of four times their length, so it is only run up to the spectral limit
+		spectral_size = min(size, self.spectral_limit)
+		spectral_columns = {name: column[:spectral_size] for name, column in columns.items()}
+		cases.append(("getSpectralWaves", spectral_size, nothing, lambda: self.analyst.getSpectralWaves(spectral_columns)))
+
+		#pack the bars into an archive and read them back
+		archive = barcodec.encodeColumns(columns)
+		cases.append(("barcodec.encodeColumns", size, nothing, lambda: barcodec.encodeColumns(columns)))
+		cases.append(("barcodec.ArchiveReader", size, nothing, lambda: barcodec.ArchiveReader(archive).columns()))
+
+		#object paths make a bar object for every bar, so they are only run up to the object limit
+		if (size <= self.object_limit):
+			cases.append(("getAssetData", size, self.clearCache, lambda: self.analyst.getAssetData("BTCUSD", "minute", size, self.timestart)))
+			cases.append(("correlateAssets", size, self.clearCache, lambda: self.analyst.correlateAssets("BTCUSD", "ETHUSD", "minute", size, self.timestart)))
+			cases.append(("predictAssetPair", size, self.clearCache, lambda: self.analyst.predictAssetPair("BTCUSD", "ETHUSD", "minute", size, self.timestart, show=False)))
+
+			#draw the waves found in the bars (at most a thousand of them)
+			waves = self.analyst.getSegmentWaves(columns)[:1000]
+			cases.append(("getWave", len(waves), nothing, lambda: [self.analyst.getWave(dict(wave)) for wave in waves]))
+
+		#collapse one board for each bar, up to the cascade limit for single boards and ten times that for batches
+		boards = min(size, self.cascade_limit)
+		cases.append(("Cascade.randomCollapse", boards, lambda: random.seed(0), lambda: [cascade.Cascade().randomCollapse() for x in range(boards)]))
+
+		batch = min(size, self.cascade_limit*10)
+		cases.append(("cascade.collapseBoards", batch, nothing, lambda: cascade.collapseBoards(batch, 0)))
+
+		return cases
+
+	#a function to run every benchmark at every size, returns a list of results
+	def run(self, sizes):
+		results = []
+
+		#the printing of the benchmarked functions is hidden, every benchmark shares one handle to the null device
+		with open(os.devnull, "w") as sink:
+			for size in sizes:
+				for name, items, setup, function in self.cases(size):
+					with contextlib.redirect_stdout(sink):
+						seconds, peak = measure(setup, function, self.repeat, self.memory)
+
+					result = {
+						"name": name,
+						"size": size,
+						"items": items,
+						"seconds": seconds,
+						"items_per_s": (items / seconds) if seconds else 0.0,
+						"peak_mb": (peak / 1e6) if peak is not None else None
+					}
+					results.append(result)
+
+					printResult(result)
+
+		return results
+
+#a function to measure the seconds it takes a new python process to import the analyst and make a quiet analyst (the fastest of a few runs)
+def startupTime(repeat=3):
+	code = "import time; start = time.perf_counter(); import analyst; analyst.Analyst(quiet=True); print(time.perf_counter() - start)"
+	directory = os.path.dirname(os.path.abspath(__file__))
+
+	seconds = []
+	for x in range(repeat):
+		output = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True, check=True).stdout
+		seconds.append(float(output.split()[-1]))
+
+	return min(seconds)
+
+#a function to print the result of a benchmark as a row of a table
+def printResult(result):
+	peak = ("%.1f" % result["peak_mb"]) if result["peak_mb"] is not None else "-"
+
+	print(result["name"].ljust(24), str(result["size"]).rjust(10), ("%.4f" % result["seconds"]).rjust(10), ("%.0f" % result["items_per_s"]).rjust(14), peak.rjust(10))
+
+#a function to compare results to a baseline, returns the benchmarks that got slower than the threshold
+def compare(results, baseline, threshold=1.2):
+	previous = {(result["name"], result["size"]): result for result in baseline}
+	regressions = []
+
+	print()
+	print("Comparison to baseline:")
+
+	for result in results:
+		before = previous.get((result["name"], result["size"]))
+		if (before is None or not before["seconds"]):
+			continue
+
+		ratio = result["seconds"] / before["seconds"]
+		flag = "SLOWER" if ratio > threshold else ""
+		print(result["name"].ljust(24), str(result["size"]).rjust(10), ("%.2fx" % ratio).rjust(10), flag)
+
+		if (ratio > threshold):
+			regressions.append(result)
+
+	return regressions
+
+#main function to run the benchmarks from the command line
+def main(arguments=None):
+	parser = argparse.ArgumentParser(description="Benchmark the analytics and cascade hot paths on synthetic market data.")
+	parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000, 1000000, 10000000], help="the amounts of bars to benchmark")
+	parser.add_argument("--object-limit", type=int, default=100000, help="the most bars to run the paths that make an object for every bar")
+	parser.add_argument("--cascade-limit", type=int, default=10000, help="the most single boards to collapse")
+	parser.add_argument("--spectral-limit", type=int, default=1000000, help="the most bars to fit cycles to")
+	parser.add_argument("--repeat", type=int, default=3, help="the amount of times to run each benchmark (the fastest is kept)")
+	parser.add_argument("--no-memory", action="store_true", help="skip measuring the peak memory")
+	parser.add_argument("--save", help="a json file to save the results to as a baseline")
+	parser.add_argument("--compare", help="a json file of baseline results to compare to")
+	parser.add_argument("--threshold", type=float, default=1.2, help="how many times slower than the baseline counts as a regression")
+	parser.add_argument("--startup-budget", type=float, default=0.5, help="the most seconds a quiet analyst can take to start up")
+	args = parser.parse_args(arguments)
+
+	bench = Bench(args.object_limit, args.cascade_limit, args.repeat, not args.no_memory, args.spectral_limit)
+
+	print("name".ljust(24), "size".rjust(10), "seconds".rjust(10), "items/s".rjust(14), "peak_mb".rjust(10))
+	results = bench.run(args.sizes)
+
+	#measure the startup of a new process and check it against the budget
+	startup = startupTime(args.repeat)
+	results.append({"name": "startup", "size": 0, "items": 1, "seconds": startup, "items_per_s": 1 / startup, "peak_mb": None})
+	printResult(results[-1])
+
+	failed = startup > args.startup_budget
+	if (failed):
+		print("Startup took", "%.3f" % startup, "seconds, over the budget of", args.startup_budget, "seconds")
+
+	if (args.save):
+		with open(args.save, "w") as jsonfile:
+			json.dump(results, jsonfile, indent=4)
+
+	if (args.compare):
+		with open(args.compare) as jsonfile:
+			regressions = compare(results, json.load(jsonfile), args.threshold)
+
+		#exit with an error if anything got slower so the benchmark can fail a build
+		if (regressions):
+			failed = True
+
+	return 1 if failed else 0
+
+#execute the benchmarks
+if __name__ == "__main__":
+	sys.exit(main())
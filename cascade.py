@@ -1,191 +1,329 @@
+import numpy as np
 import random
 
+#each cell of the board is stored as a 9 bit mask of its possible states, where bit n-1 is set if the number n is still possible
+#the masks are a flat list of 81 masks where the cell at (subgrid, cell) is at index subgrid*9 + cell, the board of the Cascade class is still
+#a (9 x 9) list of the lists of possible states of each cell and is made from the masks when it is read
+
+#the mask of a cell in a full superposition (all of the numbers 1 to 9 are possible)
+FULL = (1 << 9) - 1
+
+#the amount of possible states (entropy) for every mask
+POPCOUNT = [bin(mask).count("1") for mask in range(FULL+1)]
+
+#the numbers that are possible for every mask, in order
+STATES = [tuple(number+1 for number in range(9) if mask & (1 << number)) for mask in range(FULL+1)]
+
+#a function to get the range of subgrids or cells in the same row (0-2, 3-5 or 6-8)
+def rowRange(number):
+	return range((number // 3) * 3, ((number // 3) * 3) + 3)
+
+#a function to get the subgrids or cells in the same column (0, 3, 6 or 1, 4, 7 or 2, 5, 8)
+def columnRange(number):
+	return range(number % 3, 9, 3)
+
+#a function to get the indexes of every cell that shares a subgrid, row or column with a cell
+def cellPeers(index):
+	subgrid, cell = divmod(index, 9)
+
+	peers = set()
+	for c in range(9):
+		peers.add((subgrid*9) + c)
+	for s in rowRange(subgrid):
+		for c in rowRange(cell):
+			peers.add((s*9) + c)
+	for s in columnRange(subgrid):
+		for c in columnRange(cell):
+			peers.add((s*9) + c)
+
+	peers.discard(index)
+
+	return tuple(sorted(peers))
+
+#a function to get the indexes of the cells in the subgrid, row and column of a cell, in the order the solved values are checked (repeats included)
+def checkOrder(index):
+	subgrid, cell = divmod(index, 9)
+
+	order = [(subgrid*9) + c for c in range(9)]
+	order += [(s*9) + c for s in rowRange(subgrid) for c in rowRange(cell)]
+	order += [(s*9) + c for s in columnRange(subgrid) for c in columnRange(cell)]
+
+	return tuple(order)
+
+#the peers of every cell on the board and the order their solved values are checked in
+PEERS = [cellPeers(index) for index in range(81)]
+CHECKS = [checkOrder(index) for index in range(81)]
+
+#the peers of every cell as an (81 x 81) array of booleans for collapsing many boards at once
+PEER_MASK = np.zeros((81, 81), dtype=bool)
+for index, peers in enumerate(PEERS):
+	PEER_MASK[index, list(peers)] = True
+
+#the entropy of every mask and the mask of the nth state of every mask as arrays for collapsing many boards at once
+POPCOUNT_ARRAY = np.array(POPCOUNT, dtype=np.int8)
+NTH_STATE = np.array([[1 << (state-1) for state in STATES[mask]] + [0]*(9 - POPCOUNT[mask]) for mask in range(FULL+1)], dtype=np.int16)
+
+#the order the solved values are checked in for every cell as an (81 x 27) array of cell indexes
+CHECK_ARRAY = np.array(CHECKS, dtype=np.intp)
+
+#the number of each mask with a single state (the other masks are never read)
+MASK_VALUE = np.zeros(FULL+1, dtype=np.int8)
+for number in range(9):
+	MASK_VALUE[1 << number] = number + 1
+
+#a function to turn a flat list of 81 masks into a (9 x 9) board of the lists of possible states of each cell
+def maskBoard(masks):
+	return [[list(STATES[masks[(subgrid*9) + cell]]) for cell in range(9)] for subgrid in range(9)]
+
+#a function to turn a (9 x 9) board of the lists of possible states of each cell into a flat list of 81 masks
+def boardMasks(board):
+	masks = []
+
+	for subgrid in board:
+		for states in subgrid:
+			mask = 0
+			for state in states:
+				mask |= 1 << (state-1)
+			masks.append(mask)
+
+	return masks
+
+#a function to get a numpy random generator from a generator, a seed or nothing (a new unseeded generator)
+def randomGenerator(generator=None):
+	if (isinstance(generator, np.random.Generator)):
+		return generator
+
+	return np.random.default_rng(generator)
+
+#a function to get the state of each cell that is checked last when every state of the cell is taken by a solved peer, returns the mask of the state
+def lastChecked(boards, counts, cells, masks):
+	checks = CHECK_ARRAY[cells]
+	rows = np.arange(len(cells))[:, None]
+
+	#the solved peers of each cell in the order they are checked, and whether each of them solves each state of the cell
+	peers = np.where(counts[rows, checks] == 1, boards[rows, checks], 0)
+	bits = (1 << np.arange(9, dtype=np.int16))
+	hits = (peers[:, :, None] == bits[None, None, :]) & ((masks[:, None] & bits[None, :]) != 0)[:, None, :]
+
+	#the state whose first solved peer comes last is the one that is left
+	first = np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+
+	return bits[first.argmax(axis=1)]
+
+#a function to collapse many boards at once, returns an (n x 81) array of the values of each board
+def collapseBoards(n, generator=None):
+	'''
+	every board is an array of 81 masks like the Cascade class, and all of the boards take a
+	step of the collapse together. each step collapses one cell of every unsolved board: the
+	states of the solved peers are removed, a random state is chosen, the state is removed from
+	the peers and the next cell is the first with the least entropy. boards that are solved are
+	moved out of the working array so the steps that follow only work on unsolved boards
+	'''
+	generator = randomGenerator(generator)
+
+	values = np.zeros((n, 81), dtype=np.int8)
+	boards = np.full((n, 81), FULL, dtype=np.int16)
+
+	#start every board on a random cell
+	active = np.arange(n)
+	cells = generator.integers(0, 81, n)
+
+	while (len(active)):
+		rows = np.arange(len(active))
+		peers = PEER_MASK[cells]
+		counts = POPCOUNT_ARRAY[boards]
+
+		#remove the states of the solved peers
+		solved = np.bitwise_or.reduce(np.where(peers & (counts == 1), boards, 0), axis=1)
+		masks = boards[rows, cells]
+		options = masks & ~solved
+
+		#when every state is taken the states are removed in the order they are checked until one is left, like the Cascade class
+		taken = np.flatnonzero(options == 0)
+		if (len(taken)):
+			options[taken] = lastChecked(boards[taken], counts[taken], cells[taken], masks[taken])
+
+		#randomly select one of the remaining states for each cell
+		picks = (generator.random(len(active)) * POPCOUNT_ARRAY[options]).astype(np.intp)
+		states = NTH_STATE[options, picks]
+		boards[rows, cells] = states
+
+		#collapse the peers that are not solved yet
+		unsolved = peers & (counts > 1)
+		boards = np.where(unsolved, boards & ~states[:, None], boards)
+
+		#get the cell with the least entropy on each board, solved boards have none left
+		counts = POPCOUNT_ARRAY[boards]
+		entropy = np.where(counts > 1, counts, 10)
+		cells = entropy.argmin(axis=1)
+
+		#move the solved boards out of the working array
+		remaining = entropy[rows, cells] < 10
+		if (not remaining.all()):
+			values[active[~remaining]] = MASK_VALUE[boards[~remaining]]
+
+			active = active[remaining]
+			boards = boards[remaining]
+			cells = cells[remaining]
+
+	return values
+
+#a function to keep making random boards, collapsed in batches, and yield the values of each board
+def iterBoards(generator=None, batch=1024):
+	generator = randomGenerator(generator)
+
+	while True:
+		for board in collapseBoards(batch, generator):
+			yield board
+
 #an organized class for the cascade algorithm
 class Cascade:
 	#initialization of the cascade
 	def __init__(self):
 		self.board = self.createBoard()
 
+	#the board as a (9 x 9) list of the lists of possible states of each cell, made from the masks (changes to the lists are only kept by setting the board again)
+	@property
+	def board(self):
+		return maskBoard(self.masks)
+
+	@board.setter
+	def board(self, board):
+		self.masks = boardMasks(board)
+
 	#creates a blank sudoku board with all cells in a superposition
 	def createBoard(self):
-		mainarray = []
+		return [[[1, 2, 3, 4, 5, 6, 7, 8, 9] for y in range(9)] for x in range(9)]
 
-		for x in range(9):
-			temparray = []
-			for y in range(9):
-				temparray.append([1, 2, 3, 4, 5, 6, 7, 8, 9])
-			mainarray.append(temparray)
+	#makes many random boards at once with collapseBoards and returns a list of the values of each board like boardValues (randomCollapse is the path for a single board)
+	@classmethod
+	def generate(cls, n, generator=None):
+		#without a generator the boards follow the seed of the random module
+		if (generator is None):
+			generator = random.getrandbits(64)
 
-		return mainarray
+		return collapseBoards(n, generator).tolist()
 
 	#prints all of the values in the sudoku board
 	def boardValues(self):
 		valuesarr = []
 
-		for x in range(9):
-			for y in range(9):
-				for num in self.board[x][y]:
-					valuesarr.append(num)
+		for mask in self.masks:
+			valuesarr.extend(STATES[mask])
 
 		return valuesarr
 
-	#randomly collapses a cell on the board to a single state
-	def randomCollapse(self, subgrid=random.randint(0, 8), cell=random.randint(0, 8)):
-		#get the values for the subgrid, cell, and state of the cell
-		randomsubgrid = subgrid
-		randomcell = cell
-
-		#set values for the cell with a single state
-		self.subgrid = randomsubgrid
-		self.cell = randomcell
-
-		#check the solved subgrid, row, and column values to collapse the possibilities of the current cell
-		solvedarray = self.subgridValues() + self.rowValues() + self.columnValues()
-
-		#check the solved cells surrounding this cell to remove impossible states
-		for i in solvedarray:
-			if (i in self.board[randomsubgrid][randomcell] and len(self.board[randomsubgrid][randomcell]) > 1):
-				self.board[randomsubgrid][randomcell].remove(i)
-
-		#randomly select a state for this cell to collapse to
-		randomindex = random.randint(0, len(self.board[randomsubgrid][randomcell])-1)
-		randomstate = self.board[randomsubgrid][randomcell][randomindex]
-		self.board[randomsubgrid][randomcell] = [randomstate]
-		self.state = randomstate
-
-		#collapse the subgrid, row, and column associated with this cell
-		self.collapseSubgrid()
-		self.collapseRow()
-		self.collapseColumn()
-
-		#get the value of the cell with the least entropy
-		subgrid, cell, solved = self.entropyCollapse()
-
-		#check to see if the board is solved as the exit condition for this function
-		if (not solved):
-			#randomly collapse the cell with the least entropy
-			self.randomCollapse(subgrid, cell)
+	#randomly collapses a cell on the board to a single state, then keeps collapsing the cell with the least entropy until the board is solved
+	def randomCollapse(self, subgrid=None, cell=None):
+		#start on a random cell if no cell is given
+		if (subgrid is None):
+			subgrid = random.randint(0, 8)
+		if (cell is None):
+			cell = random.randint(0, 8)
+
+		board = self.masks
+		solved = False
+
+		while (not solved):
+			#set values for the cell with a single state
+			self.subgrid = subgrid
+			self.cell = cell
+			index = (subgrid*9) + cell
+			peers = PEERS[index]
+
+			#check the solved subgrid, row, and column values to remove impossible states (never the last state)
+			mask = board[index]
+			for peer in CHECKS[index]:
+				peermask = board[peer]
+				if (POPCOUNT[peermask] == 1 and mask & peermask and POPCOUNT[mask] > 1):
+					mask &= ~peermask
+
+			#randomly select a state for this cell to collapse to
+			states = STATES[mask]
+			randomstate = states[random.randint(0, len(states)-1)]
+			board[index] = 1 << (randomstate-1)
+			self.state = randomstate
+
+			#collapse the subgrid, row, and column associated with this cell
+			statemask = board[index]
+			for peer in peers:
+				peermask = board[peer]
+				if (peermask & statemask and POPCOUNT[peermask] > 1):
+					board[peer] = peermask & ~statemask
+
+			#get the cell with the least entropy and check to see if the board is solved
+			subgrid, cell, solved = self.entropyCollapse()
 
 		return self.board
 
 	#collapses the cell with the least entropy on the board
 	def entropyCollapse(self):
 		'''
-		set a starting length of possibilities and a cell on the board to compare to when
-		finding the lowest entropy cell. also set a count variable to count the amount of
-		solved cells there are on the board. if the solved cell count is 81, then the
-		board is solved
+		find the first cell with the least amount of possibilities that is not solved yet. a
+		cell with two possibilities cannot be beaten so the search stops there. if there are
+		no cells left that are not solved, the board is solved
 		'''
-		length = 9
-		subgrid = 0
-		cell = 0
-		count = 0
-
-		#find a cell with the shortest length of possibilities (least entropy)
-		for x in range(9):
-			for y in range(9):
-				cellentropy = len(self.board[x][y])
-
-				if (cellentropy < length and cellentropy > 1):
-					subgrid = x
-					cell = y
-					length = cellentropy
-				elif (cellentropy == 1):
-					count += 1
-
-		#check to see if the board is solved or not
-		if (count == 81):
-			return subgrid, cell, True
-		else:
-			return subgrid, cell, False
+		board = self.masks
+		length = 10
+		best = 0
 
-	#a function to return the values of numbers in a subgrid
-	def subgridValues(self):
-		valuesarr = []
+		for index in range(81):
+			cellentropy = POPCOUNT[board[index]]
 
-		for i in range(9):
-			if (len(self.board[self.subgrid][i]) == 1):
-				valuesarr.append(self.board[self.subgrid][i][0])
+			if (1 < cellentropy < length):
+				best = index
+				length = cellentropy
 
-		return valuesarr
+				if (cellentropy == 2):
+					break
+
+		subgrid, cell = divmod(best, 9)
+
+		return subgrid, cell, length == 10
+
+	#a function to return the values of numbers in a subgrid
+	def subgridValues(self):
+		return [STATES[self.masks[(self.subgrid*9) + c]][0] for c in range(9) if POPCOUNT[self.masks[(self.subgrid*9) + c]] == 1]
 
 	#collapses the subgrid of a board based on the state of a single cell
 	def collapseSubgrid(self):
-		for i in range(9):
-			if (i != self.cell and self.state in self.board[self.subgrid][i] and len(self.board[self.subgrid][i]) > 1):
-				self.board[self.subgrid][i].remove(self.state)
-
+		self.collapseCells([(self.subgrid, c) for c in range(9) if c != self.cell])
 
 	#a function to get the correct range of indexes based on a subgrid or cell number (works only for rows and subgrids, not columns)
 	def getrowrange(self, number):
-		if (number in range(0, 3)):
-			rowrange = range(0, 3)
-		elif (number in range(3, 6)):
-			rowrange = range(3, 6)
-		elif (number in range(6, 9)):
-			rowrange = range(6, 9)
-
-		return rowrange
+		return rowRange(number)
 
 	#a function to return the values of numbers in a row
 	def rowValues(self):
-		subgridrange = self.getrowrange(self.subgrid)
-		cellrange = self.getrowrange(self.cell)
-
-		valuesarr = []
-
-		for s in subgridrange:
-			for c in cellrange:
-				if (len(self.board[s][c]) == 1):
-					valuesarr.append(self.board[s][c][0])
-
-		return valuesarr
+		return self.cellValues([(s, c) for s in rowRange(self.subgrid) for c in rowRange(self.cell)])
 
 	#a function to collapse the possibilities of a row in the board
 	def collapseRow(self):
-		#get the correct ranges for the subgrid and cell indexes to collapse the possibilities of
-		subgridrange = self.getrowrange(self.subgrid)
-		cellrange = self.getrowrange(self.cell)
-
-		#collapse the possibilities of cells in the same row as the initial collapsed cell
-		for s in subgridrange:
-			for c in cellrange:
-				if (self.state in self.board[s][c] and len(self.board[s][c]) > 1):
-					self.board[s][c].remove(self.state)
+		self.collapseCells([(s, c) for s in rowRange(self.subgrid) for c in rowRange(self.cell)])
 
 	#a function to get the correct index numbers based on a subgrid or cell number (works only for columns, not rows or subgrids)
 	def getcolumnrange(self, number):
-		if (number in [0, 3, 6]):
-			columnrange = [0, 3, 6]
-		elif (number in [1, 4, 7]):
-			columnrange = [1, 4, 7]
-		elif (number in [2, 5, 8]):
-			columnrange = [2, 5, 8]
-
-		return columnrange
+		return list(columnRange(number))
 
 	#a function to return the values of numbers in a column
 	def columnValues(self):
-		subgridcolumn = self.getcolumnrange(self.subgrid)
-		cellcolumn = self.getcolumnrange(self.cell)
+		return self.cellValues([(s, c) for s in columnRange(self.subgrid) for c in columnRange(self.cell)])
 
-		valuesarr = []
+	#a function to collapse the possibilities of a column in the board
+	def collapseColumn(self):
+		self.collapseCells([(s, c) for s in columnRange(self.subgrid) for c in columnRange(self.cell)])
 
-		for s in subgridcolumn:
-			for c in cellcolumn:
-				if (len(self.board[s][c]) == 1):
-					valuesarr.append(self.board[s][c][0])
+	#a function to return the values of the solved cells in a list of (subgrid, cell) places
+	def cellValues(self, places):
+		masks = [self.masks[(s*9) + c] for s, c in places]
 
-		return valuesarr
+		return [STATES[mask][0] for mask in masks if POPCOUNT[mask] == 1]
 
-	#a function to collapse the possibilities of a column in the board
-	def collapseColumn(self):
-		#get the correct ranges for the subgrid and cell indexes to collapse the possibilities of
-		subgridcolumn = self.getcolumnrange(self.subgrid)
-		cellcolumn = self.getcolumnrange(self.cell)
-
-		#collapse the possibilities of cells in the same column as the initial collapsed cell
-		for s in subgridcolumn:
-			for c in cellcolumn:
-				if (self.state in self.board[s][c] and len(self.board[s][c]) > 1):
-					self.board[s][c].remove(self.state)
+	#a function to remove the current state from the cells in a list of (subgrid, cell) places that are not solved
+	def collapseCells(self, places):
+		statemask = 1 << (self.state-1)
+
+		for s, c in places:
+			mask = self.masks[(s*9) + c]
+			if (mask & statemask and POPCOUNT[mask] > 1):
+				self.masks[(s*9) + c] = mask & ~statemask
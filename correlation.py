@@ -0,0 +1,83 @@
+'''
+This is a module to measure the correlations between every asset in a universe of assets at once
+'''
+from numpy.lib.stride_tricks import sliding_window_view
+import numpy as np
+
+#a function to get the percentage returns of prices along the last axis (one less value than the prices)
+def priceReturns(prices):
+	prices = np.asarray(prices, dtype=float)
+
+	return np.diff(prices, axis=-1) / prices[..., :-1]
+
+#a function to rank values along the last axis, tied values get the average of their ranks
+def rankData(values):
+	values = np.asarray(values, dtype=float)
+	shape = values.shape
+	rows = values.reshape(-1, shape[-1])
+	count, length = rows.shape
+
+	#sort each row and give each sorted value its position as a rank
+	order = np.argsort(rows, axis=-1, kind="stable")
+	sorted_rows = np.take_along_axis(rows, order, axis=-1)
+	positions = np.broadcast_to(np.arange(1, length+1, dtype=float), rows.shape)
+
+	#label each run of equal values in every row as a group (a new row always starts a new group)
+	new_group = np.ones(rows.shape, dtype=bool)
+	new_group[:, 1:] = sorted_rows[:, 1:] != sorted_rows[:, :-1]
+	groups = np.cumsum(new_group.ravel()) - 1
+
+	#give every value in a group the average rank of the group
+	averages = np.bincount(groups, weights=positions.ravel()) / np.bincount(groups)
+	sorted_ranks = averages[groups].reshape(rows.shape)
+
+	#put the ranks back in the original order of the values
+	ranks = np.empty(rows.shape)
+	np.put_along_axis(ranks, order, sorted_ranks, axis=-1)
+
+	return ranks.reshape(shape)
+
+#a function to get the pearson correlation matrix of the rows of an array, works on (assets x returns) or (windows x assets x returns)
+def pearsonMatrix(returns):
+	returns = np.asarray(returns, dtype=float)
+
+	#center each row and scale it to a length of one so the matrix product gives the correlations
+	centered = returns - returns.mean(axis=-1, keepdims=True)
+	norms = np.sqrt(np.einsum("...ij,...ij->...i", centered, centered))
+
+	#rows that never change have no correlation with anything
+	with np.errstate(divide="ignore", invalid="ignore"):
+		scaled = centered / norms[..., None]
+		matrix = scaled @ np.swapaxes(scaled, -1, -2)
+
+	return np.clip(matrix, -1, 1)
+
+#a function to get the spearman (rank) correlation matrix of the rows of an array
+def spearmanMatrix(returns):
+	return pearsonMatrix(rankData(returns))
+
+#a function to get the correlation matrix of the rows of an array with the chosen method
+def correlationMatrix(returns, method="pearson"):
+	if (method == "pearson"):
+		return pearsonMatrix(returns)
+	elif (method == "spearman"):
+		return spearmanMatrix(returns)
+
+	raise ValueError("Unknown correlation method: " + str(method))
+
+#a function to get the correlation matrices over a rolling window of returns, returns an array of (windows x assets x assets)
+def rollingMatrices(returns, window, step=1, method="pearson"):
+	returns = np.asarray(returns, dtype=float)
+
+	#make a view of every window of returns without copying them, then move the windows to the front
+	windows = sliding_window_view(returns, window, axis=-1)[:, ::step]
+	windows = np.swapaxes(windows, 0, 1)
+
+	return correlationMatrix(windows, method)
+
+#a function to get the trend or volatility relationship labels ("linear" or "inverse") between every pair of assets
+def relationshipMatrix(values):
+	#two assets have a linear relationship if their values have the same sign
+	signs = np.sign(np.asarray(values, dtype=float))
+
+	return np.where(signs[:, None] == signs[None, :], "linear", "inverse")
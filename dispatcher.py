@@ -0,0 +1,150 @@
+'''
+This is a module to follow many symbols on a single live stream, handing the bars of each symbol to its handler through its own queue
+'''
+import asyncio
+import time
+import loopmonitor
+
+#an organized class for the queue, handler and counters of one symbol on the stream
+class SymbolQueue:
+	#initialization of the queue with the handler of the symbol and the most bars that can wait
+	def __init__(self, symbol, handler, maxsize):
+		self.symbol = symbol
+		self.handler = handler
+		self.queue = asyncio.Queue(maxsize)
+
+		#the task that hands the bars to the handler (started when the first bar arrives)
+		self.worker = None
+
+		#the amount of bars received, dropped for being stale and handled
+		self.received = 0
+		self.dropped = 0
+		self.handled = 0
+
+#an organized class for routing the bars of a whole universe of symbols on one stream to a handler for each symbol
+class StreamDispatcher:
+	'''
+	every subscription goes through the same stream (one connection) with the dispatcher as the
+	callback. each symbol has a bounded queue and a worker that awaits the handler for one bar at
+	a time, so a slow handler only holds up its own symbol. when a queue is full the oldest bar
+	is dropped, so a handler that falls behind always catches up to the newest bars
+	'''
+	#initialization of the dispatcher with the stream to subscribe on and the most bars that can wait for each symbol
+	def __init__(self, stream, maxsize=2):
+		self.stream = stream
+		self.maxsize = maxsize
+
+		#the queues of each symbol
+		self.queues = {}
+
+		#the largest amount of bars that have waited in any queue
+		self.max_depth = 0
+
+		#the time from a bar arriving to its handler finishing, and the lag of the event loop of the stream
+		self.latency = loopmonitor.LatencySamples()
+		self.monitor = loopmonitor.LoopMonitor()
+
+	#a function to get the queue of a symbol, making it the first time the symbol is subscribed
+	def symbolQueue(self, symbol, handler):
+		if (symbol not in self.queues):
+			self.queues[symbol] = SymbolQueue(symbol, handler, self.maxsize)
+		else:
+			self.queues[symbol].handler = handler
+
+		return self.queues[symbol]
+
+	#a function to subscribe to the stock bars of many symbols, each bar is handed to the handler
+	def subscribeBars(self, handler, symbols):
+		for symbol in symbols:
+			self.symbolQueue(symbol, handler)
+
+		self.stream.subscribe_bars(self.dispatch, *symbols)
+
+	#a function to subscribe to the crypto bars of many symbols, each bar is handed to the handler
+	def subscribeCryptoBars(self, handler, symbols):
+		for symbol in symbols:
+			self.symbolQueue(symbol, handler)
+
+		self.stream.subscribe_crypto_bars(self.dispatch, *symbols)
+
+	#the callback function for every bar on the stream, puts the bar on the queue of its symbol
+	async def dispatch(self, data):
+		symbol_queue = self.queues.get(data.symbol)
+		if (symbol_queue is None):
+			return
+
+		symbol_queue.received += 1
+
+		#drop the oldest bar if the handler has fallen behind
+		if (symbol_queue.queue.full()):
+			symbol_queue.queue.get_nowait()
+			symbol_queue.queue.task_done()
+			symbol_queue.dropped += 1
+
+		#keep the time the bar arrived to measure the time until it is handled
+		symbol_queue.queue.put_nowait((time.perf_counter(), data))
+		self.max_depth = max(self.max_depth, symbol_queue.queue.qsize())
+
+		#start measuring the lag of the event loop of the stream
+		if (not self.monitor.running):
+			self.monitor.start()
+
+		#start the worker of this symbol on the loop of the stream
+		if (symbol_queue.worker is None or symbol_queue.worker.done()):
+			symbol_queue.worker = asyncio.get_running_loop().create_task(self.work(symbol_queue))
+
+	#a function to hand the bars of a symbol to its handler one at a time
+	async def work(self, symbol_queue):
+		while True:
+			arrival, data = await symbol_queue.queue.get()
+
+			try:
+				await symbol_queue.handler(data)
+			except Exception as e:
+				#an error for one bar should not stop the symbol from being followed
+				print("Error handling bar for", symbol_queue.symbol + ":", e)
+			finally:
+				self.latency.add(time.perf_counter() - arrival)
+				symbol_queue.handled += 1
+				symbol_queue.queue.task_done()
+
+	#returns the amount of bars waiting for a symbol, or for every symbol if none is given
+	def depth(self, symbol=None):
+		if (symbol is not None):
+			return self.queues[symbol].queue.qsize() if symbol in self.queues else 0
+
+		return sum(symbol_queue.queue.qsize() for symbol_queue in self.queues.values())
+
+	#returns the amount of bars that have been dropped for a symbol, or for every symbol if none is given
+	def drops(self, symbol=None):
+		if (symbol is not None):
+			return self.queues[symbol].dropped if symbol in self.queues else 0
+
+		return sum(symbol_queue.dropped for symbol_queue in self.queues.values())
+
+	#returns the counters of the dispatcher
+	def stats(self):
+		return {
+			"symbols": len(self.queues),
+			"depth": self.depth(),
+			"max_depth": self.max_depth,
+			"received": sum(symbol_queue.received for symbol_queue in self.queues.values()),
+			"dropped": self.drops(),
+			"handled": sum(symbol_queue.handled for symbol_queue in self.queues.values()),
+			"latency": self.latency.summary(),
+			"loop_lag": self.monitor.summary()
+		}
+
+	#a function to wait until every bar that is waiting has been handled
+	async def join(self):
+		for symbol_queue in list(self.queues.values()):
+			await symbol_queue.queue.join()
+
+	#a function to stop the workers of every symbol and the monitor of the event loop
+	def stop(self):
+		self.monitor.stop()
+
+		for symbol_queue in self.queues.values():
+			if (symbol_queue.worker is not None):
+				symbol_queue.worker.cancel()
+				symbol_queue.worker = None
@@ -0,0 +1,289 @@
+'''
+This is a module with a local stand-in for the alpaca REST client so the trader and analyst can run without a network
+'''
+from datetime import datetime, timezone
+import numpy as np
+import random
+import time
+import re
+import backtest
+
+#the length of each bar time frame in seconds
+FRAME_SECONDS = {
+	"Min": 60,
+	"Hour": 60*60,
+	"Day": 60*60*24,
+	"Week": 60*60*24*7,
+	"Month": 60*60*24*7*4
+}
+
+#the names of the time units used by the bar store for each time frame
+FRAME_UNITS = {
+	"Min": "minute",
+	"Hour": "hour",
+	"Day": "day",
+	"Week": "week",
+	"Month": "month"
+}
+
+#a function to get the amount, the unit name and the length in seconds of an alpaca time frame (such as "1Hour")
+def parseTimeFrame(timeframe):
+	match = re.match(r"(\d+)([A-Za-z]+)", str(timeframe))
+	amount = int(match.group(1))
+	frame = match.group(2)
+
+	return amount, FRAME_UNITS[frame], amount*FRAME_SECONDS[frame]
+
+#a function to read the iso timestamps the trader sends in requests, a "Z" at the end means UTC like it does for the api
+def parseTime(value):
+	if (isinstance(value, str)):
+		return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+	return float(value)
+
+#a function to make a repeatable random number between 0 and 1 for each value of an array
+def hashNoise(values, seed):
+	return np.modf(np.abs(np.sin((np.asarray(values, dtype=float) * 12.9898) + (seed * 78.233)) * 43758.5453))[0]
+
+#a function to make synthetic bars of market data for an array of timestamps, the same timestamps always give the same bars
+def syntheticColumns(timestamps, seed=0, base=100.0, step=60):
+	timestamps = np.asarray(timestamps, dtype=float)
+	generator = np.random.default_rng(seed)
+
+	#make a price from a few slow waves with random periods and phases, plus a little noise
+	periods = generator.uniform(60*60*6, 60*60*24*30, 3)
+	phases = generator.uniform(0, 2*np.pi, 3)
+	scales = generator.uniform(0.01, 0.08, 3)
+
+	def prices(times):
+		waves = np.zeros_like(times)
+		for period, phase, scale in zip(periods, phases, scales):
+			waves = waves + (scale * np.sin(((2*np.pi*times) / period) + phase))
+
+		return base * np.exp(waves + (0.002 * (hashNoise(times, seed) - 0.5)))
+
+	opens = prices(timestamps)
+	closes = prices(timestamps + step)
+
+	#stretch the highs and lows past the open and close by a random amount
+	spread = 0.004 * hashNoise(timestamps, seed + 1)
+	highs = np.maximum(opens, closes) * (1 + spread)
+	lows = np.minimum(opens, closes) * (1 - spread)
+
+	return {
+		"t": timestamps,
+		"o": opens,
+		"h": highs,
+		"l": lows,
+		"c": closes,
+		"v": 1000 * (0.5 + hashNoise(timestamps, seed + 2)),
+		"vw": (highs + lows + closes) / 3
+	}
+
+#an organized class for a bar with the same attributes as an alpaca bar
+class FakeBar:
+	__slots__ = ("symbol", "t", "o", "h", "l", "c", "v", "vw")
+
+	def __init__(self, symbol, t, o, h, l, c, v, vw):
+		self.symbol = symbol
+		self.t = datetime.fromtimestamp(t, timezone.utc)
+		self.o = o
+		self.h = h
+		self.l = l
+		self.c = c
+		self.v = v
+		self.vw = vw
+
+	@property
+	def open(self):
+		return self.o
+
+	@property
+	def high(self):
+		return self.h
+
+	@property
+	def low(self):
+		return self.l
+
+	@property
+	def close(self):
+		return self.c
+
+	@property
+	def volume(self):
+		return self.v
+
+	@property
+	def vwap(self):
+		return self.vw
+
+	@property
+	def timestamp(self):
+		return self.t
+
+#an organized class for a local alpaca REST client, backed by the bar store or by synthetic market data
+class FakeREST(backtest.SimBroker):
+	#initialization of the client, the latency and jitter are the seconds each request waits before it is answered
+	def __init__(self, store=None, cash=100000, latency=0.0, jitter=0.0, now=None, assets=None):
+		super().__init__([], [], np.zeros((1, 0)), cash, "crypto", assets)
+
+		self.store = store
+		self.latency = latency
+		self.jitter = jitter
+
+		#a fixed time for the client to treat as the present (the real time is used if this is None)
+		self.now = now
+
+		#the amount of requests answered by the client
+		self.requests = 0
+
+	#a function to wait for the injected latency of a request
+	def wait(self):
+		self.requests += 1
+
+		delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+		if (delay > 0):
+			time.sleep(delay)
+
+	#returns the current time of the client as a timestamp
+	def currentTime(self):
+		return self.now if self.now is not None else time.time()
+
+	#returns the place of a symbol in the arrays of the broker, adding symbols the first time they are used
+	def place(self, symbol):
+		if (symbol not in self.index):
+			self.index[symbol] = len(self.symbols)
+			self.symbols.append(symbol)
+			self.qty = np.append(self.qty, 0.0)
+			self.cost = np.append(self.cost, 0.0)
+
+		return self.index[symbol]
+
+	#returns the asset class of a symbol (crypto pairs end in USD unless the assets say otherwise)
+	def assetClass(self, symbol):
+		default = "crypto" if symbol.endswith("USD") else "us_equity"
+
+		return self.assets.get(symbol, {}).get("class", default)
+
+	#a function to get the columns of market data for a symbol between two timestamps
+	def barColumns(self, symbol, timeframe, start, end):
+		amount, unit, seconds = parseTimeFrame(timeframe)
+
+		#use stored market data when there is some for this symbol and time unit
+		if (self.store is not None and unit in self.store.timeunits(symbol)):
+			return self.store.query(symbol, unit, start, end)
+
+		#otherwise make synthetic bars on the time frame boundaries inside the time range
+		timestamps = np.arange(np.ceil(start / seconds) * seconds, end + 1, seconds)
+		seed = sum(symbol.encode())
+
+		return syntheticColumns(timestamps, seed, 10 + (seed % 90), seconds)
+
+	#a function to make bar objects out of columns of market data
+	def columnBars(self, symbol, columns):
+		rows = zip(*[np.asarray(columns[name]).tolist() for name in ("t", "o", "h", "l", "c", "v", "vw")])
+
+		return [FakeBar(symbol, *row) for row in rows]
+
+	#returns the latest bar of a symbol at the current time
+	def latestBar(self, symbol):
+		now = self.currentTime()
+
+		#use the finest time unit of stored market data when there is some for this symbol
+		stored = self.store.timeunits(symbol) if self.store is not None else []
+		units = [unit for unit in ("minute", "hour", "day", "week", "month") if unit in stored]
+
+		if (units):
+			columns = self.store.query(symbol, units[0], None, now)
+		else:
+			columns = self.barColumns(symbol, "1Min", now - 120, now - 60)
+
+		if (not len(columns["t"])):
+			raise backtest.SimError("No market data for " + symbol)
+
+		return FakeBar(symbol, *[float(columns[name][-1]) for name in ("t", "o", "h", "l", "c", "v", "vw")])
+
+	#returns the current price of a symbol
+	def price(self, symbol):
+		return float(self.latestBar(symbol).c)
+
+	#returns the current prices of every symbol as an array
+	def currentPrices(self):
+		return np.array([self.price(symbol) for symbol in self.symbols])
+
+	#a function to get the account information
+	def get_account(self):
+		self.wait()
+
+		return super().get_account()
+
+	#a function to get a list of the held positions
+	def list_positions(self):
+		self.wait()
+
+		return super().list_positions()
+
+	#a function to get a position object for a held symbol
+	def get_position(self, symbol):
+		self.wait()
+
+		return super().get_position(symbol)
+
+	#a function to get information about an asset
+	def get_asset(self, symbol):
+		self.wait()
+
+		return super().get_asset(symbol)
+
+	#a function to get information about every asset the client knows
+	def list_assets(self, status=None, asset_class=None):
+		self.wait()
+
+		return super().list_assets(status, asset_class)
+
+	#a function to fill a market order at the current price
+	def submit_order(self, symbol, qty=None, side="buy", type="market", time_in_force="day", notional=None, **kwargs):
+		self.wait()
+
+		return super().submit_order(symbol, qty, side, type, time_in_force, notional, **kwargs)
+
+	#a function to get the latest bar of a stock
+	def get_latest_bar(self, symbol):
+		self.wait()
+
+		return self.latestBar(symbol)
+
+	#a function to get the latest bar of a crypto
+	def get_latest_crypto_bar(self, symbol, exchange=None):
+		self.wait()
+
+		return self.latestBar(symbol)
+
+	#a function to get the latest bars of many stocks as a dictionary keyed by symbol
+	def get_latest_bars(self, symbols):
+		self.wait()
+
+		return {symbol: self.latestBar(symbol) for symbol in symbols}
+
+	#a function to get the latest bars of many cryptos as a dictionary keyed by symbol
+	def get_latest_crypto_bars(self, symbols, exchange=None):
+		self.wait()
+
+		return {symbol: self.latestBar(symbol) for symbol in symbols}
+
+	#a function to get the bars of a stock between two iso timestamps
+	def get_bars_iter(self, symbol, timeframe, start, end, adjustment="raw", **kwargs):
+		self.wait()
+
+		columns = self.barColumns(symbol, timeframe, parseTime(start), parseTime(end))
+
+		return iter(self.columnBars(symbol, columns))
+
+	#a function to get the bars of a crypto between two iso timestamps
+	def get_crypto_bars_iter(self, symbol, timeframe, start, end, **kwargs):
+		self.wait()
+
+		columns = self.barColumns(symbol, timeframe, parseTime(start), parseTime(end))
+
+		return iter(self.columnBars(symbol, columns))
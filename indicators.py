@@ -0,0 +1,247 @@
+'''
+This is a module to keep the trend and volatility metrics of live market data up to date one bar at a time
+'''
+from collections import deque
+import numpy as np
+import threading
+
+#the names each value of a bar can have (stream bars use the long names, stored bars use the short names)
+BAR_FIELDS = {
+	"o": ("open", "o"),
+	"h": ("high", "h"),
+	"l": ("low", "l"),
+	"c": ("close", "c"),
+	"v": ("volume", "v"),
+	"vw": ("vwap", "vw")
+}
+
+#a function to get a value of a bar from a bar object or a dictionary by its short name
+def barValue(bar, name):
+	for key in BAR_FIELDS[name]:
+		value = bar.get(key) if isinstance(bar, dict) else getattr(bar, key, None)
+
+		if (value is not None):
+			return float(value)
+
+	#bars without a volume weighted price use the closing price
+	if (name == "vw"):
+		return barValue(bar, "c")
+
+	raise KeyError("Bar has no value for " + name)
+
+#returns the sign of a number as an integer
+def sign(number):
+	return (number > 0) - (number < 0)
+
+#a function to calculate the trend and volatility metrics of bars stored as columns
+def barMetrics(columns):
+	'''
+	the columns can be 1d arrays for a single asset or 2d arrays of (symbols x bars) for
+	a whole universe of assets. assets with fewer bars than the others are padded with nan
+	values at the end, which add nothing to the metrics. the sums are accumulated in bar
+	order so the results match a loop over the bars exactly
+	'''
+	opens = np.asarray(columns["o"], dtype=float)
+	highs = np.asarray(columns["h"], dtype=float)
+	lows = np.asarray(columns["l"], dtype=float)
+	closes = np.asarray(columns["c"], dtype=float)
+	vws = np.asarray(columns["vw"], dtype=float)
+
+	#calculate the trend of each bar in percentage
+	percent_trend = ((closes - opens)*100) / vws
+
+	#calculate the percentage volatility up and down and the total volatility of each bar
+	percent_up = ((highs - vws)*100) / vws
+	percent_down = ((vws - lows)*100) / vws
+	percent_volatility = percent_up + percent_down
+
+	#calculate the difference between the volatility above and below the volume weighted price
+	vol_trend_current = (highs - vws) - (vws - lows)
+
+	#compare the volatility of each bar to the previous bar (the first bar is compared to zero)
+	prev_volatility = np.zeros_like(percent_volatility)
+	prev_volatility[..., 1:] = percent_volatility[..., :-1]
+	vol_change_current = np.sign(percent_volatility - prev_volatility)
+
+	#add up each metric over the bars, the cumulative sum keeps the same order of additions as a loop
+	metrics = []
+	for values in (percent_trend, percent_volatility, vol_change_current, vol_trend_current):
+		values = np.nan_to_num(values, nan=0.0)
+
+		if (values.shape[-1]):
+			metrics.append(np.cumsum(values, axis=-1)[..., -1])
+		else:
+			metrics.append(np.zeros(values.shape[:-1]))
+
+	total_trend, total_volatility, vol_change, vol_trend = metrics
+	vol_change = vol_change.astype(int)
+
+	#return plain numbers for a single asset and arrays for a universe of assets
+	if (opens.ndim == 1):
+		return float(total_trend), float(total_volatility), int(vol_change), float(vol_trend)
+
+	return total_trend, total_volatility, vol_change, vol_trend
+
+#an organized class for the trend and volatility metrics of the last bars of an asset, the same metrics as barMetrics
+class RollingMetrics:
+	'''
+	each bar adds its trend, volatility and volatility trend to running sums and the bar that
+	falls out of the window takes them away again. the volatility change is a sum of signs:
+	the first bar is compared to zero and every other bar to the bar before it, so evicting
+	the first bar swaps two signs for one. the running sums are added up from scratch once
+	every window so rounding errors do not build up
+	'''
+	#initialization of the metrics with the amount of bars to keep
+	def __init__(self, window=60):
+		self.window = window
+
+		#the trend, volatility and volatility trend of each bar in the window
+		self.bars = deque()
+
+		#the running sums of the metrics
+		self.trend = 0.0
+		self.volatility = 0.0
+		self.vol_change = 0
+		self.vol_trend = 0.0
+
+		#the amount of bars evicted since the sums were last added up from scratch
+		self.evicted = 0
+
+	#returns the amount of bars in the window
+	def __len__(self):
+		return len(self.bars)
+
+	#a function to add the next bar to the window, evicting the oldest bar if the window is full
+	def update(self, bar):
+		opens = barValue(bar, "o")
+		highs = barValue(bar, "h")
+		lows = barValue(bar, "l")
+		closes = barValue(bar, "c")
+		vws = barValue(bar, "vw")
+
+		#calculate the metrics of this bar the same way as barMetrics
+		percent_trend = ((closes - opens)*100) / vws
+		percent_volatility = (((highs - vws)*100) / vws) + (((vws - lows)*100) / vws)
+		vol_trend_current = (highs - vws) - (vws - lows)
+
+		#compare the volatility to the previous bar (the first bar is compared to zero)
+		previous = self.bars[-1][1] if self.bars else 0.0
+		self.vol_change += sign(percent_volatility - previous)
+
+		self.bars.append((percent_trend, percent_volatility, vol_trend_current))
+		self.trend += percent_trend
+		self.volatility += percent_volatility
+		self.vol_trend += vol_trend_current
+
+		if (len(self.bars) > self.window):
+			self.evict()
+
+	#a function to take the oldest bar out of the window
+	def evict(self):
+		percent_trend, percent_volatility, vol_trend_current = self.bars.popleft()
+
+		self.trend -= percent_trend
+		self.volatility -= percent_volatility
+		self.vol_trend -= vol_trend_current
+
+		#the new first bar is compared to zero instead of to the evicted bar
+		self.vol_change -= sign(percent_volatility)
+		if (self.bars):
+			first = self.bars[0][1]
+			self.vol_change += sign(first) - sign(first - percent_volatility)
+
+		self.evicted += 1
+		if (self.evicted >= self.window):
+			self.resync()
+
+	#a function to add up the running sums from scratch, in bar order like barMetrics
+	def resync(self):
+		self.trend = 0.0
+		self.volatility = 0.0
+		self.vol_trend = 0.0
+
+		for percent_trend, percent_volatility, vol_trend_current in self.bars:
+			self.trend += percent_trend
+			self.volatility += percent_volatility
+			self.vol_trend += vol_trend_current
+
+		self.evicted = 0
+
+	#a function to add many bars in order
+	def extend(self, bars):
+		for bar in bars:
+			self.update(bar)
+
+	#returns the total trend, total volatility, volatility change and volatility trend of the window
+	def metrics(self):
+		return self.trend, self.volatility, self.vol_change, self.vol_trend
+
+#an organized class for keeping one object for every symbol on a live stream and handing each bar to the object of its symbol
+class SymbolBook:
+	'''
+	the objects are made the first time their symbol is used with make(symbol), which each kind
+	of book defines, and each must have an update(bar) function. bars are handed over under one
+	lock, since the stream and the threads of the trader can both add bars
+	'''
+	#initialization of an empty book
+	def __init__(self):
+		self.items = {}
+
+		#a lock so bars from different threads do not interleave
+		self.lock = threading.Lock()
+
+	#checks to see if a symbol has any bars
+	def __contains__(self, symbol):
+		return symbol in self.items
+
+	#returns the object of a new symbol
+	def make(self, symbol):
+		raise NotImplementedError
+
+	#returns the object of a symbol, making it the first time the symbol is used
+	def get(self, symbol):
+		item = self.items.get(symbol)
+
+		if (item is None):
+			item = self.items.setdefault(symbol, self.make(symbol))
+
+		return item
+
+	#a function to add a bar from the stream to the object of its symbol, returns what the object returns
+	def update(self, bar):
+		symbol = bar.get("symbol") if isinstance(bar, dict) else bar.symbol
+
+		with self.lock:
+			return self.get(symbol).update(bar)
+
+	#a function to replace the object of a symbol
+	def set(self, symbol, item):
+		with self.lock:
+			self.items[symbol] = item
+
+#an organized class for the rolling metrics of every symbol on a live stream
+class IndicatorBook(SymbolBook):
+	#initialization of the book with the amount of bars to keep for each symbol
+	def __init__(self, window=60):
+		super().__init__()
+		self.window = window
+
+		#the rolling metrics by symbol
+		self.indicators = self.items
+
+	#returns new rolling metrics for a symbol
+	def make(self, symbol):
+		return RollingMetrics(self.window)
+
+	#a function to fill the metrics of a symbol from historical bars so they are ready before the stream starts
+	def seed(self, symbol, bars):
+		indicator = RollingMetrics(self.window)
+		indicator.extend(bars)
+
+		self.set(symbol, indicator)
+
+	#returns the total trend, total volatility, volatility change and volatility trend of a symbol (None if there are no bars)
+	def metrics(self, symbol):
+		indicator = self.items.get(symbol)
+
+		return indicator.metrics() if indicator else None
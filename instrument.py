@@ -0,0 +1,299 @@
+'''
+This is a module to measure where the time of the trader and analyst goes, it costs nothing until it is enabled
+'''
+from collections.abc import Iterator
+import contextlib
+import functools
+import threading
+import inspect
+import atexit
+import json
+import math
+import time
+import csv
+
+#the amount of buckets in each histogram, bucket n holds calls that took less than 2^n microseconds (the last bucket holds the rest)
+BUCKETS = 32
+
+#an organized class for the count, total time and histogram of the calls to one function
+class CallStats:
+	def __init__(self, name):
+		self.name = name
+		self.count = 0
+		self.total = 0.0
+		self.min = math.inf
+		self.max = 0.0
+		self.errors = 0
+		self.buckets = [0]*BUCKETS
+
+	#a function to add the time of a call in seconds
+	def add(self, seconds, error=False):
+		self.count += 1
+		self.total += seconds
+		self.min = min(self.min, seconds)
+		self.max = max(self.max, seconds)
+		self.errors += error
+
+		microseconds = seconds * 1e6
+		bucket = int(math.log2(microseconds)) + 1 if microseconds >= 1 else 0
+		self.buckets[min(bucket, BUCKETS-1)] += 1
+
+	#returns the time in seconds that a fraction of the calls took less than (the upper edge of the bucket it falls in)
+	def percentile(self, fraction):
+		target = fraction * self.count
+		seen = 0
+
+		for bucket, amount in enumerate(self.buckets):
+			seen += amount
+			if (amount and seen >= target):
+				return min((2**bucket) / 1e6, self.max)
+
+		return self.max
+
+	#returns the numbers of the calls as a dictionary
+	def row(self):
+		return {
+			"name": self.name,
+			"count": self.count,
+			"errors": self.errors,
+			"total_s": self.total,
+			"mean_ms": (self.total / self.count)*1000 if self.count else 0.0,
+			"min_ms": self.min*1000 if self.count else 0.0,
+			"p50_ms": self.percentile(0.5)*1000,
+			"p99_ms": self.percentile(0.99)*1000,
+			"max_ms": self.max*1000,
+			"histogram_us": {("<" + str(2**bucket)): amount for bucket, amount in enumerate(self.buckets) if amount}
+		}
+
+#the stats of every function that has been timed, by name
+STATS = {}
+LOCK = threading.Lock()
+
+#the functions that were replaced when the instrumentation was enabled, so they can be put back
+PATCHED = []
+ENABLED = False
+EXIT_REPORT = False
+
+#a function to add the time of a call to the stats of a name
+def record(name, seconds, error=False):
+	with LOCK:
+		stats = STATS.get(name)
+		if (stats is None):
+			stats = STATS[name] = CallStats(name)
+
+		stats.add(seconds, error)
+
+#returns a context manager that times a block of code under a name, it does nothing while the instrumentation is disabled
+def timer(name):
+	if (not ENABLED):
+		return contextlib.nullcontext()
+
+	return timing(name)
+
+@contextlib.contextmanager
+def timing(name):
+	start = time.perf_counter()
+	error = False
+
+	try:
+		yield
+	except BaseException:
+		error = True
+		raise
+	finally:
+		record(name, time.perf_counter() - start, error)
+
+#a function to time the iteration of an iterator under a name, the time between items is not counted
+def timedIterator(name, iterator, elapsed=0.0):
+	error = False
+
+	try:
+		while True:
+			start = time.perf_counter()
+			try:
+				item = next(iterator)
+			except StopIteration:
+				elapsed += time.perf_counter() - start
+				return
+			elapsed += time.perf_counter() - start
+
+			yield item
+	except BaseException:
+		error = True
+		raise
+	finally:
+		record(name, elapsed, error)
+
+#a function to wrap a function so every call to it is timed under a name
+def timed(name, function):
+	if (inspect.iscoroutinefunction(function)):
+		@functools.wraps(function)
+		async def wrapper(*args, **kwargs):
+			with timing(name):
+				return await function(*args, **kwargs)
+	elif (inspect.isgeneratorfunction(function)):
+		@functools.wraps(function)
+		def wrapper(*args, **kwargs):
+			return timedIterator(name, function(*args, **kwargs))
+	else:
+		@functools.wraps(function)
+		def wrapper(*args, **kwargs):
+			with timing(name):
+				return function(*args, **kwargs)
+
+	wrapper.instrumented = True
+
+	return wrapper
+
+#an organized class for a client of the api where every call is timed, other attributes are passed through to the client
+class TimedClient:
+	def __init__(self, client, prefix="api"):
+		object.__setattr__(self, "client", client)
+		object.__setattr__(self, "prefix", prefix)
+		object.__setattr__(self, "wrappers", {})
+
+	def __getattr__(self, name):
+		attribute = getattr(self.client, name)
+
+		if (name.startswith("_") or not callable(attribute)):
+			return attribute
+
+		wrapper = self.wrappers.get(name)
+		if (wrapper is None):
+			wrapper = self.wrappers[name] = self.timedCall(self.prefix + "." + name, name)
+
+		return wrapper
+
+	def __setattr__(self, name, value):
+		setattr(self.client, name, value)
+
+	#a function to make a timed call to a function of the client, iterators that are returned are timed until they run out
+	def timedCall(self, name, attribute):
+		def wrapper(*args, **kwargs):
+			start = time.perf_counter()
+
+			try:
+				result = getattr(self.client, attribute)(*args, **kwargs)
+			except BaseException:
+				record(name, time.perf_counter() - start, True)
+				raise
+
+			if (isinstance(result, Iterator)):
+				return timedIterator(name, result, time.perf_counter() - start)
+
+			record(name, time.perf_counter() - start)
+
+			return result
+
+		return wrapper
+
+#a function to wrap the public functions of a class so every call is timed under the name of the class and function
+def instrumentClass(cls):
+	for name, attribute in list(vars(cls).items()):
+		if (name.startswith("_") or not inspect.isfunction(attribute) or getattr(attribute, "instrumented", False)):
+			continue
+
+		PATCHED.append((cls, name, attribute))
+		setattr(cls, name, timed(cls.__name__ + "." + name, attribute))
+
+#a function to time the api calls of every trader, by wrapping the client of the trader the first time it is used
+def instrumentTrader(cls):
+	original = cls.__dict__["alpaca"]
+
+	def alpaca(self):
+		client = original.fget(self)
+
+		if (not isinstance(client, TimedClient)):
+			client = TimedClient(client)
+			original.fset(self, client)
+
+		return client
+
+	PATCHED.append((cls, "alpaca", original))
+	cls.alpaca = property(alpaca, original.fset)
+
+#a function to start timing the public functions of the trader and analyst and the calls to the api, optionally printing a summary at exit
+def enable(classes=None, report=False):
+	global ENABLED, EXIT_REPORT
+
+	if (ENABLED):
+		return
+
+	#import the classes here so the modules are only loaded when the instrumentation is used
+	import trader
+	if (classes is None):
+		import analyst
+		classes = [trader.Trader, analyst.Analyst]
+
+	for cls in classes:
+		instrumentClass(cls)
+
+	instrumentTrader(trader.Trader)
+	ENABLED = True
+
+	if (report and not EXIT_REPORT):
+		atexit.register(printSummary)
+		EXIT_REPORT = True
+
+#a function to put back every function that was wrapped (the stats are kept)
+def disable():
+	global ENABLED
+
+	while PATCHED:
+		cls, name, attribute = PATCHED.pop()
+		setattr(cls, name, attribute)
+
+	ENABLED = False
+
+#a function to throw away the stats
+def reset():
+	with LOCK:
+		STATS.clear()
+
+#returns the stats of every timed function as a list of dictionaries, sorted by the total time
+def summary():
+	with LOCK:
+		rows = [stats.row() for stats in STATS.values()]
+
+	return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+#a function to print the stats of every timed function as a table
+def printSummary():
+	rows = summary()
+	if (not rows):
+		return
+
+	width = max(len(row["name"]) for row in rows)
+	print("*"*10)
+	print("Timing Summary:")
+	print("name".ljust(width), "count".rjust(8), "total_s".rjust(10), "mean_ms".rjust(10), "p50_ms".rjust(10), "p99_ms".rjust(10), "max_ms".rjust(10))
+
+	for row in rows:
+		print(
+			row["name"].ljust(width),
+			str(row["count"]).rjust(8),
+			("%.4f" % row["total_s"]).rjust(10),
+			("%.3f" % row["mean_ms"]).rjust(10),
+			("%.3f" % row["p50_ms"]).rjust(10),
+			("%.3f" % row["p99_ms"]).rjust(10),
+			("%.3f" % row["max_ms"]).rjust(10)
+		)
+
+	print("*"*10)
+	print()
+
+#a function to write the stats of every timed function to a json or csv file (by the extension of the path)
+def dump(path):
+	rows = summary()
+
+	if (str(path).endswith(".csv")):
+		with open(path, "w", newline="") as csvfile:
+			fields = [field for field in rows[0] if field != "histogram_us"] if rows else ["name"]
+			writer = csv.DictWriter(csvfile, fieldnames=fields, extrasaction="ignore")
+			writer.writeheader()
+			writer.writerows(rows)
+	else:
+		with open(path, "w") as jsonfile:
+			json.dump(rows, jsonfile, indent=4)
+
+	return path
@@ -0,0 +1,81 @@
+'''
+This is a module to measure how long the live stream event loop takes to get to its work
+'''
+from collections import deque
+import asyncio
+import time
+
+#an organized class for the most recent samples of a delay in seconds and a summary of them
+class LatencySamples:
+	#initialization of the samples with the most samples to keep
+	def __init__(self, size=4096):
+		self.samples = deque(maxlen=size)
+
+		#the amount of samples and the largest sample since the start (not only the ones kept)
+		self.count = 0
+		self.max = 0.0
+
+	#a function to add a sample
+	def add(self, seconds):
+		self.samples.append(seconds)
+		self.count += 1
+		self.max = max(self.max, seconds)
+
+	#returns the delay that a fraction of the kept samples are under
+	def percentile(self, fraction):
+		if (not self.samples):
+			return 0.0
+
+		ordered = sorted(self.samples)
+
+		return ordered[min(int(fraction*len(ordered)), len(ordered)-1)]
+
+	#returns a summary of the samples in milliseconds
+	def summary(self):
+		mean = (sum(self.samples) / len(self.samples)) if self.samples else 0.0
+
+		return {
+			"count": self.count,
+			"mean_ms": mean*1000,
+			"p50_ms": self.percentile(0.5)*1000,
+			"p99_ms": self.percentile(0.99)*1000,
+			"max_ms": self.max*1000
+		}
+
+#an organized class for measuring the lag of an event loop, the time a sleep takes past when it should have woken up
+class LoopMonitor:
+	#initialization of the monitor with the seconds between each measurement
+	def __init__(self, interval=0.05):
+		self.interval = interval
+		self.lag = LatencySamples()
+		self.task = None
+
+	#checks to see if the monitor is measuring
+	@property
+	def running(self):
+		return self.task is not None and not self.task.done()
+
+	#a function to start measuring the running event loop
+	def start(self):
+		if (not self.running):
+			self.task = asyncio.get_running_loop().create_task(self.measure())
+
+		return self.task
+
+	#a function to stop measuring
+	def stop(self):
+		if (self.task is not None):
+			self.task.cancel()
+			self.task = None
+
+	#a function to keep sleeping and record how late each sleep wakes up
+	async def measure(self):
+		while True:
+			start = time.perf_counter()
+			await asyncio.sleep(self.interval)
+
+			self.lag.add(max(time.perf_counter() - start - self.interval, 0.0))
+
+	#returns a summary of the lag of the event loop in milliseconds
+	def summary(self):
+		return self.lag.summary()
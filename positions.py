@@ -0,0 +1,163 @@
+'''
+This is a module to keep track of the positions of the account locally so they can be checked without asking the api
+'''
+import threading
+
+#a function to get a field from an object or a dictionary (the trade update stream sends orders as dictionaries)
+def field(item, name, default=None):
+	if (isinstance(item, dict)):
+		return item.get(name, default)
+
+	return getattr(item, name, default)
+
+#an organized class for a book of the positions held by the account
+class PositionBook:
+	#initialization of an empty book
+	def __init__(self):
+		#the positions by symbol, each with the quantity held, the cost basis and the asset class
+		self.positions = {}
+
+		#whether the book has been filled from the api and can be trusted
+		self.seeded = False
+
+		#the quantity of each order (by id) that has been added to the book, so a fill reported by both the order and the trade update stream is only added once
+		self.filled = {}
+
+		#a lock so fills from the stream and from orders do not interleave
+		self.lock = threading.Lock()
+
+	#a function to fill the book from a list of positions from the api
+	def seed(self, positions):
+		with self.lock:
+			self.positions = {}
+
+			for pos in positions:
+				self.positions[pos.symbol] = {
+					"symbol": pos.symbol,
+					"qty": float(pos.qty),
+					"cost": float(pos.cost_basis),
+					"asset_class": pos.asset_class
+				}
+
+			self.seeded = True
+
+	#a function to mark the book as out of date so it is filled from the api again
+	def invalidate(self):
+		with self.lock:
+			self.seeded = False
+
+	#checks to see if a symbol is held
+	def __contains__(self, symbol):
+		return symbol in self.positions
+
+	#returns the position of a symbol or None if it is not held
+	def get(self, symbol):
+		return self.positions.get(symbol)
+
+	#returns the quantity held of a symbol
+	def qty(self, symbol):
+		position = self.positions.get(symbol)
+
+		return position["qty"] if position else 0.0
+
+	#returns the symbols that are held, optionally only for one asset class
+	def symbols(self, asset_class=None):
+		return [symbol for symbol, position in list(self.positions.items()) if asset_class is None or position["asset_class"] == asset_class]
+
+	#returns the unrealized profit/loss of a position at a price
+	def unrealizedPL(self, symbol, price):
+		position = self.positions.get(symbol)
+
+		if (not position):
+			return 0.0
+
+		return (position["qty"] * float(price)) - position["cost"]
+
+	#a function to add a filled order to the book
+	def applyFill(self, symbol, side, qty, price, asset_class=None, position_qty=None):
+		qty = float(qty)
+		price = float(price)
+
+		with self.lock:
+			position = self.positions.get(symbol)
+			if (position is None):
+				position = {"symbol": symbol, "qty": 0.0, "cost": 0.0, "asset_class": asset_class}
+
+			if (side == "buy"):
+				position["qty"] = position["qty"] + qty
+				position["cost"] = position["cost"] + (qty * price)
+			elif (position["qty"] > 0):
+				#reduce the cost basis in proportion to the amount sold
+				sold = min(qty, position["qty"])
+				position["cost"] = position["cost"] - (position["cost"] * (sold / position["qty"]))
+				position["qty"] = position["qty"] - sold
+
+			self.setPosition(symbol, position, position_qty)
+
+	#a function to put a position back in the book with the quantity reported by the api trusted over the running total, the lock must be held
+	def setPosition(self, symbol, position, position_qty=None):
+		if (position_qty is not None):
+			position_qty = float(position_qty)
+			if (position["qty"] > 0 and position_qty > 0):
+				position["cost"] = position["cost"] * (position_qty / position["qty"])
+			position["qty"] = position_qty
+
+		#remove positions that have been sold completely
+		if (position["qty"] <= 1e-12):
+			self.positions.pop(symbol, None)
+		else:
+			self.positions[symbol] = position
+
+	#a function to add the part of an order that has filled since it was last added, the filled quantity is the total filled so far
+	def applyOrderFill(self, order_id, symbol, side, filled_qty, price, asset_class=None, position_qty=None):
+		filled_qty = float(filled_qty)
+
+		#take the new part of the fill under the lock so the same part is never taken twice
+		with self.lock:
+			new_qty = filled_qty - self.filled.get(order_id, 0.0)
+			if (new_qty <= 1e-12):
+				#the fill was already added, but the quantity held after fees is only known from the trade update stream
+				position = self.positions.get(symbol)
+				if (position is not None and position_qty is not None):
+					self.setPosition(symbol, position, position_qty)
+
+				return
+
+			self.filled[order_id] = filled_qty
+
+		self.applyFill(symbol, side, new_qty, price, asset_class, position_qty)
+
+	#a function to update the book from an event on the trade update stream
+	def applyTradeUpdate(self, update):
+		if (field(update, "event") not in ("fill", "partial_fill")):
+			return
+
+		order = field(update, "order", {})
+		order_id = field(order, "id")
+
+		#orders without an id can not be matched to the order that was sent, so the fill is added as it is
+		if (order_id is None):
+			self.applyFill(
+				field(order, "symbol"),
+				field(order, "side"),
+				field(update, "qty", field(order, "filled_qty")),
+				field(update, "price", field(order, "filled_avg_price")),
+				field(order, "asset_class"),
+				field(update, "position_qty")
+			)
+			return
+
+		#the total filled so far is on the order, or it is the quantity added before plus the quantity of this fill
+		filled_qty = field(order, "filled_qty")
+		if (filled_qty is None):
+			filled_qty = self.filled.get(order_id, 0.0) + float(field(update, "qty"))
+
+		self.applyOrderFill(
+			order_id,
+			field(order, "symbol"),
+			field(order, "side"),
+			filled_qty,
+			field(update, "price", field(order, "filled_avg_price")),
+			field(order, "asset_class"),
+			field(update, "position_qty")
+		)
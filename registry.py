@@ -0,0 +1,189 @@
+'''
+This is a module to keep the information of every asset and the members of each trading universe in a local file, so orders never wait on the api to look up an asset
+'''
+from types import SimpleNamespace
+import threading
+import atexit
+import time
+import json
+import os
+import atomicfile
+
+#a function to turn an asset from the api (or a simulated broker) into a dictionary that can be saved
+def assetInfo(asset):
+	#alpaca assets keep the fields from the api in a raw dictionary, other assets keep them as attributes
+	raw = getattr(asset, "_raw", None)
+
+	return dict(raw) if isinstance(raw, dict) else dict(vars(asset))
+
+#an organized class for the registry of asset information and universes
+class AssetRegistry:
+	'''
+	the assets are kept in memory as namespaces with the same fields as the assets from the api
+	(so getattr(asset, "class") and asset.fractionable keep working) and written to a json file
+	whenever they change. symbols that are not in the registry are looked up once and remembered.
+	a background thread can refresh the whole registry on a schedule, the old information is
+	kept until the new information has arrived
+	'''
+	#initialization of the registry with the path of the file to keep it in (None keeps it in memory only) and the age in seconds after which it is stale
+	def __init__(self, path="assets.json", max_age=60*60*24):
+		self.path = path
+		self.max_age = max_age
+
+		#the assets by symbol, the universes by name as {"updated": timestamp, "symbols": [...]} and when the assets were last refreshed
+		self.assets = {}
+		self.universes = {}
+		self.updated = 0.0
+
+		#whether there are changes that have not been written to the file yet
+		self.dirty = False
+
+		#a lock so the refresh thread and lookups do not change the registry at the same time
+		self.lock = threading.Lock()
+
+		#the threads that refresh parts of the registry on a schedule (by name) and the event that stops them
+		self.threads = {}
+		self.stopping = threading.Event()
+
+		self.load()
+
+		#write any changes that are left when the program ends
+		if (self.path is not None):
+			atexit.register(self.flush)
+
+	#returns the amount of assets in the registry
+	def __len__(self):
+		return len(self.assets)
+
+	#checks to see if a symbol is in the registry
+	def __contains__(self, symbol):
+		return symbol in self.assets
+
+	#a function to read the registry from its file
+	def load(self):
+		if (self.path is None or not os.path.exists(self.path)):
+			return
+
+		with open(self.path) as registry_file:
+			data = json.load(registry_file)
+
+		with self.lock:
+			self.assets = {symbol: SimpleNamespace(**info) for symbol, info in data.get("assets", {}).items()}
+			self.universes = data.get("universes", {})
+			self.updated = data.get("updated", 0.0)
+
+	#a function to write the registry to its file
+	def save(self):
+		if (self.path is None):
+			return
+
+		with self.lock:
+			self.dirty = False
+
+			data = {
+				"updated": self.updated,
+				"assets": {symbol: vars(asset) for symbol, asset in self.assets.items()},
+				"universes": self.universes
+			}
+
+			atomicfile.writeAtomic(self.path, json.dumps(data))
+
+	#a function to write the registry to its file only if it has changed since it was last written
+	def flush(self):
+		if (self.dirty):
+			self.save()
+
+	#checks to see if the assets have not been refreshed within the maximum age
+	def isStale(self):
+		return time.time() - self.updated > self.max_age
+
+	#returns the information of an asset (None if it is not in the registry)
+	def get(self, symbol):
+		return self.assets.get(symbol)
+
+	#a function to add assets from the api to the registry, returns the registry versions of them (when save is false the changes are only written by the next flush)
+	def add(self, assets, save=True):
+		entries = [SimpleNamespace(**assetInfo(asset)) for asset in assets]
+
+		with self.lock:
+			for entry in entries:
+				self.assets[entry.symbol] = entry
+
+			self.dirty = True
+
+		if (save):
+			self.save()
+
+		return entries
+
+	#a function to replace every asset in the registry with a new list of assets from the api
+	def replace(self, assets):
+		entries = {entry.symbol: entry for entry in [SimpleNamespace(**assetInfo(asset)) for asset in assets]}
+
+		with self.lock:
+			#assets that were looked up one at a time but are not in the list are kept
+			self.assets = dict(self.assets, **entries)
+			self.updated = time.time()
+
+		self.save()
+
+	#returns the symbols of a universe (None if the universe has not been stored)
+	def universe(self, name):
+		universe = self.universes.get(name)
+
+		return list(universe["symbols"]) if universe else None
+
+	#returns when a universe was last stored (0 if it has not been stored)
+	def universeUpdated(self, name):
+		universe = self.universes.get(name)
+
+		return universe["updated"] if universe else 0.0
+
+	#checks to see if a universe has not been stored within the maximum age
+	def isUniverseStale(self, name):
+		return time.time() - self.universeUpdated(name) > self.max_age
+
+	#a function to store the symbols of a universe
+	def setUniverse(self, name, symbols):
+		with self.lock:
+			self.universes[name] = {"updated": time.time(), "symbols": list(symbols)}
+
+		self.save()
+
+	#a function to start refreshing part of the registry in a background thread every interval of seconds, the first refresh runs now if that part is stale (updated returns when it was last refreshed, the assets by default)
+	def startRefresh(self, refresh, interval=None, name="assets", updated=None):
+		thread = self.threads.get(name)
+		if (thread is not None and thread.is_alive()):
+			return thread
+
+		interval = interval if interval else self.max_age
+		updated = updated if updated else (lambda: self.updated)
+		self.stopping.clear()
+
+		#a function to refresh the registry until it is stopped, errors are printed so one failed refresh does not end the schedule
+		def run():
+			age = time.time() - updated()
+			wait = 0 if age > self.max_age else max(interval - age, 0)
+
+			while (not self.stopping.wait(wait)):
+				try:
+					refresh()
+				except Exception as error:
+					print("Asset registry refresh of " + name + " failed:", error)
+
+				wait = interval
+
+		thread = threading.Thread(target=run, name="asset-registry-" + name, daemon=True)
+		self.threads[name] = thread
+		thread.start()
+
+		return thread
+
+	#a function to stop every refresh running in the background
+	def stopRefresh(self):
+		self.stopping.set()
+
+		for thread in list(self.threads.values()):
+			thread.join()
+
+		self.threads = {}
@@ -0,0 +1,163 @@
+'''
+This is a module to build bars of longer time frames (hours, days, weeks...) from stored or streamed bars of a shorter time frame
+'''
+import numpy as np
+import barstore
+import indicators
+import trader
+
+#the first monday after the start of unix time, weeks start on mondays like the bars from the api
+MONDAY = 4*trader.UNIT_SECONDS["day"]
+
+#a function to get the starting timestamp of the time frame bucket each timestamp falls in (all timestamps are UTC)
+def bucketStarts(timestamps, unit="hour", amount=1):
+	timestamps = np.asarray(timestamps, dtype=float)
+
+	#months and years follow the calendar, so they are found with numpy dates
+	if (unit in ("month", "year")):
+		code = "M" if unit == "month" else "Y"
+		periods = timestamps.astype("datetime64[s]").astype("datetime64[" + code + "]").astype(np.int64)
+		periods = (periods // amount) * amount
+
+		return periods.astype("datetime64[" + code + "]").astype("datetime64[s]").astype(np.int64).astype(float)
+
+	length = trader.UNIT_SECONDS[unit] * amount
+	origin = MONDAY if unit == "week" else 0
+
+	return (np.floor((timestamps - origin) / length) * length) + origin
+
+#a function to build bars of a longer time frame from columns of bars sorted by time, returns columns of the new bars
+def resampleColumns(columns, unit="hour", amount=1):
+	'''
+	the bars are grouped by the bucket of their timestamp and each group becomes one bar: the
+	first open, the highest high, the lowest low, the last close and the total volume. the
+	volume weighted price of a group is weighted by the volume of each bar (groups without any
+	volume use the plain average)
+	'''
+	timestamps = np.asarray(columns["t"], dtype=float)
+
+	if (not len(timestamps)):
+		return barstore.emptyColumns()
+
+	#find where each bucket starts in the sorted bars
+	buckets = bucketStarts(timestamps, unit, amount)
+	starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+	ends = np.concatenate((starts[1:], [len(timestamps)])) - 1
+
+	volumes = np.asarray(columns["v"], dtype=float)
+	vws = np.asarray(columns["vw"], dtype=float)
+
+	#weight the volume weighted price of each bar by its volume
+	volume = np.add.reduceat(volumes, starts)
+	weighted = np.add.reduceat(vws * volumes, starts)
+	average = np.add.reduceat(vws, starts) / np.diff(np.append(starts, len(timestamps)))
+
+	with np.errstate(divide="ignore", invalid="ignore"):
+		vw = np.where(volume > 0, weighted / volume, average)
+
+	return {
+		"t": buckets[starts],
+		"o": np.asarray(columns["o"], dtype=float)[starts],
+		"h": np.maximum.reduceat(np.asarray(columns["h"], dtype=float), starts),
+		"l": np.minimum.reduceat(np.asarray(columns["l"], dtype=float), starts),
+		"c": np.asarray(columns["c"], dtype=float)[ends],
+		"v": volume,
+		"vw": vw
+	}
+
+#an organized class for rolling finished bars of a shorter time frame into the current bar of a longer time frame as they stream in
+class BarAggregator:
+	#initialization of the aggregator with the time frame to build and an optional function to call with each finished bar
+	def __init__(self, unit="hour", amount=1, on_bar=None):
+		self.unit = unit
+		self.amount = amount
+		self.on_bar = on_bar
+
+		#the bar of the longer time frame that is being built (None until the first bar arrives)
+		self.bar = None
+
+		#the total of the volume weighted prices times the volumes, and of the plain volume weighted prices, in the current bar
+		self.weighted = 0.0
+		self.vw_sum = 0.0
+
+	#returns the starting timestamp of the bucket a timestamp falls in
+	def bucketStart(self, timestamp):
+		return float(bucketStarts([timestamp], self.unit, self.amount)[0])
+
+	#a function to add a finished bar, returns the bar of the longer time frame if this bar finished it (otherwise None)
+	def update(self, bar):
+		timestamp = barstore.timeValue(bar.get("t") if isinstance(bar, dict) else bar.t)
+		bucket = self.bucketStart(timestamp)
+
+		#bars from a bucket that is already finished are ignored
+		if (self.bar is not None and bucket < self.bar["t"]):
+			return None
+
+		finished = None
+		if (self.bar is not None and bucket > self.bar["t"]):
+			finished = self.finish()
+
+		opens = indicators.barValue(bar, "o")
+		highs = indicators.barValue(bar, "h")
+		lows = indicators.barValue(bar, "l")
+		closes = indicators.barValue(bar, "c")
+		volume = indicators.barValue(bar, "v")
+		vw = indicators.barValue(bar, "vw")
+
+		if (self.bar is None):
+			#start a new bar of the longer time frame
+			self.bar = {"t": bucket, "o": opens, "h": highs, "l": lows, "c": closes, "v": 0.0, "vw": vw, "count": 0}
+			self.weighted = 0.0
+			self.vw_sum = 0.0
+
+		current = self.bar
+		current["h"] = max(current["h"], highs)
+		current["l"] = min(current["l"], lows)
+		current["c"] = closes
+		current["v"] += volume
+		current["count"] += 1
+
+		#keep the volume weighted price weighted by volume (the plain average if there has been no volume)
+		self.weighted += vw * volume
+		self.vw_sum += vw
+		current["vw"] = (self.weighted / current["v"]) if current["v"] > 0 else (self.vw_sum / current["count"])
+
+		return finished
+
+	#a function to finish the current bar, returns it and calls the function for finished bars
+	def finish(self):
+		finished = self.bar
+		self.bar = None
+
+		if (finished is not None and self.on_bar is not None):
+			self.on_bar(finished)
+
+		return finished
+
+	#returns a copy of the bar that is being built (None if there is none)
+	def current(self):
+		return dict(self.bar) if self.bar is not None else None
+
+#an organized class for the aggregators of every symbol on a live stream
+class AggregatorBook(indicators.SymbolBook):
+	#initialization of the book with the time frame to build and an optional function to call with each (symbol, finished bar)
+	def __init__(self, unit="hour", amount=1, on_bar=None):
+		super().__init__()
+		self.unit = unit
+		self.amount = amount
+		self.on_bar = on_bar
+
+		#the aggregators by symbol
+		self.aggregators = self.items
+
+	#returns a new aggregator for a symbol, which calls the function for finished bars with the symbol
+	def make(self, symbol):
+		on_bar = (lambda bar: self.on_bar(symbol, bar)) if self.on_bar else None
+
+		return BarAggregator(self.unit, self.amount, on_bar)
+
+	#returns the bar that is being built for a symbol (None if there is none)
+	def current(self, symbol):
+		aggregator = self.items.get(symbol)
+
+		return aggregator.current() if aggregator else None
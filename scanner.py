@@ -0,0 +1,114 @@
+'''
+This is a module to rank a whole universe of assets by their trend and volatility metrics while the market data is still arriving
+'''
+from datetime import datetime
+import heapq
+import barstore
+import indicators
+
+#the metrics the scanner ranks the assets by, in the order indicators.barMetrics returns them
+METRICS = ("trend", "vol", "vol_change", "vol_trend")
+
+#an organized class for keeping the k highest and k lowest values of a metric
+class TopK:
+	def __init__(self, k=10):
+		self.k = k
+
+		#heaps of (value, symbol), the highest values are kept in a min heap and the lowest values as negatives
+		self.highest = []
+		self.lowest = []
+
+	#a function to add the value of a symbol
+	def add(self, symbol, value):
+		if (len(self.highest) < self.k):
+			heapq.heappush(self.highest, (value, symbol))
+		elif (value > self.highest[0][0]):
+			heapq.heapreplace(self.highest, (value, symbol))
+
+		if (len(self.lowest) < self.k):
+			heapq.heappush(self.lowest, (-value, symbol))
+		elif (-value > self.lowest[0][0]):
+			heapq.heapreplace(self.lowest, (-value, symbol))
+
+	#returns the (symbol, value) pairs of the highest values, from the highest down
+	def top(self):
+		return [(symbol, value) for value, symbol in sorted(self.highest, reverse=True)]
+
+	#returns the (symbol, value) pairs of the lowest values, from the lowest up
+	def bottom(self):
+		return [(symbol, -value) for value, symbol in sorted(self.lowest, reverse=True)]
+
+#an organized class for scanning a universe of assets and ranking them by each metric
+class Scanner:
+	'''
+	the bars of every asset are requested at the same time and handled in the order the
+	requests finish. every batch of finished assets is stacked into (symbols x bars) arrays
+	so the metrics of the whole batch come from one call to indicators.barMetrics, then each
+	metric is added to a heap of the k highest and k lowest values. a ranking is yielded
+	after each batch, so the leaders can be read before the scan is finished
+	'''
+	#initialization of the scanner with the trader to get bars with, the amount of assets to rank and the amount of simultaneous requests
+	def __init__(self, trader, k=10, concurrency=32, batch=32):
+		self.trader = trader
+		self.k = k
+		self.concurrency = concurrency
+		self.batch = batch
+
+	#a function to scan a universe of assets, yielding the ranking so far after each batch of assets
+	def iterScan(self, symbols, unit="hour", timeamount=1, timestart=datetime.now()):
+		symbols = list(symbols)
+		rankings = {metric: TopK(self.k) for metric in METRICS}
+		values = {metric: {} for metric in METRICS}
+		errors = {}
+		batch = []
+		done = 0
+
+		#a function to add the metrics of a batch of assets to the rankings
+		def addBatch(batch):
+			names = [symbol for symbol, columns in batch]
+			metrics = indicators.barMetrics(barstore.stackColumns([columns for symbol, columns in batch]))
+
+			for metric, metric_values in zip(METRICS, metrics):
+				for symbol, value in zip(names, metric_values.tolist()):
+					rankings[metric].add(symbol, value)
+					values[metric][symbol] = value
+
+		bars = self.trader.iterBarsMany(symbols, unit, timeamount, timestart, self.concurrency, errors)
+
+		for symbol, symbol_bars in bars:
+			#assets without any bars in the time frame are left out of the rankings
+			columns = barstore.barsToColumns(symbol_bars)
+			if (len(columns["t"])):
+				batch.append((symbol, columns))
+
+			done += 1
+			if (len(batch) >= self.batch):
+				addBatch(batch)
+				batch = []
+
+				yield self.ranking(rankings, values, errors, done, len(symbols))
+
+		if (batch):
+			addBatch(batch)
+
+		yield self.ranking(rankings, values, errors, len(symbols), len(symbols))
+
+	#returns a ranking of the assets scanned so far
+	def ranking(self, rankings, values, errors, done, total):
+		return {
+			"done": done,
+			"total": total,
+			"top": {metric: rankings[metric].top() for metric in METRICS},
+			"bottom": {metric: rankings[metric].bottom() for metric in METRICS},
+			"values": {metric: dict(metric_values) for metric, metric_values in values.items()},
+			"errors": {symbol: str(error) for symbol, error in errors.items()}
+		}
+
+	#a function to scan a universe of assets and return the final ranking
+	def scan(self, symbols, unit="hour", timeamount=1, timestart=datetime.now()):
+		ranking = None
+
+		for ranking in self.iterScan(symbols, unit, timeamount, timestart):
+			pass
+
+		return ranking
@@ -0,0 +1,177 @@
+'''
+This is a module to find the strongest cycles in series of market data with a periodogram and fit sine waves to them by least squares
+'''
+import numpy as np
+
+#the smallest amount of bars a series needs to have a cycle fitted to it
+MIN_BARS = 4
+
+#a function to take the straight line of best fit out of the series along the last axis, returns the series without the line, the intercepts and the slopes
+def detrend(values):
+	values = np.asarray(values, dtype=float)
+	length = values.shape[-1]
+
+	#the line of best fit has a closed form when the bars are evenly spaced
+	places = np.arange(length) - ((length - 1) / 2)
+	means = values.mean(axis=-1)
+	slopes = (values @ places) / max(float(places @ places), 1.0)
+
+	#the intercept is the value of the line at the first bar
+	intercepts = means - (slopes * ((length - 1) / 2))
+
+	return values - means[..., None] - (slopes[..., None] * places), intercepts, slopes
+
+#a function to get the periodogram of series along the last axis, returns the frequencies (cycles per bar) and the power at each one, without the zero frequency
+def periodogram(values, padding=4):
+	values = np.asarray(values, dtype=float)
+	length = values.shape[-1]
+
+	#the series are padded with zeros to a power of two of at least padding times their length, so the frequencies are closer together than one cycle per series
+	size = 1 << int(np.ceil(np.log2(max(length*padding, 2))))
+
+	#the power is scaled so a sine wave of amplitude a has a peak of a^2 / 2 (its mean square)
+	transform = np.fft.rfft(values, n=size, axis=-1)
+	power = (2*np.square(np.abs(transform))) / (length*length)
+
+	return np.fft.rfftfreq(size)[1:], power[..., 1:]
+
+#a function to find the strongest peaks of periodograms, returns the frequencies (cycles per bar) of the peaks as an array of (... x count), with nan where there are fewer peaks
+def dominantFrequencies(frequencies, power, count=3):
+	power = np.asarray(power, dtype=float)
+
+	#a peak is a frequency with at least as much power as the frequencies next to it
+	padded = np.pad(power, [(0, 0)]*(power.ndim-1) + [(1, 1)], constant_values=-np.inf)
+	peaks = (power >= padded[..., :-2]) & (power >= padded[..., 2:]) & (power > 0)
+	ranked = np.where(peaks, power, -np.inf)
+
+	#the places of the strongest peaks, strongest first
+	count = min(count, power.shape[-1])
+	places = np.argsort(-ranked, axis=-1, kind="stable")[..., :count]
+	found = np.take_along_axis(peaks, places, axis=-1)
+
+	#move each peak between frequencies with the parabola through the log power around it
+	logs = np.log(np.maximum(padded, 1e-300))
+	left = np.take_along_axis(logs, places, axis=-1)
+	middle = np.take_along_axis(logs, places+1, axis=-1)
+	right = np.take_along_axis(logs, places+2, axis=-1)
+
+	with np.errstate(divide="ignore", invalid="ignore"):
+		curve = left - (2*middle) + right
+		shift = np.where(curve < 0, (0.5*(left - right)) / curve, 0.0)
+
+	#peaks at the edges of the periodogram are not moved
+	edges = (places == 0) | (places == power.shape[-1]-1)
+	shift = np.where(edges | ~np.isfinite(shift), 0.0, np.clip(shift, -0.5, 0.5))
+
+	step = frequencies[1] - frequencies[0] if len(frequencies) > 1 else 0.0
+	fitted = frequencies[places] + (shift*step)
+
+	return np.where(found, fitted, np.nan)
+
+#a function to fit a line plus a sine wave at each given frequency to series along the last axis by least squares, many series are fitted at once
+def fitSinusoids(values, frequencies):
+	'''
+	each series is fitted with intercept + slope*t + the sum of a*cos(2 pi f t) + b*sin(2 pi f t)
+	over its frequencies (nan frequencies are left out of the fit). the normal equations of every
+	series are stacked and solved together. returns the intercepts, slopes, amplitudes and phases
+	of the waves (a wave is amplitude * sin(2 pi f t + phase)) and the root mean square of what the
+	fit does not explain
+	'''
+	values = np.asarray(values, dtype=float)
+	frequencies = np.asarray(frequencies, dtype=float)
+	length = values.shape[-1]
+	count = frequencies.shape[-1]
+
+	#build the columns of the fit for every series: the constant, the line and a cosine and sine for each frequency
+	places = np.arange(length, dtype=float)
+	used = np.isfinite(frequencies)
+	angles = 2*np.pi*np.where(used, frequencies, 0.0)[..., :, None]*places
+
+	design = np.empty(values.shape[:-1] + (length, 2 + (2*count)))
+	design[..., 0] = 1.0
+	design[..., 1] = places
+	design[..., 2::2] = np.swapaxes(np.cos(angles) * used[..., None], -1, -2)
+	design[..., 3::2] = np.swapaxes(np.sin(angles) * used[..., None], -1, -2)
+
+	#solve the normal equations of every series at once, the columns of unused frequencies are kept at zero by the identity
+	normal = np.swapaxes(design, -1, -2) @ design
+	target = (np.swapaxes(design, -1, -2) @ values[..., None])[..., 0]
+
+	unused = np.repeat(~used, 2, axis=-1)
+	diagonal = np.concatenate((np.zeros(values.shape[:-1] + (2,), dtype=bool), unused), axis=-1)
+	normal = normal + (np.eye(normal.shape[-1]) * diagonal[..., None])
+
+	#a small ridge keeps the equations solvable when two frequencies are almost the same
+	normal = normal + (np.eye(normal.shape[-1]) * (1e-12 * np.diagonal(normal, axis1=-2, axis2=-1)[..., None, :]))
+	coefficients = np.linalg.solve(normal, target[..., None])[..., 0]
+
+	residual = values - (design @ coefficients[..., None])[..., 0]
+
+	#a*cos + b*sin is the same as amplitude*sin(angle + phase) with amplitude = sqrt(a^2 + b^2) and phase = atan2(a, b)
+	cosines = coefficients[..., 2::2]
+	sines = coefficients[..., 3::2]
+
+	return {
+		"intercepts": coefficients[..., 0],
+		"slopes": coefficients[..., 1],
+		"amplitudes": np.where(used, np.hypot(cosines, sines), np.nan),
+		"phases": np.where(used, np.arctan2(cosines, sines), np.nan),
+		"residuals": np.sqrt(np.mean(np.square(residual), axis=-1))
+	}
+
+#a function to find and fit the strongest cycles of series along the last axis, works on a series or a (symbols x bars) array
+def spectralFit(values, components=3, padding=4):
+	values = np.asarray(values, dtype=float)
+
+	#the periodogram is taken of the series without their line of best fit, so a trend does not show up as a slow cycle
+	residual, intercepts, slopes = detrend(values)
+	frequencies, power = periodogram(residual, padding)
+
+	found = dominantFrequencies(frequencies, power, components)
+	fit = fitSinusoids(values, found)
+	fit["frequencies"] = found
+
+	return fit
+
+#a function to turn the fitted cycles of a series into wave dictionaries like the segment waves of the analyst
+def spectralWaves(values, components=3, bar_period=50, fit=None):
+	'''
+	each fitted cycle becomes a wave with its amplitude, phase and frequency. the frequency is in
+	radians per x value of the graph (each bar covers bar_period x values) so the wave can be drawn
+	as amplitude * sin(frequency*x + phase) + intercept. the intercept is the mean of the series and
+	the order is the places of the bars where the cycle is at least as far from zero as its typical
+	(root mean square) value, which is where the cycle shows itself. a fit of the series that was
+	already made (such as one row of a fit of many series) can be given so it is not fitted again
+	'''
+	values = np.asarray(values, dtype=float)
+
+	if (values.shape[-1] < MIN_BARS):
+		return []
+
+	if (fit is None):
+		fit = spectralFit(values, components)
+
+	intercept = float(values.mean())
+	places = np.arange(values.shape[-1])
+
+	waves = []
+	for frequency, amplitude, phase in zip(fit["frequencies"], fit["amplitudes"], fit["phases"]):
+		if (not np.isfinite(frequency)):
+			continue
+
+		#find the bars where the cycle is strong
+		cycle = np.sin((2*np.pi*frequency*places) + phase)
+		order = np.flatnonzero(np.abs(cycle) >= np.sqrt(0.5))
+
+		waves.append({
+			"amplitude": float(amplitude),
+			"intercept": intercept,
+			"order": order.tolist() if len(order) else places.tolist(),
+			"bar_period": bar_period,
+			"frequency": float((2*np.pi*frequency) / bar_period),
+			"phase": float(phase),
+			"period": float(1 / frequency),
+			"power": float(amplitude*amplitude / 2)
+		})
+
+	return waves
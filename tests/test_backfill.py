@@ -0,0 +1,78 @@
+import time
+import pytest
+import analyst
+import backfill
+import barstore
+import fakealpaca
+import trader
+
+#a function to make a trader and a store for a backfill
+def makeBackfill(tmp_path, client):
+	store = barstore.BarStore(str(tmp_path / "bars"))
+
+	return backfill.Backfill(trader.Trader(client=client, quiet=True), store), store
+
+#chunks line up on the same grid whatever time the backfill starts at
+def test_chunks_are_aligned():
+	hour = trader.UNIT_SECONDS["hour"]
+	first = backfill.timeChunks(100*hour + 17, 130*hour, "hour", 10)
+	second = backfill.timeChunks(105*hour + 3, 140*hour, "hour", 10)
+
+	assert [chunk[0] for chunk in first[1:]] == [110*hour, 120*hour, 130*hour]
+	assert [chunk[0] for chunk in second[1:]] == [110*hour, 120*hour, 130*hour, 140*hour]
+	assert all(chunk[1] + 1 == following[0] for chunk, following in zip(first, first[1:]))
+
+#a second backfill that starts later only asks for the time that is not stored yet
+def test_resume_with_a_later_end(tmp_path):
+	hour = trader.UNIT_SECONDS["hour"]
+	client = fakealpaca.FakeREST(now=1.7e9)
+	job, store = makeBackfill(tmp_path, client)
+
+	job.run(["BTCUSD"], "hour", 1.7e9 - (100*hour) + 0.5, 1.7e9 - (10*hour) + 0.25, chunk_bars=24)
+	stored = len(store.columns("BTCUSD", "hour")["t"])
+
+	#a new process with a later end time reads the checkpoint and only asks for the new bars
+	job, store = makeBackfill(tmp_path, client)
+	job.trader.getAssetClass("BTCUSD")
+	requests = client.requests
+	summary = job.run(["BTCUSD"], "hour", 1.7e9 - (100*hour) + 0.5, 1.7e9 + 0.75, chunk_bars=24)
+
+	columns = store.columns("BTCUSD", "hour")
+	assert summary["BTCUSD"]["error"] is None
+	assert client.requests - requests == 1
+	assert len(columns["t"]) == stored + 10
+	assert (columns["t"][1:] > columns["t"][:-1]).all()
+
+#the checkpoint log is merged when it is read and lines cut short by a crash are left out
+def test_checkpoint_log_is_merged(tmp_path):
+	client = fakealpaca.FakeREST(now=1.7e9)
+	job, store = makeBackfill(tmp_path, client)
+
+	job.markFinished("BTCUSD", "hour", (0, 99))
+	job.markFinished("BTCUSD", "hour", (100, 199))
+	job.markFinished("BTCUSD", "hour", (300, 399))
+
+	with open(job.checkpoint, "a") as checkpoint_file:
+		checkpoint_file.write('{"key": "BTCUSD/hour", "ran')
+
+	job, store = makeBackfill(tmp_path, client)
+
+	assert job.finished == {"BTCUSD/hour": [[0, 199], [300, 399]]}
+	assert job.missingRanges("BTCUSD", "hour", (150, 450)) == [(200, 299), (400, 450)]
+
+	with open(job.checkpoint) as checkpoint_file:
+		assert len(checkpoint_file.readlines()) == 2
+
+#a backfill without a start time is refused clearly and one without an end time runs up to now
+def test_default_times(tmp_path, monkeypatch):
+	monkeypatch.chdir(tmp_path)
+	hour = trader.UNIT_SECONDS["hour"]
+	app = analyst.Analyst(client=fakealpaca.FakeREST(), quiet=True)
+
+	with pytest.raises(ValueError):
+		app.backfillData(["BTCUSD"])
+
+	summary = app.backfillData(["BTCUSD"], timestart=time.time() - (10*hour))
+
+	assert summary["BTCUSD"]["error"] is None
+	assert summary["BTCUSD"]["bars"] >= 9
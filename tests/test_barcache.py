@@ -0,0 +1,19 @@
+from datetime import datetime
+import time
+import fakealpaca
+import trader
+
+#the cache returns every bar the api does whatever the local time zone is
+def test_cache_matches_api_outside_utc(monkeypatch):
+	monkeypatch.setenv("TZ", "America/New_York")
+	time.tzset()
+
+	try:
+		client = trader.Trader(client=fakealpaca.FakeREST(now=1.7e9), quiet=True)
+		start, end = client.getTimeRange("hour", 8, datetime.fromtimestamp(1.7e9))
+
+		assert trader.isoTime(1.7e9) == "2023-11-14T22:13:20Z"
+		assert len(client.getStockBars("AAPL", "hour", 8, datetime.fromtimestamp(1.7e9))) == len(client.fetchStockBars("AAPL", "hour", start, end)) == 8
+	finally:
+		monkeypatch.delenv("TZ")
+		time.tzset()
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+import barcodec
+import barstore
+
+#a function to make random bars with a price around a level
+def makeColumns(count, price=100.0, volume=1000.0, seed=1):
+	rng = np.random.default_rng(seed)
+	close = price * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+
+	return {
+		"t": 1.7e9 + (60.0*np.arange(count)),
+		"o": close * (1 + rng.normal(0, 0.001, count)),
+		"h": close * 1.01,
+		"l": close * 0.99,
+		"c": close,
+		"v": volume * rng.random(count),
+		"vw": close * (1 + rng.normal(0, 0.001, count))
+	}
+
+#a function to check that decoded columns are within the precision the codec keeps
+def assertClose(decoded, columns):
+	for name in barstore.COLUMNS:
+		np.testing.assert_allclose(decoded[name], columns[name], rtol=1e-7, atol=0.5e-4 if name == "v" else 0)
+
+#bars come back out of an archive the way they went in, across several blocks
+def test_round_trip():
+	columns = makeColumns(1000)
+	decoded = barcodec.ArchiveReader(barcodec.encodeColumns(columns, block_size=128)).columns()
+
+	assertClose(decoded, columns)
+	np.testing.assert_array_equal(decoded["t"], columns["t"])
+
+#prices far below a cent keep their significant digits
+def test_round_trip_small_prices():
+	columns = makeColumns(300, price=3e-8)
+	decoded = barcodec.ArchiveReader(barcodec.encodeColumns(columns, block_size=100)).columns()
+
+	assertClose(decoded, columns)
+
+#values too large to scale to 64 bit integers and values that are not finite are kept exactly as floats
+def test_round_trip_large_and_missing_values():
+	columns = makeColumns(300, volume=1e16)
+	columns["c"][5] = np.nan
+	columns["o"][250] = np.inf
+	decoded = barcodec.ArchiveReader(barcodec.encodeColumns(columns, block_size=100)).columns()
+
+	np.testing.assert_array_equal(decoded["v"], columns["v"])
+	np.testing.assert_array_equal(decoded["c"][:100], columns["c"][:100])
+	assert decoded["o"][250] == np.inf
+	np.testing.assert_allclose(decoded["c"][100:], columns["c"][100:], rtol=1e-7)
+
+#a query only returns the bars between its times, including bars that start and end in the middle of blocks
+def test_partial_query():
+	columns = makeColumns(1000)
+	reader = barcodec.ArchiveReader(barcodec.encodeColumns(columns, block_size=128))
+
+	start, end = columns["t"][200] - 30, columns["t"][517]
+	queried = reader.query(start, end)
+	inside = (columns["t"] >= start) & (columns["t"] <= end)
+
+	assertClose(queried, {name: column[inside] for name, column in columns.items()})
+	assert len(reader.query(columns["t"][-1] + 1)["t"]) == 0
+	assert len(reader.query(end=columns["t"][0] - 1)["t"]) == 0
+
+#archives that are damaged raise a value error instead of returning wrong bars
+def test_corrupt_input():
+	archive = barcodec.encodeColumns(makeColumns(500), block_size=128)
+
+	with pytest.raises(ValueError):
+		barcodec.ArchiveReader(b"NOPE" + archive[4:])
+	with pytest.raises(ValueError):
+		barcodec.ArchiveReader(archive[:-3])
+	with pytest.raises(ValueError):
+		barcodec.ArchiveReader(archive[:2])
+
+	#flip bytes in the middle of the first block
+	damaged = bytearray(archive)
+	reader = barcodec.ArchiveReader(archive)
+	middle = reader.offsets[0] + (reader.lengths[0] // 2)
+	damaged[middle:middle+8] = bytes(8)
+
+	with pytest.raises(ValueError):
+		barcodec.ArchiveReader(bytes(damaged)).columns()
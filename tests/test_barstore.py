@@ -0,0 +1,59 @@
+import numpy as np
+import barstore
+
+#a function to make columns of bars with timestamps and opening prices
+def makeColumns(timestamps, opens):
+	columns = {name: np.asarray(opens, dtype=float) for name in barstore.COLUMNS}
+	columns["t"] = np.asarray(timestamps, dtype=float)
+
+	return columns
+
+#an append that was interrupted after writing only some of the columns is cut off before the next append
+def test_partial_append_is_repaired(tmp_path):
+	store = barstore.BarStore(str(tmp_path))
+	store.append("BTCUSD", "hour", makeColumns([1, 2, 3], [10, 20, 30]))
+
+	#simulate a crash after the timestamps of the next append were written but before the prices were
+	with open(store.columnPath("BTCUSD", "hour", "t"), "ab") as column_file:
+		column_file.write(np.array([4, 5], dtype=barstore.DTYPE).tobytes())
+
+	assert len(store.columns("BTCUSD", "hour")["t"]) == 3
+
+	store.append("BTCUSD", "hour", makeColumns([4, 5], [40, 50]))
+	columns = store.columns("BTCUSD", "hour")
+
+	assert columns["t"].tolist() == [1, 2, 3, 4, 5]
+	assert columns["o"].tolist() == [10, 20, 30, 40, 50]
+
+#a column cut part of the way through a number is cut back to whole bars
+def test_torn_value_is_repaired(tmp_path):
+	store = barstore.BarStore(str(tmp_path))
+	store.append("AAPL", "day", makeColumns([1, 2], [10, 20]))
+
+	with open(store.columnPath("AAPL", "day", "c"), "ab") as column_file:
+		column_file.write(b"\x00\x01\x02")
+
+	store.append("AAPL", "day", makeColumns([3], [30]))
+	columns = store.columns("AAPL", "day")
+
+	assert columns["t"].tolist() == [1, 2, 3]
+	assert columns["c"].tolist() == [10, 20, 30]
+
+#the maps of the files that are cut are forgotten before the files are cut, so they are never handed out again
+def test_repair_forgets_maps(tmp_path):
+	store = barstore.BarStore(str(tmp_path))
+	store.append("BTCUSD", "hour", makeColumns([1, 2, 3], [10, 20, 30]))
+
+	with open(store.columnPath("BTCUSD", "hour", "t"), "ab") as column_file:
+		column_file.write(np.array([4, 5], dtype=barstore.DTYPE).tobytes())
+
+	store.columns("BTCUSD", "hour")
+	stale = store.maps[("BTCUSD", "hour", "t")][1]
+	kept = store.maps[("BTCUSD", "hour", "o")][1]
+
+	store.repair("BTCUSD", "hour", 3)
+
+	assert ("BTCUSD", "hour", "t") not in store.maps
+	assert store.maps[("BTCUSD", "hour", "o")][1] is kept
+	assert store.mapColumn("BTCUSD", "hour", "t") is not stale
+	assert len(store.mapColumn("BTCUSD", "hour", "t")) == 3
@@ -0,0 +1,65 @@
+import random
+import numpy as np
+import cascade
+
+#the board keeps its shape of (9 x 9) lists of the possible states of each cell
+def test_board_shape():
+	algo = cascade.Cascade()
+
+	assert algo.board == [[[1, 2, 3, 4, 5, 6, 7, 8, 9]]*9]*9
+
+	random.seed(3)
+	board = algo.randomCollapse()
+
+	assert len(board) == 9 and all(len(subgrid) == 9 for subgrid in board)
+	assert all(len(states) == 1 for subgrid in board for states in subgrid)
+	assert [states[0] for subgrid in board for states in subgrid] == algo.boardValues()
+
+#setting the board from lists of states changes the masks the collapse works on
+def test_board_setter():
+	algo = cascade.Cascade()
+	board = algo.createBoard()
+	board[4][2] = [7]
+	board[0][0] = [2, 5]
+	algo.board = board
+
+	assert algo.masks[(4*9) + 2] == 1 << 6
+	assert algo.masks[0] == (1 << 1) | (1 << 4)
+	assert algo.board == board
+
+#generate returns the values of each board like boardValues and follows the seed of the random module
+def test_generate():
+	random.seed(5)
+	boards = cascade.Cascade.generate(20)
+	random.seed(5)
+
+	assert boards == cascade.Cascade.generate(20)
+	assert isinstance(boards, list) and len(boards) == 20
+	assert all(isinstance(board, list) and len(board) == 81 for board in boards)
+	assert np.isin(np.array(boards), range(1, 10)).all()
+
+#a function to get which subgrids of each board have a number more than once, as a (boards x 9) array
+def invalidSubgrids(values):
+	subgrids = np.sort(np.asarray(values).reshape(-1, 9, 9), axis=2)
+
+	return (np.diff(subgrids, axis=2) == 0).any(axis=2)
+
+#boards collapsed in a batch come out like boards collapsed one at a time
+def test_batch_matches_scalar_distribution():
+	random.seed(1)
+	scalar = []
+	for x in range(1500):
+		algo = cascade.Cascade()
+		algo.randomCollapse()
+		scalar.append(algo.boardValues())
+
+	scalar = invalidSubgrids(scalar)
+	batch = invalidSubgrids(cascade.collapseBoards(1500, 1))
+
+	#the rates of subgrids with repeated numbers are the same (they were about 0.26 against 0.22 when the batch kept every state of a cell that had none left)
+	assert abs(batch.mean() - scalar.mean()) < 0.015
+
+	#so are the shares of boards with each amount of those subgrids
+	scalar_shares = np.bincount(scalar.sum(axis=1), minlength=10) / len(scalar)
+	batch_shares = np.bincount(batch.sum(axis=1), minlength=10) / len(batch)
+	assert np.abs(scalar_shares - batch_shares).sum() < 0.12
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+import correlation
+
+#a function to make returns of assets that move partly together, with a few tied values
+def makeReturns(assets=6, count=80, seed=0):
+	rng = np.random.default_rng(seed)
+	market = rng.normal(0, 0.01, count)
+	returns = (rng.random((assets, 1)) * market) + rng.normal(0, 0.01, (assets, count))
+
+	return np.round(returns, 3)
+
+#the pearson matrix is the one from numpy
+def test_pearson_matches_numpy():
+	returns = makeReturns()
+
+	np.testing.assert_allclose(correlation.correlationMatrix(returns, "pearson"), np.corrcoef(returns), atol=1e-12)
+
+#the spearman matrix is the one from scipy, with the same average ranks for tied values
+def test_spearman_matches_scipy():
+	stats = pytest.importorskip("scipy.stats")
+	returns = makeReturns()
+
+	np.testing.assert_allclose(correlation.rankData(returns), stats.rankdata(returns, axis=-1))
+	np.testing.assert_allclose(correlation.correlationMatrix(returns, "spearman"), stats.spearmanr(returns, axis=1)[0], atol=1e-12)
+
+#every rolling matrix is the matrix of its own window
+def test_rolling_matrices():
+	returns = makeReturns(4, 50)
+	matrices = correlation.rollingMatrices(returns, 20, step=5)
+
+	assert matrices.shape == (7, 4, 4)
+	for x, matrix in enumerate(matrices):
+		np.testing.assert_allclose(matrix, np.corrcoef(returns[:, x*5:(x*5)+20]), atol=1e-12)
+
+#an unknown method is refused
+def test_unknown_method():
+	with pytest.raises(ValueError):
+		correlation.correlationMatrix(makeReturns(), "kendall")
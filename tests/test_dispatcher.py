@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+import asyncio
+import dispatcher
+
+#an organized class for a stream that only records what is subscribed
+class FakeStream:
+	#initialization of the stream
+	def __init__(self):
+		self.symbols = []
+
+	#a function to record a subscription to stock bars
+	def subscribe_bars(self, handler, *symbols):
+		self.symbols += symbols
+
+#a handler that falls behind has its oldest bars dropped and other symbols are handled in the meantime
+def test_drop_oldest():
+	handled = {"A": [], "B": []}
+
+	async def run():
+		release = asyncio.Event()
+
+		#a handler that waits until it is let go
+		async def slow(bar):
+			handled["A"].append(bar.t)
+			await release.wait()
+
+		#a handler that returns right away
+		async def fast(bar):
+			handled["B"].append(bar.t)
+
+		stream = FakeStream()
+		router = dispatcher.StreamDispatcher(stream, maxsize=2)
+		router.subscribeBars(slow, ["A"])
+		router.subscribeBars(fast, ["B"])
+
+		#the first bar is taken by the worker, which then waits in the handler
+		await router.dispatch(SimpleNamespace(symbol="A", t=1))
+		await asyncio.sleep(0)
+
+		#the queue only keeps the two newest of the bars that arrive while the handler waits
+		for t in range(2, 7):
+			await router.dispatch(SimpleNamespace(symbol="A", t=t))
+		await router.dispatch(SimpleNamespace(symbol="B", t=1))
+		await router.dispatch(SimpleNamespace(symbol="C", t=1))
+
+		assert router.depth("A") == 2
+		assert router.drops("A") == 3
+
+		#the other symbol does not wait for the slow one
+		await asyncio.sleep(0)
+		assert handled["B"] == [1]
+
+		release.set()
+		await router.join()
+
+		stats = router.stats()
+		router.stop()
+
+		return stream, stats
+
+	stream, stats = asyncio.run(run())
+
+	assert stream.symbols == ["A", "B"]
+	assert handled["A"] == [1, 5, 6]
+	assert stats["received"] == 7
+	assert stats["dropped"] == 3
+	assert stats["handled"] == 4
+	assert stats["max_depth"] == 2
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+import numpy as np
+import indicators
+
+#the loop that getAssetData used to run over the bars, kept as the reference for barMetrics
+def loopMetrics(bars):
+	total_trend = 0
+	total_volatility = 0
+
+	prev_volatility = 0
+	vol_change = 0
+
+	vol_trend = 0
+
+	for bar in bars:
+		trend = bar.c - bar.o
+		percent_trend = (trend*100) / bar.vw
+		total_trend = total_trend + percent_trend
+
+		percent_up = bar.h - bar.vw
+		percent_up = (percent_up*100) / bar.vw
+		percent_down = bar.vw - bar.l
+		percent_down = (percent_down*100) / bar.vw
+
+		vol_trend_current = (bar.h - bar.vw) - (bar.vw - bar.l)
+		vol_trend = vol_trend + vol_trend_current
+
+		percent_volatility = percent_up + percent_down
+
+		if (percent_volatility > prev_volatility):
+			vol_change = vol_change + 1
+		elif (percent_volatility < prev_volatility):
+			vol_change = vol_change - 1
+
+		total_volatility = total_volatility + percent_volatility
+		prev_volatility = percent_volatility
+
+	return total_trend, total_volatility, vol_change, vol_trend
+
+#a function to make random bars as columns
+def makeColumns(rng, count):
+	close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+	opens = close * (1 + rng.normal(0, 0.005, count))
+
+	return {
+		"o": opens,
+		"h": np.maximum(opens, close) * (1 + rng.random(count)*0.01),
+		"l": np.minimum(opens, close) * (1 - rng.random(count)*0.01),
+		"c": close,
+		"vw": (opens + close) / 2
+	}
+
+#a function to turn columns into bars like the ones from the api
+def columnBars(columns):
+	return [SimpleNamespace(**{name: float(columns[name][x]) for name in columns}) for x in range(len(columns["c"]))]
+
+#the metrics of a single asset are exactly the ones of the loop
+def test_bar_metrics_match_the_loop():
+	rng = np.random.default_rng(2)
+
+	for count in (0, 1, 2, 37, 500):
+		columns = makeColumns(rng, count)
+
+		assert indicators.barMetrics(columns) == loopMetrics(columnBars(columns))
+
+#the metrics of a universe padded with nan are exactly the ones of the loop over each asset's own bars
+def test_bar_metrics_match_the_loop_padded():
+	rng = np.random.default_rng(4)
+	counts = [50, 13, 0, 50, 1]
+	universe = [makeColumns(rng, count) for count in counts]
+
+	padded = {name: np.full((len(counts), max(counts)), np.nan) for name in universe[0]}
+	for row, columns in enumerate(universe):
+		for name in columns:
+			padded[name][row, :len(columns[name])] = columns[name]
+
+	metrics = indicators.barMetrics(padded)
+
+	for row, columns in enumerate(universe):
+		assert tuple(metric[row] for metric in metrics) == loopMetrics(columnBars(columns))
+
+#the rolling metrics of the last bars are the metrics of barMetrics over the same bars, before and after bars are evicted
+def test_rolling_metrics_match_bar_metrics():
+	rng = np.random.default_rng(6)
+	columns = makeColumns(rng, 400)
+	bars = columnBars(columns)
+	rolling = indicators.RollingMetrics(window=25)
+
+	for x, bar in enumerate(bars):
+		rolling.update(bar)
+
+		first = max(0, x + 1 - 25)
+		expected = indicators.barMetrics({name: column[first:x+1] for name, column in columns.items()})
+		trend, volatility, vol_change, vol_trend = rolling.metrics()
+
+		assert len(rolling) == x + 1 - first
+		assert vol_change == expected[2]
+		np.testing.assert_allclose((trend, volatility, vol_trend), (expected[0], expected[1], expected[3]), rtol=1e-9, atol=1e-9)
@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+import trader
+
+#every symbol of a plan is printed once, with its decision and the result of its order
+def test_plan_prints_each_symbol_once(capsys):
+	app = trader.Trader(client=object(), quiet=True)
+	app.submitOrder = lambda order: SimpleNamespace(side="buy", notional=order["notional"])
+
+	plan = app.planCascade(
+		[1, 9, 5],
+		["AAA", "BBB", "CCC"],
+		False,
+		100.0,
+		{"BBB": None},
+		lambda symbol, money: {"symbol": symbol, "notional": money},
+		lambda symbol: False
+	)
+	results = app.submitPlan(plan)
+	output = capsys.readouterr().out.splitlines()
+
+	assert [symbol for symbol, order in results] == ["AAA", "BBB", "CCC"]
+	assert [line for line in output if line.endswith(":")] == ["AAA:", "BBB:", "CCC:"]
+	assert output[:3] == ["AAA:", "Buying shares with alloted cash...", "buy"]
+	assert "Too little shares to sell, buying more shares..." in output
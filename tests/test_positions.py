@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+import positions
+
+#a function to make a trade update like the ones from the stream
+def tradeUpdate(event, order_id, filled_qty, qty, price=10.0, side="buy"):
+	order = {"id": order_id, "symbol": "BTCUSD", "side": side, "filled_qty": filled_qty, "filled_avg_price": price, "asset_class": "crypto"}
+
+	return {"event": event, "order": order, "qty": qty, "price": price}
+
+#a fill from the trade update stream that arrives before the order returns is only added once
+def test_fill_from_stream_and_order_is_added_once():
+	book = positions.PositionBook()
+
+	book.applyTradeUpdate(tradeUpdate("fill", "a", "2", "2"))
+	book.applyOrderFill("a", "BTCUSD", "buy", "2", "10", "crypto")
+
+	assert book.qty("BTCUSD") == 2
+	assert book.get("BTCUSD")["cost"] == 20
+
+#an order that returns filled before the trade update arrives is only added once
+def test_fill_from_order_and_stream_is_added_once():
+	book = positions.PositionBook()
+	order = SimpleNamespace(id="b", symbol="BTCUSD", side="buy", filled_qty="3", filled_avg_price="10")
+
+	book.applyOrderFill(order.id, order.symbol, order.side, order.filled_qty, order.filled_avg_price, "crypto")
+	book.applyTradeUpdate(tradeUpdate("fill", "b", "3", "3"))
+
+	assert book.qty("BTCUSD") == 3
+
+#partial fills add only the quantity that is new
+def test_partial_fills_add_the_new_quantity():
+	book = positions.PositionBook()
+
+	book.applyTradeUpdate(tradeUpdate("partial_fill", "c", "1", "1"))
+	book.applyTradeUpdate(tradeUpdate("partial_fill", "c", "1", "1"))
+	book.applyTradeUpdate(tradeUpdate("fill", "c", "4", "3"))
+
+	assert book.qty("BTCUSD") == 4
+
+#the quantity held after fees from the trade update stream is kept when the order already added the fill
+def test_position_qty_from_stream_after_order():
+	book = positions.PositionBook()
+
+	book.applyOrderFill("d", "BTCUSD", "buy", "1", "10", "crypto")
+	update = tradeUpdate("fill", "d", "1", "1")
+	update["position_qty"] = "0.9975"
+	book.applyTradeUpdate(update)
+
+	assert book.qty("BTCUSD") == 0.9975
+	assert abs(book.get("BTCUSD")["cost"] - 9.975) < 1e-9
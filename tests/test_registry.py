@@ -0,0 +1,62 @@
+import threading
+import time
+import fakealpaca
+import trader
+
+#a function to make a trader that refreshes its registry like one made with keys, with wikipedia replaced by a function that waits to be let go
+def makeTrader():
+	app = trader.Trader(client=fakealpaca.FakeREST(), quiet=True)
+	app.client_given = False
+
+	app.scrapes = []
+	app.release = threading.Event()
+
+	#a function to stand in for the wikipedia scrape
+	def fetchSnp500():
+		app.scrapes.append(threading.current_thread().name)
+		app.release.wait(5)
+
+		return ["AAPL", "MSFT"]
+
+	app.fetchSnp500 = fetchSnp500
+
+	return app
+
+#a function to wait a few seconds at most for a background refresh to be done
+def waitFor(done):
+	began = time.time()
+	while (not done() and time.time() - began < 5):
+		time.sleep(0.01)
+
+#a stale S&P 500 list is returned as it is while the new list is fetched in the background
+def test_stale_universe_is_refreshed_in_the_background():
+	app = makeTrader()
+	app.registry.setUniverse("snp500", ["AAPL"])
+	app.registry.universes["snp500"]["updated"] = time.time() - (2*app.registry.max_age)
+
+	began = time.time()
+	stocks = app.snp500()
+
+	assert stocks == ["AAPL"]
+	assert time.time() - began < 1
+
+	app.release.set()
+	waitFor(lambda: app.registry.universe("snp500") != ["AAPL"])
+	app.registry.stopRefresh()
+
+	assert app.scrapes == ["asset-registry-universes"]
+	assert app.registry.universe("snp500") == ["AAPL", "MSFT"]
+
+#looking up an asset in an empty registry refreshes the assets without fetching any universe
+def test_asset_refresh_does_not_fetch_universes():
+	app = makeTrader()
+	app.release.set()
+
+	assert app.getAssetClass("BTCUSD") == "crypto"
+
+	waitFor(lambda: app.registry.updated > 0)
+	app.registry.stopRefresh()
+
+	assert app.scrapes == []
+	assert list(app.registry.threads) == []
+	assert app.registry.updated > 0
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+import resample
+
+#a function to make minute bars over about two months with gaps, sorted by time
+def makeColumns(seed=0):
+	rng = np.random.default_rng(seed)
+	minutes = np.sort(rng.choice(60*24*70, 20000, replace=False))
+	count = len(minutes)
+	close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+
+	return {
+		"t": 1.7e9 + 17 + (60.0*minutes),
+		"o": close * (1 + rng.normal(0, 0.001, count)),
+		"h": close * 1.01,
+		"l": close * 0.99,
+		"c": close,
+		"v": np.where(rng.random(count) < 0.1, 0.0, rng.random(count)*100),
+		"vw": close * (1 + rng.normal(0, 0.001, count))
+	}
+
+#the resampled bars are the same as the bars from a pandas resample with the same buckets
+@pytest.mark.parametrize("unit, amount, rule", [
+	("hour", 1, "1h"),
+	("hour", 4, "4h"),
+	("day", 1, "24h"),
+	("week", 1, "168h"),
+	("month", 1, "MS")
+])
+def test_matches_pandas(unit, amount, rule):
+	pd = pytest.importorskip("pandas")
+	columns = makeColumns()
+	resampled = resample.resampleColumns(columns, unit, amount)
+
+	#weeks start on mondays and the other fixed buckets start at the start of unix time
+	frame = pd.DataFrame({name: columns[name] for name in "ohlcv"}, index=pd.to_datetime(columns["t"], unit="s"))
+	frame["weighted"] = columns["vw"] * columns["v"]
+	origin = pd.Timestamp("1970-01-05") if unit == "week" else "epoch"
+	groups = frame.resample(rule, origin=origin) if rule != "MS" else frame.resample(rule)
+
+	expected = groups.agg({"o": "first", "h": "max", "l": "min", "c": "last", "v": "sum", "weighted": "sum"})
+	expected["count"] = groups.size()
+	expected = expected[expected["count"] > 0]
+
+	np.testing.assert_array_equal(resampled["t"], expected.index.values.astype("datetime64[s]").astype(np.int64).astype(float))
+	for name in "ohlcv":
+		np.testing.assert_allclose(resampled[name], expected[name].values, rtol=1e-12)
+
+	#buckets with volume are weighted by it
+	traded = expected["v"].values > 0
+	np.testing.assert_allclose(resampled["vw"][traded], (expected["weighted"] / expected["v"]).values[traded], rtol=1e-12)
+
+#bars built while streaming are the same as the resampled stored bars
+def test_aggregator_matches_resample():
+	columns = makeColumns(1)
+	resampled = resample.resampleColumns(columns, "hour", 4)
+
+	finished = []
+	aggregator = resample.BarAggregator("hour", 4, finished.append)
+	for x in range(len(columns["t"])):
+		aggregator.update({name: columns[name][x] for name in columns})
+	aggregator.finish()
+
+	assert len(finished) == len(resampled["t"])
+	for name in resampled:
+		np.testing.assert_allclose([bar[name] for bar in finished], resampled[name], rtol=1e-9)
+
+#the book keeps an aggregator for each symbol and tells which symbol each finished bar belongs to
+def test_aggregator_book():
+	finished = []
+	book = resample.AggregatorBook("hour", 1, lambda symbol, bar: finished.append((symbol, bar["t"])))
+
+	for t in (0, 60, 3600, 3660, 7200):
+		for symbol in ("A", "B"):
+			book.update({"symbol": symbol, "t": float(t), "o": 1, "h": 1, "l": 1, "c": 1, "v": 1, "vw": 1})
+
+	assert "A" in book and "C" not in book
+	assert finished == [("A", 0.0), ("B", 0.0), ("A", 3600.0), ("B", 3600.0)]
+	assert book.current("A")["t"] == 7200.0
+	assert book.current("C") is None
@@ -0,0 +1,42 @@
+from datetime import datetime
+import barstore
+import fakealpaca
+import indicators
+import scanner
+import trader
+
+#the rankings hold the k highest and lowest values of every metric and the assets that failed are collected with their errors
+def test_scan_ranks_and_collects_errors():
+	app = trader.Trader(client=fakealpaca.FakeREST(), quiet=True)
+	symbols = ["SYM" + str(x) for x in range(40)]
+	failing = {"SYM3", "SYM17"}
+
+	#the bars of some symbols can not be fetched
+	getBars = app.getBars
+	def failingBars(symbol, *args):
+		if (symbol in failing):
+			raise RuntimeError("no bars for " + symbol)
+
+		return getBars(symbol, *args)
+	app.getBars = failingBars
+
+	timestart = datetime.now()
+	rankings = list(scanner.Scanner(app, k=5, concurrency=8, batch=8).iterScan(symbols, "hour", 48, timestart))
+	ranking = rankings[-1]
+
+	#a ranking is yielded after each batch and the last one covers every symbol
+	assert len(rankings) > 1
+	assert [item["done"] for item in rankings] == sorted(item["done"] for item in rankings)
+	assert ranking["done"] == ranking["total"] == 40
+	assert ranking["errors"] == {symbol: "no bars for " + symbol for symbol in failing}
+
+	#the reference is every metric of every symbol that did not fail, worked out one symbol at a time
+	bars = app.getBarsMany(sorted(set(symbols) - failing), "hour", 48, timestart)
+	for index, metric in enumerate(scanner.METRICS):
+		values = {symbol: indicators.barMetrics(barstore.barsToColumns(symbol_bars))[index] for symbol, symbol_bars in bars.items()}
+		ordered = sorted(values.values())
+
+		assert ranking["values"][metric].keys() == values.keys()
+		assert [value for symbol, value in ranking["top"][metric]] == ordered[::-1][:5]
+		assert [value for symbol, value in ranking["bottom"][metric]] == ordered[:5]
+		assert all(values[symbol] == value for symbol, value in ranking["top"][metric] + ranking["bottom"][metric])
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+import asyncio
+import fakealpaca
+import trader
+
+#a function to make a trader with trade updates on whose sells return orders with a status
+def makeTrader(status):
+	client = trader.Trader(client=fakealpaca.FakeREST(now=1.7e9), quiet=True)
+	client.trade_updates = True
+	client.sent = []
+
+	#a sell that returns an order which is accepted but not filled yet
+	def sell(symbol):
+		client.sent.append(symbol)
+		return SimpleNamespace(id="order" + str(len(client.sent)), symbol=symbol, status=status)
+
+	return client, sell
+
+#a function to make a trade update for an order
+def tradeUpdate(event, order_id, symbol="BTCUSD"):
+	return {"event": event, "order": {"id": order_id, "symbol": symbol, "side": "sell", "filled_qty": "0"}}
+
+#a sell that was accepted is not sent again until the trade updates report it as final
+def test_accepted_sell_is_not_sent_again():
+	client, sell = makeTrader("accepted")
+
+	async def run():
+		await (await client.sellAsync("BTCUSD", sell))
+		await asyncio.sleep(0)
+		assert await client.sellAsync("BTCUSD", sell) is None
+
+		await client.tradeCallback(tradeUpdate("fill", "order1"))
+		await (await client.sellAsync("BTCUSD", sell))
+
+	asyncio.run(run())
+	client.executor.shutdown()
+
+	assert client.sent == ["BTCUSD", "BTCUSD"]
+
+#a trade update that arrives before the request of the sell returns still lets the symbol be sold again
+def test_final_update_before_the_request_returns():
+	client, sell = makeTrader("accepted")
+
+	async def run():
+		future = await client.sellAsync("BTCUSD", sell)
+		await client.tradeCallback(tradeUpdate("canceled", "order1"))
+		await future
+		await asyncio.sleep(0)
+
+		assert "BTCUSD" not in client.selling
+
+	asyncio.run(run())
+	client.executor.shutdown()
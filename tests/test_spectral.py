@@ -0,0 +1,63 @@
+import numpy as np
+import spectral
+
+#a function to make a series of a line plus sine waves and a little noise
+def makeSeries(length, waves, seed=0, noise=0.01):
+	rng = np.random.default_rng(seed)
+	places = np.arange(length)
+	series = 50 + (0.02*places) + rng.normal(0, noise, length)
+
+	for frequency, amplitude, phase in waves:
+		series = series + (amplitude*np.sin((2*np.pi*frequency*places) + phase))
+
+	return series
+
+#a known sine wave is found with its frequency, amplitude and phase, and the line under it with its intercept and slope
+def test_recovers_a_sinusoid():
+	series = makeSeries(400, [(1/37, 3.0, 0.8)])
+	fit = spectral.spectralFit(series, components=1)
+
+	assert abs(fit["frequencies"][0] - (1/37)) < 1e-4
+	assert abs(fit["amplitudes"][0] - 3.0) < 0.01
+	assert abs(fit["phases"][0] - 0.8) < 0.05
+	assert abs(fit["intercepts"] - 50) < 0.05
+	assert abs(fit["slopes"] - 0.02) < 1e-3
+	assert fit["residuals"] < 0.05
+
+#two waves in many series at once are found in order of strength
+def test_recovers_two_sinusoids_in_many_series():
+	first = makeSeries(512, [(1/50, 2.0, 0.3), (1/9, 0.7, -1.2)], seed=1)
+	second = makeSeries(512, [(1/20, 1.5, 2.0), (1/64, 0.5, 0.0)], seed=2)
+	fit = spectral.spectralFit(np.stack([first, second]), components=2)
+
+	np.testing.assert_allclose(fit["frequencies"], [[1/50, 1/9], [1/20, 1/64]], atol=2e-4)
+	np.testing.assert_allclose(fit["amplitudes"], [[2.0, 0.7], [1.5, 0.5]], atol=0.02)
+
+	#a small error in the frequency moves the phase at the first bar, so each fitted wave is compared with the real one over the whole series
+	places = np.arange(512)
+	waves = [[(1/50, 2.0, 0.3), (1/9, 0.7, -1.2)], [(1/20, 1.5, 2.0), (1/64, 0.5, 0.0)]]
+	for row, row_waves in enumerate(waves):
+		for column, (frequency, amplitude, phase) in enumerate(row_waves):
+			real = amplitude*np.sin((2*np.pi*frequency*places) + phase)
+			fitted = fit["amplitudes"][row, column]*np.sin((2*np.pi*fit["frequencies"][row, column]*places) + fit["phases"][row, column])
+
+			assert np.sqrt(np.mean(np.square(fitted - real))) < 0.1*amplitude
+
+#the waves can be drawn on the graph of the analyst, where each bar covers bar_period x values
+def test_spectral_waves():
+	series = makeSeries(300, [(1/25, 4.0, 1.0)])
+	waves = spectral.spectralWaves(series, components=1, bar_period=50)
+	wave = waves[0]
+
+	assert len(waves) == 1
+	assert abs(wave["period"] - 25) < 0.05
+	assert abs(wave["frequency"] - ((2*np.pi) / (25*50))) < 1e-5
+	assert abs(wave["intercept"] - series.mean()) < 1e-9
+
+	#the wave at the x value of each bar follows the cycle in the series
+	x = np.arange(300)*50
+	cycle = wave["amplitude"]*np.sin((wave["frequency"]*x) + wave["phase"])
+	assert np.corrcoef(cycle, series - np.polyval(np.polyfit(np.arange(300), series, 1), np.arange(300)))[0, 1] > 0.99
+
+	#series that are too short have no waves
+	assert spectral.spectralWaves(series[:3]) == []
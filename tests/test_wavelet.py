@@ -0,0 +1,25 @@
+import numpy as np
+import wavelet
+
+#the stream gives the same bands as the batch transform of its window after every bar, including windows that do not start on a pair
+def test_stream_matches_batch():
+	values = np.random.default_rng(0).normal(size=(3, 300)).cumsum(axis=1)
+	levels = 3
+	window = 64
+
+	stream = wavelet.HaarStream(3, levels, window)
+	for count in range(1, values.shape[1] + 1):
+		stream.update(values[:, count-1])
+
+		if (count < (1 << levels)):
+			continue
+
+		#the batch transform of the bars in the window of the stream
+		recent = values[:, max(count - window, 0):count]
+		details, approx, skipped = wavelet.haarTransform(recent, levels)
+
+		for level, detail in enumerate(details):
+			assert np.allclose(stream.band(level+1), detail)
+
+		assert np.allclose(stream.band(0), approx)
+		assert np.allclose(stream.energies(), wavelet.bandEnergies(details, approx))
@@ -1,59 +1,157 @@
-from dotenv import load_dotenv
-from alpaca_trade_api.common import URL
-from alpaca_trade_api.stream import Stream
-from alpaca_trade_api.rest import TimeFrame, TimeFrameUnit
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pprint import pprint
+import asyncio
 import random
 import time
 import math
 import os
-import alpaca_trade_api as alpaca_api
+import positions
+import barcache
+import indicators
+import dispatcher
+import registry
+
+#the value of different units of time in seconds
+UNIT_SECONDS = {
+	"minute": 60,
+	"hour": 60*60,
+	"day": 60*60*24,
+	"week": 60*60*24*7,
+	"month": 60*60*24*7*4,
+	"year": 60*60*24*7*4*12
+}
+
+#returns the alpaca time frame of bars for a unit of time
+def timeFrame(unit):
+	#the alpaca library is slow to import, so it is only imported once it is needed
+	from alpaca_trade_api.rest import TimeFrame
+
+	timeframes = {
+		"minute": "Minute",
+		"hour": "Hour",
+		"day": "Day",
+		"week": "Week",
+		"month": "Month",
+		"year": "Year"
+	}
+
+	return getattr(TimeFrame, timeframes[unit])
+
+#the statuses of an order that will not change any more (and the trade update events that report them)
+FINAL_STATUSES = ("filled", "canceled", "expired", "rejected", "replaced")
+
+#makes a timestamp into the iso format used for requests to the api, the api reads the "Z" as UTC so the time has to be in UTC
+def isoTime(timestamp):
+	return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None).isoformat()+"Z"
 
 #an organized class for stocks/crypto trading
 class Trader:
-	#initialization of the trader class
-	def __init__(self, paper=True):
-		#load the environment variables from the .env file
-		load_dotenv()
+	#initialization of the trader class, a client can be given to use instead of the alpaca REST clients (such as a simulated broker), quiet skips printing the portfolio
+	def __init__(self, paper=True, client=None, quiet=False):
+		#whether this instance is for paper trading or real trading
+		self.paper = paper
 
-		#set up the alpaca REST clients (real and paper clients respectively)
-		client, paper_client = self.setupAlpaca()
+		#the REST client and the stream of live market data, the alpaca ones are only made the first time they are used
+		self._alpaca = client
+		self._stream = None
 
-		#check to see if this instance is for paper trading or real trading
-		if (paper):
-			self.alpaca = paper_client
-		else:
-			self.alpaca = client
+		#a client given directly has no live stream of market data
+		self.client_given = client is not None
+
+		#a cache of the bars requested from the api
+		self.bar_cache = barcache.BarCache()
+
+		#the local registry of asset information and universes, a client given directly keeps its registry in memory
+		self.registry = registry.AssetRegistry(None if self.client_given else "assets.json")
+		self.registry_interval = UNIT_SECONDS["day"]
+
+		#the amount of requests for market data and orders that can be sent at the same time
+		self.fetch_concurrency = 8
+		self.order_concurrency = 24
+
+		#a local book of the positions held, filled from the api the first time it is used
+		self.positions = positions.PositionBook()
 
-		#initiate an instance of stream for getting live market data
-		self.stream = Stream(
-				self.alpaca._key_id,
-				self.alpaca._secret_key,
-				base_url=self.alpaca._base_url,
-				data_feed="iex")
+		#whether the trade update stream is keeping the position book current
+		self.trade_updates = False
+
+		#the rolling trend and volatility metrics of the symbols on the live streams
+		self.indicators = indicators.IndicatorBook()
+
+		#the router of bars from the live stream to each symbol, made when symbols are first subscribed
+		self.dispatcher = None
+		self.stream_queue_size = 2
+
+		#the threads that run requests to the api for the callbacks, so the event loop of the stream is never blocked
+		self.executor = None
+
+		#the sells sent from the callbacks that have not finished, by symbol (the request while it is being sent, then the id of the order until it is final), and whether the callbacks wait for them
+		self.selling = {}
+		self.background_sells = True
+
+		#the ids of orders that were reported final by the trade updates before the request that sent them returned
+		self.finished_sells = set()
 
 		#print out the current portfolio info
-		self.getPortfolio()
+		if (not quiet):
+			self.getPortfolio()
 
-	#a function that sets up the alpaca REST client
-	def setupAlpaca(self):
-		#get information to use the alpaca api using the os module
-		api_secret = os.environ["API_SECRET"]
-		api_key = os.environ["API_KEY"]
-		base_url = os.environ["BASE_URL"]
+	#the REST client of the trader, the alpaca client is set up the first time it is used
+	@property
+	def alpaca(self):
+		if (self._alpaca is None):
+			self._alpaca = self.setupClient(self.paper)
 
-		paper_api_secret = os.environ["PAPER_API_SECRET"]
-		paper_api_key = os.environ["PAPER_API_KEY"]
-		paper_url = os.environ["PAPER_URL"]
+		return self._alpaca
 
-		#initialize the REST client for the alpaca api
-		alpaca = alpaca_api.REST(api_key, api_secret, base_url)
+	@alpaca.setter
+	def alpaca(self, client):
+		self._alpaca = client
+
+	#the stream of live market data, set up the first time it is used (there is none for a client given directly)
+	@property
+	def stream(self):
+		if (self._stream is None and not self.client_given):
+			from alpaca_trade_api.stream import Stream
+
+			#initiate an instance of stream for getting live market data
+			self._stream = Stream(
+					self.alpaca._key_id,
+					self.alpaca._secret_key,
+					base_url=self.alpaca._base_url,
+					data_feed="iex")
+
+		return self._stream
 
-		#initialize the paper trading REST client
-		alpaca_paper = alpaca_api.REST(paper_api_key, paper_api_secret, paper_url)
+	@stream.setter
+	def stream(self, stream):
+		self._stream = stream
+
+	#a function that sets up the alpaca REST client for paper trading or real trading
+	def setupClient(self, paper=True):
+		from dotenv import load_dotenv
+		import alpaca_trade_api as alpaca_api
+
+		#load the environment variables from the .env file
+		load_dotenv()
 
-		return alpaca, alpaca_paper
+		#get information to use the alpaca api using the os module
+		if (paper):
+			api_secret = os.environ["PAPER_API_SECRET"]
+			api_key = os.environ["PAPER_API_KEY"]
+			base_url = os.environ["PAPER_URL"]
+		else:
+			api_secret = os.environ["API_SECRET"]
+			api_key = os.environ["API_KEY"]
+			base_url = os.environ["BASE_URL"]
+
+		#initialize the REST client for the alpaca api
+		return alpaca_api.REST(api_key, api_secret, base_url)
+
+	#a function that sets up the alpaca REST clients (real and paper clients respectively)
+	def setupAlpaca(self):
+		return self.setupClient(False), self.setupClient(True)
 
 	#a function to get the portfolio value of the account
 	def getPortfolio(self):
@@ -73,52 +171,176 @@ class Trader:
 		#return the account
 		return account
 
+	#returns the local book of positions, filling it from the api if it is out of date
+	def getPositionBook(self):
+		if (not self.positions.seeded):
+			self.positions.seed(self.alpaca.list_positions())
+
+		return self.positions
+
+	#a function to add an order to the position book if it has been filled
+	def recordOrder(self, order, asset_class=None):
+		if (order and getattr(order, "status", None) == "filled"):
+			#the trade update stream may have added this fill already, so it is matched by the id of the order
+			self.positions.applyOrderFill(order.id, order.symbol, order.side, order.filled_qty, order.filled_avg_price, asset_class)
+		elif (order and not self.trade_updates):
+			#without the trade update stream there is no way to know when the order fills, so fill the book again next time
+			self.positions.invalidate()
+
+		return order
+
+	#returns the threads that run requests to the api for the callbacks, making them the first time they are used
+	def getExecutor(self):
+		if (self.executor is None):
+			self.executor = ThreadPoolExecutor(max_workers=self.order_concurrency)
+
+		return self.executor
+
+	#returns the local book of positions without blocking the event loop (the api is only asked on a thread when the book is out of date)
+	async def getPositionBookAsync(self):
+		if (self.positions.seeded):
+			return self.positions
+
+		return await asyncio.get_running_loop().run_in_executor(self.getExecutor(), self.getPositionBook)
+
+	#a function to sell a symbol on a thread from a callback, a sell that is already in flight for the symbol is not sent again
+	async def sellAsync(self, symbol, sell):
+		#sell right away if the callbacks are not supposed to move on before the sell finishes (such as in a backtest)
+		if (not self.background_sells):
+			return sell(symbol)
+
+		if (symbol in self.selling):
+			print("Sell already in flight for", symbol + "...")
+			return None
+
+		future = asyncio.get_running_loop().run_in_executor(self.getExecutor(), sell, symbol)
+		self.selling[symbol] = future
+		future.add_done_callback(lambda done: self.sellDone(symbol, done))
+
+		return future
+
+	#the function called when the request of a sell from a callback returns
+	def sellDone(self, symbol, future):
+		if (future.cancelled() or future.exception() is not None):
+			if (not future.cancelled()):
+				print("Error selling", symbol + ":", future.exception())
+
+			self.selling.pop(symbol, None)
+			return
+
+		order = future.result()
+		order_id = getattr(order, "id", None) if order else None
+
+		#the symbol stays marked until the trade updates report the order as final, so a sell that is accepted but not filled is not sent again
+		if (order_id is None or getattr(order, "status", None) in FINAL_STATUSES or not self.trade_updates or order_id in self.finished_sells):
+			self.finished_sells.discard(order_id)
+			self.selling.pop(symbol, None)
+		else:
+			self.selling[symbol] = order_id
+
+	#the callback function for trade updates on the orders of this account
+	async def tradeCallback(self, data):
+		self.positions.applyTradeUpdate(data)
+
+		#let the symbol be sold again once its sell is final
+		order = positions.field(data, "order", {})
+		symbol = positions.field(order, "symbol")
+		if (positions.field(data, "event") in FINAL_STATUSES + ("fill",) and symbol in self.selling):
+			order_id = positions.field(order, "id")
+
+			if (self.selling[symbol] == order_id):
+				self.selling.pop(symbol, None)
+			elif (not isinstance(self.selling[symbol], str)):
+				#the request that sent the sell has not returned yet
+				self.finished_sells.add(order_id)
+
+	#a function to fill the rolling metrics of many symbols from historical bars before the live streams start
+	def seedIndicators(self, symbols, unit="minute", timeamount=60, timestart=datetime.now()):
+		for symbol, bars in self.iterBarsMany(symbols, unit, timeamount, timestart):
+			self.indicators.seed(symbol, bars)
+
+		return self.indicators
+
 	#the callback function for the live stock data
 	async def stockCallback(self, data):
-		#get a list of the current stock positions
-		positions = self.alpaca.list_positions()
-		stock_positions = []
-		for pos in positions:
-			stock_positions.append(pos.symbol)
+		#keep the rolling metrics of this symbol up to date with the new bar
+		self.indicators.update(data)
 
 		#check to see if this symbol/ticker is available to sell/buy
-		if (data.symbol in stock_positions):
+		book = await self.getPositionBookAsync()
+		if (data.symbol in book):
 			#get the current position for this symbol/ticker
-			position = self.alpaca.get_position(data.symbol)
+			position = book.get(data.symbol)
 			print(position)
 
-			#get the unrealized profit/loss of this position
-			profit = float(position.unrealized_pl)
+			#get the unrealized profit/loss of this position at the price of this bar
+			profit = book.unrealizedPL(data.symbol, data.close)
 
 			print("Profit/loss:", profit)
 
 			#sell the stock or hold depending on the state of the profit/loss
 			if (profit >= self.stock_cap):
 				print("Liquidating position for a $", profit, " increase.")
-				self.sellStock(data.symbol)
+				await self.sellAsync(data.symbol, self.sellStock)
 			elif (profit <= -self.stock_bottom):
 				print("Liquidating position to keep losses at $", profit, ".")
-				self.sellStock(data.symbol)
+				await self.sellAsync(data.symbol, self.sellStock)
 			else:
 				print("Holding position for", data.symbol + "...")
 		else:
 			print("No position for", data.symbol)
 
+	#returns the router of bars from the live stream, making it the first time it is used
+	def getDispatcher(self):
+		if (self.dispatcher is None):
+			self.dispatcher = dispatcher.StreamDispatcher(self.stream, self.stream_queue_size)
+
+		return self.dispatcher
+
 	#a function that gets live market data for a stock
 	def subscribeStock(self, symbol, cap=1, bottom=5):
+		self.subscribeStocks([symbol], cap, bottom)
+
+	#a function that gets live market data for many stocks on a single stream
+	def subscribeStocks(self, symbols, cap=1, bottom=5):
 		#set values for the cap and bottom values for selling a stock
 		self.stock_cap = cap
 		self.stock_bottom = bottom
 
-		#subscribe to the live stream of stock bar data
-		self.stream.subscribe_bars(self.stockCallback, symbol)
+		#subscribe to the live stream of stock bar data, each symbol gets its own queue
+		self.getDispatcher().subscribeBars(self.stockCallback, symbols)
+
+		#keep the position book current from the trade updates of this account
+		self.stream.subscribe_trade_updates(self.tradeCallback)
+		self.trade_updates = True
+
+		#keep the asset registry and the S&P 500 list current while the stream runs
+		self.startAssetRefresh()
+		self.startUniverseRefresh()
 
 		#run the stream to receive live data
 		self.stream.run()
 
 	#returns a list of the stocks on the S&P 500 in random order
 	def snp500(self):
-		#get a list of the stocks on the current S&P 500 from wikipedia
+		#use the stored list of stocks, a stale list is refreshed from wikipedia in the background while it keeps being used
+		stocks = self.registry.universe("snp500")
+		if (not self.client_given and self.registry.isUniverseStale("snp500")):
+			self.startUniverseRefresh()
+
+		#the list has to be fetched before anything can be traded the first time it is needed
+		if (stocks is None):
+			stocks = self.fetchSnp500()
+			self.registry.setUniverse("snp500", stocks)
+
+		#shuffle the values of the stock to make random selections
+		random.shuffle(stocks)
+		return stocks
+
+	#a function to get the list of the stocks on the current S&P 500 from wikipedia
+	def fetchSnp500(self):
+		import pandas as pd
+
 		table = pd.read_html("https://en.wikipedia.org/wiki/List_of_S%26P_500_companies")
 
 		#get the raw values of the stock symbols from the wikipedia data
@@ -130,173 +352,191 @@ class Trader:
 		for sym in symbols:
 			stocks.append(sym)
 
-		#shuffle the values of the stock to make random selections
-		random.shuffle(stocks)
 		return stocks
 
+	#a function to refresh every asset in the registry from the api
+	def refreshAssets(self):
+		self.registry.replace(self.alpaca.list_assets(status="active"))
+
+	#a function to refresh the universes in the registry from wikipedia (a client given directly has no universes to refresh)
+	def refreshUniverses(self):
+		if (not self.client_given):
+			self.registry.setUniverse("snp500", self.fetchSnp500())
+
+	#a function to start refreshing the assets of the registry in the background, right away if they are stale and then on a schedule
+	def startAssetRefresh(self, interval=None):
+		return self.registry.startRefresh(self.refreshAssets, interval if interval else self.registry_interval)
+
+	#a function to start refreshing the universes of the registry in the background, right away if they are stale and then on a schedule
+	def startUniverseRefresh(self, interval=None):
+		return self.registry.startRefresh(self.refreshUniverses, interval if interval else self.registry_interval, "universes", lambda: self.registry.universeUpdated("snp500"))
+
 	#gets the latest bar of a stock based on the symbol
 	def getStockBar(self, symbol):
 		stockprice = self.alpaca.get_latest_bar(symbol)
 
 		return stockprice
 
-	#a function to get a set of bars for a stock for analysis
-	def getStockBars(self, symbol, unit="hour", timeamount=1, timestart=datetime.now()):
-		#get the current time in the form of a UTC timestamp and make start and end variables
-		start = timestart
-		start = start.timestamp()
-		end = start
+	#a function to get the starting and ending timestamps of a request for market data
+	def getTimeRange(self, unit="hour", timeamount=1, timestart=datetime.now()):
+		#get the current time in the form of a UTC timestamp
+		end = timestart.timestamp()
 
-		#get the value of different units of time in seconds
-		minute = 60
-		hour = minute*60
-		day = hour*24
-		week = day*7
-		month = week*4
-		year = month*12
+		#get the starting timestamp based on the time unit and amount of time to go back
+		start = end - (UNIT_SECONDS[unit]*timeamount)
 
-		#get the starting timestamp based on the time unit and amount of time to go back. also get the right time increment
-		if (unit == "minute"):
-			start = start - (minute*timeamount)
+		#make both timestamps 15 minutes earlier (free subscription does not allow more recent data)
+		start = start - (15*UNIT_SECONDS["minute"])
+		end = end - (15*UNIT_SECONDS["minute"])
 
-			timeframe = TimeFrame.Minute
-		elif (unit == "hour"):
-			start = start - (hour*timeamount)
+		return start, end
 
-			timeframe = TimeFrame.Hour
-		elif (unit == "day"):
-			start = start - (day*timeamount)
+	#a function to get a set of bars for a stock for analysis
+	def getStockBars(self, symbol, unit="hour", timeamount=1, timestart=datetime.now()):
+		start, end = self.getTimeRange(unit, timeamount, timestart)
 
-			timeframe = TimeFrame.Day
-		elif (unit == "week"):
-			start = start - (week*timeamount)
+		#get the bars from the cache, which only asks the api for the parts of the time range it does not have
+		return self.bar_cache.get(symbol, unit, start, end, lambda start, end: self.fetchStockBars(symbol, unit, start, end))
 
-			timeframe = TimeFrame.Week
-		elif (unit == "month"):
-			start = start - (month*timeamount)
+	#a function to request the bars of a stock between two timestamps from the api
+	def fetchStockBars(self, symbol, unit, start, end):
+		bars = self.alpaca.get_bars_iter(symbol, timeFrame(unit), isoTime(start), isoTime(end), adjustment="raw")
 
-			timeframe = TimeFrame.Month
-		elif (unit == "year"):
-			start = start - (year*timeamount)
+		return list(bars)
 
-			timeframe = TimeFrame.Year
+	#returns the information of a stock or crypto from the registry, only asking the api for symbols the registry does not have
+	def getAsset(self, symbol):
+		#refresh a stale registry in the background, the stored information is used until the refresh is done
+		if (not self.client_given and self.registry.isStale()):
+			self.startAssetRefresh()
 
-		#make the starting timestamp into an iso timestamp
-		start = start - (15*minute)
-		start = str(datetime.fromtimestamp(start).isoformat())+"Z"
+		asset = self.registry.get(symbol)
 
-		#make the ending timestamp 15 minutes ago (free subscription does not allow more recent data) and convert to iso timestamp
-		end = end - (15*minute)
-		end = str(datetime.fromtimestamp(end).isoformat())+"Z"
+		#symbols looked up one at a time are written to the file in batches by flush
+		if (asset is None):
+			asset = self.registry.add([self.alpaca.get_asset(symbol)], save=False)[0]
 
-		#get bars for stocks
-		bars = self.alpaca.get_bars_iter(symbol, timeframe, start, end, adjustment="raw")
+		return asset
 
-		#return the iterable bars
-		return bars
+	#a function to get the asset class of a stock or crypto ("us_equity" or "crypto")
+	def getAssetClass(self, symbol):
+		asset = self.getAsset(symbol)
 
-	#places an order for a stock
-	def buyStock(self, symbol, money):
-		#get the price of the stock
-		stockprice = self.getStockBar(symbol).close
+		return getattr(asset, "class")
 
-		print("Quantity to Buy:", float(money)/float(stockprice))
+	#a function to get a set of bars for a stock or crypto based on the asset class
+	def getBars(self, symbol, unit="hour", timeamount=1, timestart=datetime.now()):
+		if (self.getAssetClass(symbol) == "crypto"):
+			return self.getCryptoBars(symbol, unit, timeamount, timestart)
 
-		#check to see if this stock is fractionable
-		fractionable = self.alpaca.get_asset(symbol)
-		fractionable = fractionable.fractionable
-
-		#place an order or return False depending on if the stock is fractional
-		if (fractionable and float(money) >= 1.00):
-			#place an order for fractional shares
-			return self.alpaca.submit_order(
-				symbol=symbol,
-				notional=money,
-				side="buy",
-				type="market",
-				time_in_force="day"
-			)
-		else:
-			#the stock is not fractionable so it cannot be bought
-			return False
+		return self.getStockBars(symbol, unit, timeamount, timestart)
 
-	#places an order to sell all stock in current position
-	def sellStock(self, symbol):
-		#get the current positions of this account
-		positions = self.alpaca.list_positions()
+	#a function to get the bars of many stocks and cryptos at once, yielding (symbol, bars) as each request finishes (failed requests are put in the errors dictionary if one is given, instead of raising)
+	def iterBarsMany(self, symbols, unit="hour", timeamount=1, timestart=datetime.now(), concurrency=None, errors=None):
+		#use the default amount of simultaneous requests if none is given
+		if (not concurrency):
+			concurrency = self.fetch_concurrency
 
-		#get a full array of the positions and their symbols
-		stock_positions = []
-		for i in positions:
-			stock_positions.append(i.symbol)
+		#send the requests from a pool of threads since the time is spent waiting on the network
+		with ThreadPoolExecutor(max_workers=concurrency) as executor:
+			futures = {}
+			for symbol in symbols:
+				future = executor.submit(self.getBars, symbol, unit, timeamount, timestart)
+				futures[future] = symbol
 
-		#check to see if this is a position that can be sold
-		if (symbol in stock_positions):
-			#get the amount of shares for this position
-			current_position = self.alpaca.get_position(symbol)
-			quantity = current_position.qty
+			try:
+				for future in as_completed(futures):
+					if (errors is not None and future.exception() is not None):
+						errors[futures[future]] = future.exception()
+						continue
 
-			print("Selling", quantity, "stock shares")
+					yield futures[future], future.result()
+			finally:
+				#write the assets looked up for these symbols once, instead of once for each symbol
+				self.registry.flush()
 
-			#return an order for selling a stock
-			return self.alpaca.submit_order(
-				symbol=symbol,
-				qty=quantity,
-				side="sell",
-				type="market",
-				time_in_force="day"
-			)
-		else:
-			#return false if this stock is not a currently held position
-			return False
+	#a function to get the bars of many stocks and cryptos at once as a dictionary keyed by symbol
+	def getBarsMany(self, symbols, unit="hour", timeamount=1, timestart=datetime.now(), concurrency=None):
+		return dict(self.iterBarsMany(symbols, unit, timeamount, timestart, concurrency))
 
-	#a function that randomly buys and sells stocks based on the sudoku board values
-	def cascadeStocks(self, numbers, hold=False, stocks=0):
-		#if there is no list of stocks given, get random S&P 500 stocks
-		if (not stocks):
-			stocks = self.snp500()
+	#returns the latest prices of many stocks with one request
+	def getLatestStockPrices(self, symbols):
+		bars = self.alpaca.get_latest_bars(symbols)
 
-			#get the first 10 random stocks to trade
-			stocks = stocks[:10]
+		return {symbol: bar.close for symbol, bar in bars.items()}
 
-		#get the current positions of this account and make a list of the symbols of these positions
-		positions = self.alpaca.list_positions()
-		stock_positions = []
-		for pos in positions:
-			stock_positions.append(pos.symbol)
+	#returns the latest prices of many cryptos with one request
+	def getLatestCryptoPrices(self, symbols, exchange="FTXU"):
+		bars = self.alpaca.get_latest_crypto_bars(symbols, exchange)
 
-		#get the amount of cash available for the alpaca account
-		cash = float(self.alpaca.get_account().cash)
+		return {symbol: bar.close for symbol, bar in bars.items()}
 
-		#get the amount of cash available for each buy/sell decision
-		cash_alloted = float(cash)/len(stocks)
+	#returns the asset information of many stocks or cryptos, the ones the registry does not have are requested at the same time
+	def getAssets(self, symbols):
+		missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.registry]
+
+		if (missing):
+			with ThreadPoolExecutor(max_workers=self.order_concurrency) as executor:
+				self.registry.add(list(executor.map(self.alpaca.get_asset, missing)))
+
+		return {symbol: self.registry.get(symbol) for symbol in symbols}
 
-		#loop through the board values to make random decisions
-		for value in numbers:
-			#get the current stock to buy/sell
-			stock = stocks[0]
-			print(stock + ":")
+	#a function to turn the board values into a plan of orders, returns a list of (symbol, order arguments or False, decision) where the decision is printed with the result of the order
+	def planCascade(self, numbers, symbols, hold, cash_alloted, positions, planBuy, planSell):
+		plan = []
 
-			#if the number is less than 4, buy the crypto
+		#make a decision for each symbol with the board values in order
+		for value, symbol in zip(numbers, symbols):
+			#if the number is less than 5, buy with the alloted cash
 			if (value < 5):
-				print("Buying shares with alloted cash...")
-				order = self.buyStock(stock, cash_alloted)
-			elif (value > 5 and stock in stock_positions): #if the number is more than 4, sell the crypto
-				#check to see if the function is supposed to sell positions
+				decision = "Buying shares with alloted cash..."
+				order = planBuy(symbol, cash_alloted)
+			elif (value > 5 and symbol in positions): #if the number is more than 5, sell the position
+				#check to see if the algorithm is supposed to sell positions
 				if (not hold):
-					print("Selling all shares in current position...")
-					order = self.sellStock(stock)
+					decision = "Selling all shares in current position..."
+					order = planSell(symbol)
 
-					#if the selling does not work, buy more of this stock
+					#if the selling does not work, buy more of this asset
 					if (not order):
-						print("Too little shares to sell, buying more shares...")
-						order = self.buyStock(stock, cash_alloted)
+						decision = "Too little shares to sell, buying more shares..."
+						order = planBuy(symbol, cash_alloted)
 				else: #the algorithm is supposed to hold/buy positions only
-					print("Holding current position...")
+					decision = "Holding current position..."
 					order = False
-			else: #if the number is 4, then buy crypto with half of the alloted cash
-				print("Buying shares with 1/2 of alloted cash...")
-				order = self.buyStock(stock, cash_alloted/2)
+			else: #otherwise buy with half of the alloted cash
+				decision = "Buying shares with 1/2 of alloted cash..."
+				order = planBuy(symbol, cash_alloted/2)
+
+			plan.append((symbol, order, decision))
+
+		return plan
+
+	#a function to send a planned order and add it to the position book if it fills
+	def submitOrder(self, order):
+		arguments = dict(order)
+		asset_class = arguments.pop("asset_class", None)
+
+		return self.recordOrder(self.alpaca.submit_order(**arguments), asset_class)
+
+	#a function to send every order of a plan at the same time, returns a list of (symbol, order or False)
+	def submitPlan(self, plan):
+		#send the orders from a pool of threads since the time is spent waiting on the network
+		with ThreadPoolExecutor(max_workers=self.order_concurrency) as executor:
+			futures = [executor.submit(self.submitOrder, order) if order else None for symbol, order, decision in plan]
+
+		#print the decision and the result of each order together once every order is done
+		results = []
+		for (symbol, planned, decision), future in zip(plan, futures):
+			print(symbol + ":")
+			print(decision)
+
+			order = False
+			if (future is not None):
+				try:
+					order = future.result()
+				except Exception as error:
+					print("Order failed:", error)
 
 			#check to see if the order was carried out
 			if (order):
@@ -312,12 +552,103 @@ class Trader:
 			#print newline for organization
 			print()
 
-			#remove this stock from the list to move onto the next stock
-			stocks.remove(stock)
+			results.append((symbol, order))
+
+		return results
+
+	#plans an order for a stock from its price and asset information, returns the arguments of the order or False
+	def planBuyStock(self, symbol, money, stockprice, asset):
+		print("Quantity to Buy:", float(money)/float(stockprice))
+
+		#plan an order or return False depending on if the stock is fractional
+		if (asset.fractionable and float(money) >= 1.00):
+			#an order for fractional shares
+			return {
+				"symbol": symbol,
+				"notional": money,
+				"side": "buy",
+				"type": "market",
+				"time_in_force": "day",
+				"asset_class": "us_equity"
+			}
+		else:
+			#the stock is not fractionable so it cannot be bought
+			return False
+
+	#plans an order to sell all stock in current position, returns the arguments of the order or False
+	def planSellStock(self, symbol):
+		#check to see if this is a position that can be sold
+		book = self.getPositionBook()
+		if (symbol in book):
+			#get the amount of shares for this position
+			quantity = round(book.qty(symbol), 9)
+
+			print("Selling", quantity, "stock shares")
+
+			#an order for selling a stock
+			return {
+				"symbol": symbol,
+				"qty": quantity,
+				"side": "sell",
+				"type": "market",
+				"time_in_force": "day",
+				"asset_class": "us_equity"
+			}
+		else:
+			#return false if this stock is not a currently held position
+			return False
+
+	#places an order for a stock
+	def buyStock(self, symbol, money):
+		#get the price of the stock and check to see if this stock is fractionable
+		stockprice = self.getStockBar(symbol).close
+		asset = self.getAsset(symbol)
+
+		order = self.planBuyStock(symbol, money, stockprice, asset)
+
+		return self.submitOrder(order) if order else False
 
-			#break the loop if there are no more stocks to buy/sell
-			if (not len(stocks)):
-				break
+	#places an order to sell all stock in current position
+	def sellStock(self, symbol):
+		order = self.planSellStock(symbol)
+
+		return self.submitOrder(order) if order else False
+
+	#a function that randomly buys and sells stocks based on the sudoku board values
+	def cascadeStocks(self, numbers, hold=False, stocks=0):
+		#if there is no list of stocks given, get random S&P 500 stocks
+		if (not stocks):
+			stocks = self.snp500()
+
+			#get the first 10 random stocks to trade
+			stocks = stocks[:10]
+
+		#get the current positions of this account
+		stock_positions = self.getPositionBook().symbols()
+
+		#get the amount of cash available for the alpaca account
+		cash = float(self.alpaca.get_account().cash)
+
+		#get the amount of cash available for each buy/sell decision
+		cash_alloted = float(cash)/len(stocks)
+
+		#get the prices and asset information of every stock that gets a decision at once
+		stocks = list(stocks[:len(numbers)])
+		prices = self.getLatestStockPrices(stocks)
+		assets = self.getAssets(stocks)
+
+		#plan the orders for every stock, then send them all at once
+		plan = self.planCascade(
+			numbers,
+			stocks,
+			hold,
+			cash_alloted,
+			stock_positions,
+			lambda stock, money: self.planBuyStock(stock, money, prices[stock], assets[stock]),
+			self.planSellStock
+		)
+
+		return self.submitPlan(plan)
 
 	#a function that sells stock positions based on unrealized profit/loss
 	def sellProfitStocks(self):
@@ -402,30 +733,28 @@ class Trader:
 
 	#the callback function for live crypto data
 	async def cryptoCallback(self, data):
-		#get all currently held crypto position tickers/symbols
-		positions = self.alpaca.list_positions()
-		crypto_positions = []
-		for pos in positions:
-			crypto_positions.append(pos.symbol)
+		#keep the rolling metrics of this symbol up to date with the new bar
+		self.indicators.update(data)
 
 		#act based on if this ticker is a held position
-		if (data.symbol in crypto_positions):
+		book = await self.getPositionBookAsync()
+		if (data.symbol in book):
 			#get the current position for this symbol/ticker
-			position = self.alpaca.get_position(data.symbol)
+			position = book.get(data.symbol)
 			print(position)
 
-			#get the unrealized profit/loss for this symbol/ticker
-			profit = float(position.unrealized_pl)
+			#get the unrealized profit/loss for this symbol/ticker at the price of this bar
+			profit = book.unrealizedPL(data.symbol, data.close)
 
 			print("Profit/loss:", profit)
 
 			#sell or hold depending on the crypto cap or bottom
 			if (profit >= self.crypto_cap):
 				print("Liquidating position for a $", profit, " increase.")
-				self.sellCrypto(data.symbol)
+				await self.sellAsync(data.symbol, self.sellCrypto)
 			elif (profit <= -self.crypto_bottom):
 				print("Liquidating position to keep losses at $", profit, ".")
-				self.sellCrypto(data.symbol)
+				await self.sellAsync(data.symbol, self.sellCrypto)
 			else:
 				print("Holding position for", data.symbol + "...")
 		else:
@@ -433,12 +762,23 @@ class Trader:
 
 	#a function that gets live market data for a cryptocurrency
 	def subscribeCrypto(self, symbol, cap=1, bottom=5):
+		self.subscribeCryptos([symbol], cap, bottom)
+
+	#a function that gets live market data for many cryptocurrencies on a single stream
+	def subscribeCryptos(self, symbols, cap=1, bottom=5):
 		#set the cap and bottom for selling this cryptocurrency
 		self.crypto_cap = cap
 		self.crypto_bottom = bottom
 
-		#subscribe to the data stream of crypto bars
-		self.stream.subscribe_crypto_bars(self.cryptoCallback, symbol)
+		#subscribe to the data stream of crypto bars, each symbol gets its own queue
+		self.getDispatcher().subscribeCryptoBars(self.cryptoCallback, symbols)
+
+		#keep the position book current from the trade updates of this account
+		self.stream.subscribe_trade_updates(self.tradeCallback)
+		self.trade_updates = True
+
+		#keep the asset registry current while the stream runs
+		self.startAssetRefresh()
 
 		#run the stream to start receiving live data
 		self.stream.run()
@@ -488,68 +828,22 @@ class Trader:
 
 	#a function to get a set of bars for a crypto for analysis
 	def getCryptoBars(self, symbol, unit="hour", timeamount=1, timestart=datetime.now()):
-		#get the current time in the form of a UTC timestamp and make start and end variables
-		start = timestart
-		start = start.timestamp()
-		end = start
-
-		#get the value of different units of time in seconds
-		minute = 60
-		hour = minute*60
-		day = hour*24
-		week = day*7
-		month = week*4
-		year = month*12
+		start, end = self.getTimeRange(unit, timeamount, timestart)
 
-		#get the starting timestamp based on the time unit and amount of time to go back. also get the right time increment
-		if (unit == "minute"):
-			start = start - (minute*timeamount)
+		#get the bars from the cache, which only asks the api for the parts of the time range it does not have
+		return self.bar_cache.get(symbol, unit, start, end, lambda start, end: self.fetchCryptoBars(symbol, unit, start, end))
 
-			timeframe = TimeFrame.Minute
-		elif (unit == "hour"):
-			start = start - (hour*timeamount)
+	#a function to request the bars of a crypto between two timestamps from the api
+	def fetchCryptoBars(self, symbol, unit, start, end):
+		bars = self.alpaca.get_crypto_bars_iter(symbol, timeFrame(unit), isoTime(start), isoTime(end))
 
-			timeframe = TimeFrame.Hour
-		elif (unit == "day"):
-			start = start - (day*timeamount)
-
-			timeframe = TimeFrame.Day
-		elif (unit == "week"):
-			start = start - (week*timeamount)
-
-			timeframe = TimeFrame.Week
-		elif (unit == "month"):
-			start = start - (month*timeamount)
-
-			timeframe = TimeFrame.Month
-		elif (unit == "year"):
-			start = start - (year*timeamount)
-
-			timeframe = TimeFrame.Year
-
-		#make the starting timestamp into an iso timestamp
-		start = start - (15*minute)
-		start = str(datetime.fromtimestamp(start).isoformat())+"Z"
-
-		#make the ending timestamp 15 minutes ago (free subscription does not allow more recent data) and convert to iso timestamp
-		end = end - (15*minute)
-		end = str(datetime.fromtimestamp(end).isoformat())+"Z"
-
-		#get bars for stocks with a time frame unit of one hour
-		bars = self.alpaca.get_crypto_bars_iter(symbol, timeframe, start, end)
-
-		#return the iterable bars
-		return bars
-
-	#places an order for a cryptocurrency
-	def buyCrypto(self, symbol, money):
-		#get the price of one full coin
-		cryptoprice = self.getCryptoBar(symbol).close
+		return list(bars)
 
+	#plans an order for a cryptocurrency from its price and asset information, returns the arguments of the order or False
+	def planBuyCrypto(self, symbol, money, cryptoprice, asset):
 		#get information about this crypto asset
-		crypto_asset = self.alpaca.get_asset(symbol)
-		min_order = crypto_asset.min_order_size
-		min_trade_increment = crypto_asset.min_trade_increment
+		min_order = asset.min_order_size
+		min_trade_increment = asset.min_trade_increment
 
 		#calculate the crypto price of the minimum trade increment
 		increment_price = float(cryptoprice) * float(min_trade_increment)
@@ -569,40 +863,32 @@ class Trader:
 
 		print("Quantity to Buy:", quantity)
 
-		#if the quantity is larger than the minimum order number, order crypto
+		#if the quantity is larger than the minimum order number, plan an order for crypto
 		if (float(money)/float(cryptoprice) >= float(min_order)):
-			#return an order for crypto, the time in force is "gtc" for "Good Till Cancelled"
-			return self.alpaca.submit_order(
-				symbol=symbol,
-				qty=quantity,
-				side="buy",
-				type="market",
-				time_in_force="gtc"
-			)
+			#an order for crypto, the time in force is "gtc" for "Good Till Cancelled"
+			return {
+				"symbol": symbol,
+				"qty": quantity,
+				"side": "buy",
+				"type": "market",
+				"time_in_force": "gtc",
+				"asset_class": "crypto"
+			}
 		else:
 			#return false if this order is too small to be carried out
 			return False
 
-	#places an order to sell all cryptocurrency in a position
-	def sellCrypto(self, symbol):
-		#get the positions of this account
-		positions = self.alpaca.list_positions()
-
-		#make a list of the current positions
-		crypto_positions = []
-		for i in positions:
-			crypto_positions.append(i.symbol)
-
+	#plans an order to sell all cryptocurrency in a position, returns the arguments of the order or False
+	def planSellCrypto(self, symbol, asset):
 		#check to see if the current symbol is held
-		if (symbol in crypto_positions):
+		book = self.getPositionBook()
+		if (symbol in book):
 			#get the amount of crypto for this position
-			current_position = self.alpaca.get_position(symbol)
-			quantity = current_position.qty
+			quantity = book.qty(symbol)
 
 			#get the minimum order size and trade increment for this order to work
-			crypto_asset = self.alpaca.get_asset(symbol)
-			min_order = crypto_asset.min_order_size
-			min_trade_increment =  crypto_asset.min_trade_increment
+			min_order = asset.min_order_size
+			min_trade_increment = asset.min_trade_increment
 
 			#create a quantity that is based on the minimum trade increment in order for the selling to work
 			increment_amount = float(quantity) // float(min_trade_increment)
@@ -612,14 +898,15 @@ class Trader:
 
 			#the quantity to order must be more than the minimum order amount for it to process
 			if (float(quantity) >= float(min_order)):
-				#return an order for selling a cryptocurrency
-				return self.alpaca.submit_order(
-					symbol=symbol,
-					qty=quantity,
-					side="sell",
-					type="market",
-					time_in_force="gtc"
-				)
+				#an order for selling a cryptocurrency
+				return {
+					"symbol": symbol,
+					"qty": quantity,
+					"side": "sell",
+					"type": "market",
+					"time_in_force": "gtc",
+					"asset_class": "crypto"
+				}
 			else:
 				#return false if the quantity is not processable
 				return False
@@ -627,70 +914,58 @@ class Trader:
 			#return false if this is not a currently held position
 			return False
 
-	#a function that randomly buys and sells crypto based on the sudoku board values
-	def cascadeCrypto(self, numbers, hold=False):
-		#get a random list of crypto coins
-		coins = self.cryptoCoins()
+	#places an order for a cryptocurrency
+	def buyCrypto(self, symbol, money):
+		#get the price of one full coin and information about this crypto asset
+		cryptoprice = self.getCryptoBar(symbol).close
+		crypto_asset = self.getAsset(symbol)
 
-		#get the current positions of this account and make a list of the symbols of these positions
-		positions = self.alpaca.list_positions()
-		crypto_positions = []
-		for pos in positions:
-			crypto_positions.append(pos.symbol)
+		order = self.planBuyCrypto(symbol, money, cryptoprice, crypto_asset)
 
-		#get the amount of cash available for the alpaca account
-		cash = float(self.alpaca.get_account().cash)
+		return self.submitOrder(order) if order else False
 
-		#get the amount of cash available for each buy/sell decision
-		cash_alloted = float(cash)/len(coins)
+	#places an order to sell all cryptocurrency in a position
+	def sellCrypto(self, symbol):
+		#only get information about the asset if there is a position to sell
+		if (symbol not in self.getPositionBook()):
+			return False
 
-		#loop through the board values to make random decisions
-		for value in numbers:
-			#get the current coin to buy/sell
-			coin = coins[0]
-			print(coin + ":")
+		order = self.planSellCrypto(symbol, self.getAsset(symbol))
 
-			#if the number is less than 4, buy the crypto
-			if (value < 5):
-				print("Buying shares with alloted cash...")
-				order = self.buyCrypto(coin, cash_alloted)
-			elif (value > 5 and coin in crypto_positions): #if the number is more than 4, sell the crypto
-				#check to see if the algorithm is supposed to sell positions
-				if (not hold):
-					print("Selling all shares in current position...")
-					order = self.sellCrypto(coin)
+		return self.submitOrder(order) if order else False
 
-					#if the selling does not work, buy more of this crypto
-					if (not order):
-						print("Too little shares to sell, buying more shares...")
-						order = self.buyCrypto(coin, cash_alloted)
-				else: #the algorithm is supposed to hold/buy positions only
-					print("Holding current position...")
-					order = False
-			else: #if the number is 4, then buy crypto with half of the alloted cash
-				print("Buying shares with 1/2 of alloted cash...")
-				order = self.buyCrypto(coin, cash_alloted/2)
+	#a function that randomly buys and sells crypto based on the sudoku board values
+	def cascadeCrypto(self, numbers, hold=False, coins=0):
+		#if there is no list of coins given, get a random list of crypto coins
+		if (not coins):
+			coins = self.cryptoCoins()
 
-			#check to see if the order was carried out
-			if (order):
-				#print the order
-				print(order.side)
-				if (order.side == "buy"):
-					print("$" + str(order.notional))
-				elif (order.side == "sell"):
-					print(str(order.qty))
-			else:
-				print("Order not carried out or HODLing current position.")
+		#get the current positions of this account
+		crypto_positions = self.getPositionBook().symbols()
 
-			#print newline for organization
-			print()
+		#get the amount of cash available for the alpaca account
+		cash = float(self.alpaca.get_account().cash)
 
-			#remove this coin from the list to move onto the next coin
-			coins.remove(coin)
+		#get the amount of cash available for each buy/sell decision
+		cash_alloted = float(cash)/len(coins)
 
-			#break the loop if there are no more cryptos to buy/sell
-			if (not len(coins)):
-				break
+		#get the prices and asset information of every coin that gets a decision at once
+		coins = list(coins[:len(numbers)])
+		prices = self.getLatestCryptoPrices(coins)
+		assets = self.getAssets(coins)
+
+		#plan the orders for every coin, then send them all at once
+		plan = self.planCascade(
+			numbers,
+			coins,
+			hold,
+			cash_alloted,
+			crypto_positions,
+			lambda coin, money: self.planBuyCrypto(coin, money, prices[coin], assets[coin]),
+			lambda coin: self.planSellCrypto(coin, assets[coin])
+		)
+
+		return self.submitPlan(plan)
 
 	#a function that sells crypto positions based on unrealized profit/loss
 	def sellProfitCrypto(self):
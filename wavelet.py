@@ -0,0 +1,172 @@
+'''
+This is a module to break series of market data into frequency bands with the haar wavelet transform
+'''
+import numpy as np
+
+#the scaling of the orthonormal haar wavelet, so the energy of the bands adds up to the energy of the series
+SCALE = np.sqrt(0.5)
+
+#a function to get the amount of levels that fit a series of a length (the most levels if none are asked for)
+def waveletLevels(length, levels=None):
+	most = int(np.log2(length)) if length > 1 else 0
+
+	if (levels is None):
+		return most
+
+	return min(int(levels), most)
+
+#a function to run a multilevel haar transform along the last axis of an array, works on a series or a (symbols x bars) array
+def haarTransform(values, levels=None):
+	'''
+	returns the detail coefficients of each level from the finest (pairs of bars) to the
+	coarsest, the approximation coefficients of the last level and the amount of bars at the
+	start that were left out. the transform works on a whole multiple of 2^levels bars, so the
+	oldest bars that do not fit are left out
+	'''
+	values = np.asarray(values, dtype=float)
+	levels = waveletLevels(values.shape[-1], levels)
+
+	#leave out the oldest bars so every level splits into whole pairs
+	skipped = values.shape[-1] % (1 << levels)
+	approx = values[..., skipped:]
+
+	details = []
+	for level in range(levels):
+		evens = approx[..., 0::2]
+		odds = approx[..., 1::2]
+
+		details.append((evens - odds) * SCALE)
+		approx = (evens + odds) * SCALE
+
+	return details, approx, skipped
+
+#a function to get the energy of each band of a transform, returns an array of (levels + 1) energies with the approximation last
+def bandEnergies(details, approx):
+	energies = [np.einsum("...i,...i->...", detail, detail) for detail in details]
+	energies.append(np.einsum("...i,...i->...", approx, approx))
+
+	return np.stack(energies, axis=0)
+
+#a function to turn the bands of a transformed series into wave dictionaries like the segment waves of the analyst
+def bandWaves(values, levels=None, bar_period=50):
+	'''
+	each detail band becomes a wave. the amplitude is the amplitude of a sine wave with the
+	same energy as the band and the intercept is the mean of the series. the order is the
+	places of the bars covered by the coefficients that are at least as strong as the typical
+	(root mean square) coefficient of the band, which is where the band shows itself
+	'''
+	values = np.asarray(values, dtype=float)
+	details, approx, skipped = haarTransform(values, levels)
+	length = values.shape[-1] - skipped
+
+	if (not details):
+		return []
+
+	energies = bandEnergies(details, approx)
+	intercept = float(values[skipped:].mean())
+
+	waves = []
+	for level, detail in enumerate(details):
+		scale = 1 << (level+1)
+		energy = float(energies[level])
+
+		#find the coefficients at least as strong as the typical coefficient and the bars each of them covers
+		strong = np.flatnonzero(np.abs(detail) >= np.sqrt(energy / len(detail)))
+		order = (skipped + (strong[:, None]*scale) + np.arange(scale)[None, :]).ravel()
+
+		waves.append({
+			"amplitude": float(np.sqrt((2*energy) / length)),
+			"intercept": intercept,
+			"order": order.tolist(),
+			"bar_period": bar_period,
+			"level": level + 1,
+			"scale": scale,
+			"energy": energy
+		})
+
+	return waves
+
+#an organized class for a haar transform that is updated one bar at a time for many symbols at once
+class HaarStream:
+	'''
+	haarTransform lines its pairs up with the latest bar, so the pairs move by one every time a
+	bar is added. to give the same coefficients as haarTransform on the window after every bar,
+	each bar makes the coefficient of every level for the block of bars that ends at that bar
+	(from sums of the last 2^levels bars) and keeps it in a ring of the last window bars. a band
+	is every 2^level th coefficient going back from the latest bar, which is the same grid as
+	haarTransform. like haarTransform, the window is cut to a whole multiple of 2^levels bars
+	'''
+	#initialization of the stream with the amount of symbols, the amount of levels and the amount of bars in the window
+	def __init__(self, symbols=1, levels=6, window=1024):
+		self.symbols = symbols
+		self.levels = levels
+
+		#the amount of bars in a block of the last level, and the window cut to whole blocks
+		self.block = 1 << levels
+		self.window = max((window // self.block) * self.block, self.block)
+
+		#the amount of bars that have been added
+		self.count = 0
+
+		#the last block of bars of every symbol, as a ring
+		self.recent = np.zeros((self.block, symbols))
+
+		#the coefficient of each level for the block that ends at each bar of the window as rings, with the approximations of the last level kept last
+		self.coefficients = np.zeros((levels+1, self.window, symbols))
+
+		#the scaling of the coefficients of each level
+		self.scales = SCALE**np.arange(levels+1)
+
+	#a function to add the next bar of every symbol, returns a list of the (level, coefficients) of the blocks that end at this bar
+	def update(self, values):
+		value = np.asarray(values, dtype=float).reshape(self.symbols)
+		self.recent[self.count % self.block] = value
+		self.count += 1
+
+		#the sums of the last 1, 2, 3... bars of the block, from the newest bar back
+		newest = (self.count - 1 - np.arange(min(self.count, self.block))) % self.block
+		sums = np.cumsum(self.recent[newest], axis=0)
+
+		slot = (self.count - 1) % self.window
+		made = []
+		for level in range(1, self.levels+1):
+			half = 1 << (level-1)
+			if (self.count < 2*half):
+				break
+
+			#the older half of the block minus the newer half, the same as the evens minus the odds of haarTransform
+			detail = ((sums[(2*half)-1] - sums[half-1]) - sums[half-1]) * self.scales[level]
+
+			self.coefficients[level-1, slot] = detail
+			made.append((level, detail))
+
+		#keep the approximations of the last level as the lowest band
+		if (self.count >= self.block):
+			self.coefficients[self.levels, slot] = sums[self.block-1] * self.scales[self.levels]
+
+		return made
+
+	#a function to add many bars of every symbol in order, the values are a (symbols x bars) array
+	def extend(self, values):
+		values = np.asarray(values, dtype=float).reshape(self.symbols, -1)
+
+		for column in values.T:
+			self.update(column)
+
+	#returns the coefficients of a level over the window as an array of (symbols x coefficients) from oldest to newest, level 0 is the approximation
+	def band(self, level):
+		step = (1 << level) if level else self.block
+		index = (level-1) if level else self.levels
+
+		#the bars that are covered, cut to whole blocks of the last level like haarTransform
+		covered = (min(self.count, self.window) // self.block) * self.block
+
+		slots = (self.count - 1 - (step*np.arange((covered // step) - 1, -1, -1))) % self.window
+
+		return self.coefficients[index, slots].T
+
+	#returns the energy of each band over the window as an array of (levels + 1 x symbols), with the approximation last
+	def energies(self):
+		bands = [self.band(level) for level in range(1, self.levels+1)] + [self.band(0)]
+
+		return np.stack([np.einsum("ij,ij->i", band, band) for band in bands], axis=0)